@@ -0,0 +1,422 @@
+#!/usr/bin/env python3
+"""
+PDF2PPT Benchmark Suite
+Times each conversion stage on a synthetic, reproducible PDF corpus
+
+Usage:
+    python benchmark.py --pages 10,100 --parallel 1,4 --output results.json
+    python benchmark.py --baseline baseline.json   # exit code 1 on regressions
+    python benchmark.py --startup                  # import and dependency check time
+    python benchmark.py --optimize-svg             # svg2emf on optimized SVGs, to compare with a plain run
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import zlib
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent / 'src'))
+
+from pypdf import PdfReader
+from rich.console import Console
+from rich.table import Table
+
+import pdf2ppt
+from pdf2ppt import pdf2svg, svg2emf, emf2ppt, extract_template, optimize_svgs, InkscapePool, SvgOptimizer
+
+console = Console()
+
+DECKS = ('text', 'vector', 'raster', 'transparency', 'themed')
+PAGE_WIDTH, PAGE_HEIGHT = 720, 405  # 16:9 slide in points
+IMAGE_WIDTH, IMAGE_HEIGHT = 1200, 900
+IMAGE_VARIANTS = 4  # distinct images cycled through a raster deck
+LOREM = ('Lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor '
+         'incididunt ut labore et dolore magna aliqua').split()
+
+
+# ---------------------------------------------------------------------------
+# Synthetic corpus
+# ---------------------------------------------------------------------------
+
+class PdfBuilder:
+    """Minimal PDF writer, so the corpus needs no extra dependencies."""
+
+    def __init__(self):
+        self.objects = []
+
+    def add(self, body: bytes) -> int:
+        self.objects.append(body)
+        return len(self.objects)
+
+    def reserve(self) -> int:
+        return self.add(b'')
+
+    def set(self, num: int, body: bytes):
+        self.objects[num - 1] = body
+
+    def stream(self, data: bytes, entries: str = '', compress: bool = True) -> int:
+        if compress:
+            data = zlib.compress(data)
+            entries += ' /Filter /FlateDecode'
+        return self.add(f'<< /Length {len(data)}{entries} >>\nstream\n'.encode() + data + b'\nendstream')
+
+    def write(self, path: Path, root: int):
+        out = bytearray(b'%PDF-1.5\n%\xe2\xe3\xcf\xd3\n')
+        offsets = []
+        for num, body in enumerate(self.objects, 1):
+            offsets.append(len(out))
+            out += f'{num} 0 obj\n'.encode() + body + b'\nendobj\n'
+        xref = len(out)
+        out += f'xref\n0 {len(self.objects) + 1}\n0000000000 65535 f \n'.encode()
+        for offset in offsets:
+            out += f'{offset:010d} 00000 n \n'.encode()
+        out += (f'trailer\n<< /Size {len(self.objects) + 1} /Root {root} 0 R >>\n'
+                f'startxref\n{xref}\n%%EOF\n').encode()
+        path.write_bytes(out)
+
+
+def text_ops(rng: random.Random, page: int, lines: int) -> str:
+    ops = [f'BT /F1 20 Tf 36 370 Td (Page {page}) Tj ET']
+    for i in range(lines):
+        words = ' '.join(rng.choice(LOREM) for _ in range(14))
+        ops.append(f'BT /F1 8 Tf 36 {350 - i * 8} Td ({words}) Tj ET')
+    return '\n'.join(ops)
+
+
+def vector_ops(rng: random.Random, shapes: int) -> str:
+    ops = []
+    for _ in range(shapes):
+        r, g, b = (rng.random() for _ in range(3))
+        points = ' '.join(f'{rng.uniform(0, PAGE_WIDTH):.2f} {rng.uniform(0, PAGE_HEIGHT):.2f}' for _ in range(3))
+        x, y = rng.uniform(0, PAGE_WIDTH), rng.uniform(0, PAGE_HEIGHT)
+        if rng.random() < 0.5:
+            ops.append(f'{r:.3f} {g:.3f} {b:.3f} RG {rng.uniform(0.2, 3):.2f} w {x:.2f} {y:.2f} m {points} c S')
+        else:
+            ops.append(f'{r:.3f} {g:.3f} {b:.3f} rg {x:.2f} {y:.2f} m {points} c h f')
+    return '\n'.join(ops)
+
+
+def theme_ops() -> str:
+    """Background, header bar, logo and footer drawn first on every page, like a Beamer theme."""
+    rng = random.Random('theme')  # the same logo on every page
+    return '\n'.join([
+        '0.96 0.96 0.98 rg 0 0 720 405 re f',
+        '0.1 0.2 0.45 rg 0 375 720 30 re f 0 0 720 18 re f',
+        'q 0.07 0 0 0.07 660 378 cm ' + vector_ops(rng, 60).replace('\n', ' ') + ' Q',
+        'BT /F1 7 Tf 1 1 1 rg 36 6 Td (pdf2ppt benchmark theme) Tj ET',
+    ])
+
+
+def noise_image(rng: random.Random) -> bytes:
+    """RGB pixels that compress poorly, like photos and scans."""
+    row = bytes(int(255 * x / IMAGE_WIDTH) for x in range(IMAGE_WIDTH) for _ in range(3))
+    return b''.join(bytes(a ^ b for a, b in zip(row, rng.randbytes(len(row)))) if y % 2 else row
+                    for y in range(IMAGE_HEIGHT))
+
+
+def generate_deck(kind: str, pages: int, path: Path, seed: int = 0):
+    """Write a ``pages``-page synthetic PDF stressing one conversion path."""
+    rng = random.Random(f'{kind}:{pages}:{seed}')
+    pdf = PdfBuilder()
+    catalog, pages_root = pdf.reserve(), pdf.reserve()
+    font = pdf.add(b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>')
+    xobjects, ext_gstates = '', ''
+    if kind == 'raster':
+        images = [pdf.stream(noise_image(rng), f' /Type /XObject /Subtype /Image /Width {IMAGE_WIDTH}'
+                             f' /Height {IMAGE_HEIGHT} /ColorSpace /DeviceRGB /BitsPerComponent 8')
+                  for _ in range(IMAGE_VARIANTS)]
+        xobjects = ' '.join(f'/Im{i} {num} 0 R' for i, num in enumerate(images))
+    elif kind == 'transparency':
+        mask = pdf.stream(b'0.2 g 0 0 360 405 re f 0.9 g 360 0 360 405 re f',
+                          f' /Type /XObject /Subtype /Form /BBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}]'
+                          ' /Group << /S /Transparency /CS /DeviceRGB >>')
+        ext_gstates = (f'/GS1 << /Type /ExtGState /ca 0.5 /CA 0.5 >> '
+                       f'/GS2 << /Type /ExtGState /SMask << /S /Luminosity /G {mask} 0 R >> >>')
+    kids = []
+    for page in range(1, pages + 1):
+        if kind == 'text':
+            ops = text_ops(rng, page, 40)
+        elif kind == 'vector':
+            ops = text_ops(rng, page, 0) + '\n' + vector_ops(rng, 400)
+        elif kind == 'raster':
+            ops = (f'q {PAGE_WIDTH - 40} 0 0 {PAGE_HEIGHT - 60} 20 10 cm /Im{page % IMAGE_VARIANTS} Do Q\n'
+                   + text_ops(rng, page, 0))
+        elif kind == 'themed':
+            ops = (theme_ops() + f'\nBT /F1 7 Tf 1 1 1 rg 670 6 Td ({page} / {pages}) Tj ET\n0 g\n'
+                   + text_ops(rng, page, 10))
+        else:
+            ops = (text_ops(rng, page, 10) + '\nq /GS1 gs ' + vector_ops(rng, 40) + ' Q\n'
+                   f'q /GS2 gs 0 0 1 rg 40 40 {PAGE_WIDTH - 80} {PAGE_HEIGHT - 120} re f Q')
+        content = pdf.stream(ops.encode('latin-1'))
+        resources = f'/Font << /F1 {font} 0 R >>'
+        if xobjects:
+            resources += f' /XObject << {xobjects} >>'
+        if ext_gstates:
+            resources += f' /ExtGState << {ext_gstates} >>'
+        kids.append(pdf.add(f'<< /Type /Page /Parent {pages_root} 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}]'
+                            f' /Resources << {resources} >> /Contents {content} 0 R >>'.encode()))
+    pdf.set(pages_root, f'<< /Type /Pages /Kids [{" ".join(f"{k} 0 R" for k in kids)}] /Count {pages} >>'.encode())
+    pdf.set(catalog, f'<< /Type /Catalog /Pages {pages_root} 0 R >>'.encode())
+    pdf.write(path, catalog)
+
+
+def corpus_pdf(corpus_dir: Path, kind: str, pages: int) -> Path:
+    """Path of a synthetic deck, generating it on first use."""
+    path = corpus_dir / f'{kind}-{pages}.pdf'
+    if not path.exists():
+        corpus_dir.mkdir(parents=True, exist_ok=True)
+        with console.status(f'[dim]Generating {path.name}...[/dim]'):
+            generate_deck(kind, pages, path)
+    return path
+
+
+# ---------------------------------------------------------------------------
+# Timing
+# ---------------------------------------------------------------------------
+
+def timed(func, *args) -> tuple:
+    started = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - started
+
+
+def tool_version(cmd: str) -> str:
+    try:
+        result = subprocess.run([cmd, '--version'], capture_output=True, text=True, timeout=30)
+    except (OSError, subprocess.TimeoutExpired):
+        return 'unavailable'
+    return (result.stdout or result.stderr).strip().splitlines()[0] if (result.stdout or result.stderr) else 'unknown'
+
+
+def record(results: list, deck: str, pages: int, stage: str, parallel: int, samples: list, output_bytes: int):
+    seconds = statistics.median(samples)
+    results.append({
+        'deck': deck, 'pages': pages, 'stage': stage, 'parallel': parallel,
+        'seconds': round(seconds, 4), 'min_seconds': round(min(samples), 4),
+        'pages_per_second': round(pages / seconds, 3) if seconds else None,
+        'output_bytes': output_bytes,
+    })
+    rate = f'  {pages / seconds if seconds else 0:8.2f} pages/s' if pages else ''
+    console.print(f'  {stage:8} -j {parallel:<3} {seconds:8.3f}s{rate}')
+
+
+def dir_bytes(directory: Path, suffix: str) -> int:
+    return sum(p.stat().st_size for p in directory.glob(f'*{suffix}'))
+
+
+def bench_deck(pdf_path: Path, deck: str, args) -> list:
+    """Time pdf2svg and svg2emf at each parallel value, then emf2ppt, on one deck.
+
+    With ``--template`` the deck's shared template is split out first (timed
+    as its own stage) and results are recorded under ``{deck}+template``.
+    With ``--optimize-svg`` the SVGs are optimized before svg2emf (timed as
+    the ``svgopt`` stage) and results are recorded under ``{deck}+svgopt``.
+    """
+    results = []
+    pdf_reader = PdfReader(pdf_path)
+    pages = list(range(1, len(pdf_reader.pages) + 1))
+    console.print(f'[bold]{pdf_path.name}[/bold] ({pdf_path.stat().st_size / 1e6:.1f} MB)')
+    work_dir = Path(tempfile.mkdtemp(prefix='pdf2ppt-bench-'))
+    render_path, convert_pages, template = pdf_path, pages, None
+    if args.optimize_svg:
+        deck += '+svgopt'
+    try:
+        if args.template:
+            template, seconds = timed(extract_template, pdf_reader, pages, work_dir / pdf_path.name)
+            if template is not None:
+                deck += '+template'
+                render_path, convert_pages = template.path, pages + [template.template_page]
+                record(results, deck, len(pages), 'template', 1, [seconds], template.path.stat().st_size)
+        for parallel in args.parallel:
+            samples = []
+            for _ in range(args.repeat):
+                ok, seconds = timed(pdf2svg, render_path, args.pdf2svg_path, False, convert_pages, parallel,
+                                    work_dir)
+                if not ok:
+                    raise RuntimeError(f'pdf2svg failed on {pdf_path.name}')
+                samples.append(seconds)
+            record(results, deck, len(pages), 'pdf2svg', parallel, samples, dir_bytes(work_dir, '.svg'))
+        if args.optimize_svg:
+            _, seconds = timed(optimize_svgs, render_path, convert_pages, SvgOptimizer(), max(args.parallel),
+                               work_dir)
+            record(results, deck, len(pages), 'svgopt', max(args.parallel), [seconds], dir_bytes(work_dir, '.svg'))
+        for parallel in args.parallel:
+            pool = None if args.no_pool else InkscapePool(args.inkscape_path, parallel)
+            try:
+                if pool is not None:
+                    pool.warm()  # startup is a one-off cost in the servers, so it is not timed
+                samples = []
+                for _ in range(args.repeat):
+                    (ok, _), seconds = timed(svg2emf, pdf_reader, pdf_path, args.inkscape_path, convert_pages,
+                                             False, True, parallel, pool, None, work_dir)
+                    if not ok:
+                        raise RuntimeError(f'svg2emf failed on {pdf_path.name}')
+                    samples.append(seconds)
+            finally:
+                if pool is not None:
+                    pool.close()
+            record(results, deck, len(pages), 'svg2emf', parallel, samples, dir_bytes(work_dir, '.emf'))
+        ppt_path = work_dir / f'{pdf_path.stem}.pptx'
+        samples = [timed(emf2ppt, pdf_reader, pdf_path, ppt_path, pages, False, None, work_dir, None, template)[1]
+                   for _ in range(args.repeat)]
+        record(results, deck, len(pages), 'emf2ppt', 1, samples, ppt_path.stat().st_size)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return results
+
+
+def spawn(cmd: list, env: dict) -> subprocess.CompletedProcess:
+    return subprocess.run(cmd, env=env, capture_output=True)
+
+
+# Each runs in a fresh interpreter, as a scripted `pdf2ppt` call would
+STARTUP_SCRIPTS = {
+    'import': 'import pdf2ppt',
+    'version': "import sys, pdf2ppt; sys.argv = ['pdf2ppt', '--version']; pdf2ppt.main()",
+    'deps': 'import pdf2ppt; pdf2ppt.check_dependencies({pdf2svg!r}, {inkscape!r})',
+}
+
+
+def bench_startup(args) -> list:
+    """Time importing pdf2ppt, `--version` and the dependency check in new processes.
+
+    The dependency check is timed with an empty probe cache (``deps-cold``)
+    and with the cache its first run left behind (``deps``).
+    """
+    results = []
+    repeat = max(args.repeat, 5)  # single runs are dominated by noise
+    env = dict(os.environ, PYTHONPATH=str(Path(__file__).parent / 'src'))
+    console.print('[bold]startup[/bold]')
+    cache_dir = Path(tempfile.mkdtemp(prefix='pdf2ppt-bench-'))
+    try:
+        for stage, script in STARTUP_SCRIPTS.items():
+            script = script.format(pdf2svg=args.pdf2svg_path, inkscape=args.inkscape_path)
+            cmd = [sys.executable, '-c', script]
+            if stage == 'deps':
+                cold = []
+                for i in range(repeat):
+                    env['PDF2PPT_CACHE_DIR'] = str(cache_dir / str(i))
+                    cold.append(timed(spawn, cmd, env)[1])
+                record(results, 'startup', 0, 'deps-cold', 1, cold, 0)
+            samples = [timed(spawn, cmd, env)[1] for _ in range(repeat)]
+            record(results, 'startup', 0, stage, 1, samples, 0)
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+    return results
+
+
+# ---------------------------------------------------------------------------
+# Baseline comparison
+# ---------------------------------------------------------------------------
+
+def result_key(result: dict) -> tuple:
+    return result['deck'], result['pages'], result['stage'], result['parallel']
+
+
+def compare(results: list, baseline: dict, tolerance: float) -> int:
+    """Print each measurement against the baseline. Returns the number of regressions."""
+    previous = {result_key(r): r for r in baseline.get('results', [])}
+    table = Table(title=f'Compared with baseline (tolerance {tolerance:.0%})')
+    for column in ('Deck', 'Pages', 'Stage', '-j', 'Baseline s', 'Now s', 'Change'):
+        table.add_column(column, justify='right' if column not in ('Deck', 'Stage') else 'left')
+    regressions = 0
+    for result in results:
+        old = previous.get(result_key(result))
+        if old is None or not old['seconds']:
+            continue
+        change = result['seconds'] / old['seconds'] - 1
+        if change > tolerance:
+            regressions += 1
+            style = 'red'
+        elif change < -tolerance:
+            style = 'green'
+        else:
+            style = 'dim'
+        table.add_row(result['deck'], str(result['pages']), result['stage'], str(result['parallel']),
+                      f"{old['seconds']:.3f}", f"{result['seconds']:.3f}", f'[{style}]{change:+.1%}[/{style}]')
+    console.print(table)
+    return regressions
+
+
+def int_list(value: str) -> list:
+    return [int(v) for v in value.split(',') if v]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark pdf2ppt stages on a synthetic PDF corpus')
+    parser.add_argument('--decks', type=lambda v: v.split(','), default=list(DECKS),
+                        help=f'Comma-separated deck kinds (default: {",".join(DECKS)})')
+    parser.add_argument('--pages', type=int_list, default=[10, 100],
+                        help='Comma-separated page counts (default: 10,100; up to 1000 is supported)')
+    parser.add_argument('--parallel', type=int_list, default=[1, 2, 4],
+                        help='Comma-separated parallel values for pdf2svg and svg2emf (default: 1,2,4)')
+    parser.add_argument('--repeat', type=int, default=1, help='Runs per measurement, median is reported')
+    parser.add_argument('--corpus-dir', type=Path, default=Path(tempfile.gettempdir()) / 'pdf2ppt-bench-corpus',
+                        help='Where generated PDFs are kept between runs')
+    parser.add_argument('--output', '-o', type=Path, default=Path('benchmark-results.json'),
+                        help='JSON results file (default: benchmark-results.json)')
+    parser.add_argument('--baseline', type=Path, help='Results file to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.15,
+                        help='Slowdown counted as a regression (default: 0.15 = 15%%)')
+    parser.add_argument('--pdf2svg-path', default='pdf2svg', help='Path to pdf2svg')
+    parser.add_argument('--inkscape-path', default='inkscape', help='Path to inkscape')
+    parser.add_argument('--no-pool', action='store_true', help='Time one Inkscape process per page')
+    parser.add_argument('--startup', action='store_true',
+                        help='Time import, --version and dependency checks instead of the stages')
+    parser.add_argument('--template', action='store_true',
+                        help='Split out each deck\'s shared slide template before converting')
+    parser.add_argument('--optimize-svg', action='store_true',
+                        help='Optimize the SVGs before svg2emf (see pdf2ppt.svgopt)')
+    args = parser.parse_args()
+    unknown = set(args.decks) - set(DECKS)
+    if unknown:
+        parser.error(f'unknown deck kinds: {", ".join(sorted(unknown))}')
+
+    console.print(f'🏁 [bold blue]pdf2ppt[/bold blue] v{pdf2ppt.__version__} benchmark')
+    results = []
+    if args.startup:
+        results.extend(bench_startup(args))
+    else:
+        for deck in args.decks:
+            for pages in args.pages:
+                results.extend(bench_deck(corpus_pdf(args.corpus_dir, deck, pages), deck, args))
+
+    report = {
+        'meta': {
+            'pdf2ppt': pdf2ppt.__version__,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'pdf2svg': args.pdf2svg_path,
+            'inkscape': tool_version(args.inkscape_path),
+            'pool': not args.no_pool,
+            'template': args.template,
+            'optimize_svg': args.optimize_svg,
+            'repeat': args.repeat,
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        },
+        'results': results,
+    }
+    args.output.write_text(json.dumps(report, indent=2))
+    console.print(f'📄 Results written to [cyan]{args.output}[/cyan]')
+
+    if args.baseline:
+        regressions = compare(results, json.loads(args.baseline.read_text()), args.tolerance)
+        if regressions:
+            console.print(f'[bold red]❌ {regressions} measurements regressed[/bold red]')
+            sys.exit(1)
+        console.print('[bold green]✅ No regressions[/bold green]')
+
+
+if __name__ == '__main__':
+    main()
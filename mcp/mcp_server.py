@@ -22,27 +22,80 @@ Configuration (for Claude Desktop or other MCP clients):
 """
 
 from pathlib import Path
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Callable
+import asyncio
+import contextvars
+import os
+import shutil
 import sys
+import tempfile
 
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
 
-from fastmcp import FastMCP
-from pdf2ppt import pdf2svg, svg2emf, emf2ppt, clean_tmp, parse_page_range
+from fastmcp import FastMCP, Context
+from pdf2ppt import pdf2svg, svg2emf, emf2ppt, optimize_images, optimize_svgs, ImageOptimizer, SvgOptimizer, parse_page_range, get_shared_pool, emf_cache, find_duplicate_pages, convert_batch, BatchDocument
+from pdf2ppt.cache import probe_tool
+from pdf2ppt.concurrency import AdaptiveLimiter, set_child_limits
 from pypdf import PdfReader
 
 mcp = FastMCP("pdf2ppt")
 
+# Inkscape workers stay alive between tool calls, so only the first conversion pays for startup
+INKSCAPE_POOL = get_shared_pool('inkscape', size=int(os.environ.get('INKSCAPE_WORKERS', 4)))
+# ADAPTIVE_CONCURRENCY=1 shares one limiter between all tool calls, which tunes how many pages are in
+# Inkscape at once from CPU load, free memory and page latency (see pdf2ppt.concurrency)
+LIMITER = AdaptiveLimiter(max_limit=INKSCAPE_POOL.size) if os.environ.get('ADAPTIVE_CONCURRENCY') else None
+# CHILD_MEMORY_MB / CHILD_NICE cap the address space and priority of every pdf2svg and Inkscape process
+set_child_limits(int(os.environ['CHILD_MEMORY_MB']) if os.environ.get('CHILD_MEMORY_MB') else None,
+                 int(os.environ.get('CHILD_NICE') or 0))
+# Per-page EMF cache, located by PDF2PPT_CACHE_DIR / PDF2PPT_CACHE_SIZE_MB
+EMF_CACHE = emf_cache('inkscape')
+
+
+# Order of the conversion stages, used to turn per-stage page counts into overall progress
+STAGES = ('pdf2svg', 'svg2emf', 'emf2ppt')
+
+
+def request_notifier(loop: asyncio.AbstractEventLoop) -> Callable:
+    """Function sending a Context coroutine (e.g. ``ctx.info(...)``) from any thread.
+
+    The Context finds its session through context variables, which threads
+    started by the converter do not inherit, so the coroutine is scheduled
+    from a copy of the calling request's context.
+    """
+    context = contextvars.copy_context()
+    
+    def notify(coroutine):
+        context.copy().run(asyncio.run_coroutine_threadsafe, coroutine, loop)
+    
+    return notify
+
+
+def progress_reporter(ctx: Context, loop: asyncio.AbstractEventLoop) -> Callable:
+    """Progress callback forwarding per-page events from worker threads as MCP progress notifications."""
+    notify = request_notifier(loop)
+    
+    def on_progress(event: dict):
+        stage = STAGES.index(event['stage'])
+        percent = 100 * (stage + event['completed'] / event['total']) / len(STAGES)
+        message = f"{event['stage']}: page {event['page']} ({event['completed']}/{event['total']})"
+        notify(ctx.report_progress(progress=round(percent, 1), total=100, message=message))
+    
+    return on_progress
+
 
 @mcp.tool()
-def convert_pdf_to_ppt(
+async def convert_pdf_to_ppt(
     input_pdf: str,
     output_ppt: Optional[str] = None,
     pages: Optional[str] = None,
     parallel: int = 4,
     force: bool = True,
-    no_clean: bool = False
+    no_clean: bool = False,
+    image_dpi: Optional[int] = None,
+    optimize_svg: bool = False,
+    ctx: Context = None
 ) -> Dict[str, Any]:
     """
     Convert a PDF file to PowerPoint presentation with vector graphics.
@@ -75,7 +128,18 @@ def convert_pdf_to_ppt(
               Set to False to prevent accidental overwrites
         
         no_clean: Keep temporary files for debugging (default: False)
-                 Temporary files are stored in {input_dir}/_pdf2ppt.tmp/
+                 Each conversion gets its own temporary directory, returned as
+                 "work_dir" when no_clean=True
+        
+        image_dpi: Downsample embedded images to this DPI of the slide size (optional)
+                  Example: 150 for screen, 300 for print
+                  Photo-heavy decks convert faster and produce much smaller files
+                  Leave empty to keep images at full resolution
+        
+        optimize_svg: Optimize each page's SVG before Inkscape (default: False)
+                     Rounds coordinates to what the slide can show, flattens
+                     groups, drops unused definitions and joins strokes;
+                     speeds up vector-heavy decks and shrinks their EMFs
     
     Returns:
         Dictionary with conversion results:
@@ -84,6 +148,7 @@ def convert_pdf_to_ppt(
             "output": "/path/to/output.pptx",
             "pages_converted": 10,
             "total_pages": 20,
+            "duplicate_pages": 3 (identical pages converted only once),
             "warning": "Pages [3, 5] may have transparency issues" (if applicable)
         }
     
@@ -105,7 +170,31 @@ def convert_pdf_to_ppt(
         - "Failed to convert PDF to SVG" → Install pdf2svg (brew install pdf2svg)
         - "Failed to convert SVG to EMF" → Install inkscape (brew install inkscape)
         - "Output file exists" → Use force=True or delete the existing file
+    
+    Progress:
+        Every page reports a progress notification after each stage
+        (pdf2svg, svg2emf, emf2ppt) when the client sends a progress token.
     """
+    on_progress = progress_reporter(ctx, asyncio.get_running_loop()) if ctx is not None else None
+    return await asyncio.to_thread(
+        _convert_pdf_to_ppt, input_pdf, output_ppt, pages, parallel, force, no_clean, image_dpi, on_progress,
+        optimize_svg
+    )
+
+
+def _convert_pdf_to_ppt(
+    input_pdf: str,
+    output_ppt: Optional[str] = None,
+    pages: Optional[str] = None,
+    parallel: int = 4,
+    force: bool = True,
+    no_clean: bool = False,
+    image_dpi: Optional[int] = None,
+    progress_callback: Optional[Callable] = None,
+    optimize_svg: bool = False
+) -> Dict[str, Any]:
+    """Blocking body of convert_pdf_to_ppt, also used by batch_convert_pdfs."""
+    work_dir = None
     try:
         input_path = Path(input_pdf)
         
@@ -135,17 +224,33 @@ def convert_pdf_to_ppt(
         # Parse page range
         pages_to_convert = parse_page_range(pages, total_pages) if pages else list(range(1, total_pages + 1))
         
+        # Private work directory, so concurrent conversions never share temp files
+        work_dir = Path(tempfile.mkdtemp(prefix='pdf2ppt-'))
+        
+        # Identical pages (e.g. Beamer overlays) are converted once
+        duplicates = find_duplicate_pages(pdf_reader, pages_to_convert)
+        unique_pages = [page for page in pages_to_convert if duplicates[page] == page]
+        
         # Step 1: PDF to SVG
-        if not pdf2svg(input_path, 'pdf2svg', False):
+        if not pdf2svg(input_path, 'pdf2svg', False, unique_pages, parallel, work_dir, progress_callback):
             return {
                 'status': 'error',
                 'error': 'Failed to convert PDF to SVG. Is pdf2svg installed? (brew install pdf2svg)'
             }
         
+        # Optional: downsample oversized embedded images before Inkscape sees them
+        if image_dpi:
+            optimize_images(pdf_reader, input_path, unique_pages, ImageOptimizer(image_dpi), parallel, work_dir)
+        
+        # Optional: smaller, flatter SVGs convert faster
+        if optimize_svg:
+            optimize_svgs(input_path, unique_pages, SvgOptimizer(), parallel, work_dir)
+        
         # Step 2: SVG to EMF
         success, filters = svg2emf(
             pdf_reader, input_path, 'inkscape',
-            pages_to_convert, False, False, parallel
+            unique_pages, False, False, parallel, INKSCAPE_POOL, EMF_CACHE, work_dir,
+            progress_callback, limiter=LIMITER
         )
         
         if not success:
@@ -155,22 +260,24 @@ def convert_pdf_to_ppt(
             }
         
         # Step 3: EMF to PPT
-        emf2ppt(pdf_reader, input_path, output_path, pages_to_convert, False)
-        
-        # Cleanup
-        if not no_clean:
-            clean_tmp(input_path, False)
+        emf2ppt(pdf_reader, input_path, output_path, pages_to_convert, False, duplicates, work_dir,
+                progress_callback)
         
         result = {
             'status': 'success',
             'output': str(output_path),
             'pages_converted': len(pages_to_convert),
-            'total_pages': total_pages
+            'total_pages': total_pages,
+            'duplicate_pages': len(pages_to_convert) - len(unique_pages)
         }
         
+        filters = [page for page in pages_to_convert if duplicates[page] in filters]
         if filters:
             result['warning'] = f'Pages {filters} may have transparency issues. See: https://github.com/neosun100/pdf2ppt/issues/1'
         
+        if no_clean:
+            result['work_dir'] = str(work_dir)
+        
         return result
         
     except Exception as e:
@@ -178,14 +285,20 @@ def convert_pdf_to_ppt(
             'status': 'error',
             'error': f'Unexpected error: {str(e)}'
         }
+    
+    finally:
+        # Cleanup
+        if work_dir is not None and not no_clean:
+            shutil.rmtree(work_dir, ignore_errors=True)
 
 
 @mcp.tool()
-def batch_convert_pdfs(
+async def batch_convert_pdfs(
     input_dir: str,
     output_dir: Optional[str] = None,
     pattern: str = "*.pdf",
-    parallel: int = 4
+    parallel: int = 4,
+    ctx: Context = None
 ) -> Dict[str, Any]:
     """
     Batch convert multiple PDF files in a directory.
@@ -193,6 +306,9 @@ def batch_convert_pdfs(
     This tool automatically finds all PDF files matching the pattern and converts them.
     Perfect for processing multiple lecture slides or presentation files at once.
     
+    All pages of all matched files share one work queue, so small files never
+    leave workers idle. Each PPTX is written as soon as its last page is done.
+    
     Args:
         input_dir: Directory containing PDF files (required)
                   Example: "./lectures" or "/path/to/slides"
@@ -207,8 +323,8 @@ def batch_convert_pdfs(
                   - "lecture*.pdf" → files starting with "lecture"
                   - "2024-*.pdf" → files starting with "2024-"
         
-        parallel: Number of parallel workers per file (default: 4)
-                 Higher values = faster conversion per file
+        parallel: Number of pages converted at once across all files (default: 4)
+                 Higher values = faster conversion (if you have multiple CPU cores)
     
     Returns:
         Dictionary with batch conversion results:
@@ -218,11 +334,12 @@ def batch_convert_pdfs(
             "failed": 0,
             "total": 5,
             "files": [
-                {"file": "lecture1.pdf", "status": "success", "output": "lecture1.pptx"},
-                {"file": "lecture2.pdf", "status": "success", "output": "lecture2.pptx"},
+                {"file": "lecture1.pdf", "status": "success", "output": "lecture1.pptx", "pages_converted": 20},
+                {"file": "lecture2.pdf", "status": "error", "output": null, "error": "Failed to convert page 3 to SVG"},
                 ...
             ]
         }
+        Files are listed in the order they finished.
     
     Examples:
         # Convert all PDFs in a directory
@@ -241,6 +358,11 @@ def batch_convert_pdfs(
         - "Input directory not found" → Check if the directory path is correct
         - "No PDF files found" → Check the pattern or directory contents
         - Individual file errors are reported in the 'files' array
+    
+    Progress:
+        Each file's result is sent as a log message as soon as it finishes,
+        with a progress notification counting finished files when the client
+        sends a progress token.
     """
     try:
         input_path = Path(input_dir)
@@ -263,36 +385,50 @@ def batch_convert_pdfs(
                 'error': f'No PDF files found matching pattern: {pattern} in {input_dir}'
             }
         
+        # One private work directory per file, removed as soon as its PPTX is written
+        documents = [
+            BatchDocument(pdf_file, output_path / pdf_file.with_suffix('.pptx').name,
+                          work_dir=Path(tempfile.mkdtemp(prefix='pdf2ppt-')))
+            for pdf_file in pdf_files
+        ]
         results = []
-        success_count = 0
-        fail_count = 0
-        
-        for pdf_file in pdf_files:
-            output_file = output_path / pdf_file.with_suffix('.pptx').name
-            
-            result = convert_pdf_to_ppt(
-                str(pdf_file),
-                str(output_file),
-                parallel=parallel,
-                force=True
+        notify = request_notifier(asyncio.get_running_loop())
+        
+        def on_document(doc: BatchDocument):
+            shutil.rmtree(doc.work_dir, ignore_errors=True)
+            result = {
+                'file': doc.pdf_path.name,
+                'status': 'error' if doc.error else 'success',
+                'output': None if doc.error else str(doc.ppt_path),
+                'error': doc.error
+            }
+            if not doc.error:
+                result['pages_converted'] = len(doc.pages)
+                if doc.pages_with_filters:
+                    result['warning'] = f'Pages {doc.pages_with_filters} may have transparency issues'
+            results.append(result)
+            if ctx is not None:
+                # Stream the file's result instead of holding it until the whole batch is done
+                message = (f"{result['file']}: {result['error']}" if doc.error
+                           else f"{result['file']} → {result['output']} ({result['pages_converted']} pages)")
+                notify(ctx.info(message))
+                notify(ctx.report_progress(progress=len(results), total=len(documents), message=message))
+        
+        try:
+            await asyncio.to_thread(
+                convert_batch, documents, 'pdf2svg', 'inkscape', parallel,
+                pool=INKSCAPE_POOL, cache=EMF_CACHE, on_document=on_document, limiter=LIMITER
             )
-            
-            results.append({
-                'file': pdf_file.name,
-                'status': result['status'],
-                'output': result.get('output'),
-                'error': result.get('error')
-            })
-            
-            if result['status'] == 'success':
-                success_count += 1
-            else:
-                fail_count += 1
+        finally:
+            for doc in documents:
+                shutil.rmtree(doc.work_dir, ignore_errors=True)
+        
+        success_count = sum(result['status'] == 'success' for result in results)
         
         return {
             'status': 'success',
             'converted': success_count,
-            'failed': fail_count,
+            'failed': len(results) - success_count,
             'total': len(pdf_files),
             'files': results
         }
@@ -318,6 +454,7 @@ def check_dependencies() -> Dict[str, Any]:
             "pdf2svg": true/false,
             "inkscape": true/false,
             "all_installed": true/false,
+            "inkscape_version": "Inkscape 1.3.2 (091e20e, 2023-11-25)" (null if not installed),
             "install_instructions": {
                 "macos": "brew install pdf2svg inkscape",
                 "ubuntu": "sudo apt-get install pdf2svg inkscape",
@@ -356,27 +493,17 @@ def check_dependencies() -> Dict[str, Any]:
           → Verify installation: inkscape --version
           → On macOS, ensure Homebrew is in PATH
     """
-    import subprocess
-    
-    def check_command(cmd):
-        try:
-            subprocess.run([cmd, '--version'], capture_output=True, timeout=5)
-            return True
-        except:
-            # pdf2svg doesn't have --version, try without it
-            try:
-                subprocess.run([cmd], capture_output=True, timeout=5)
-                return True
-            except:
-                return False
-    
-    pdf2svg_installed = check_command('pdf2svg')
-    inkscape_installed = check_command('inkscape')
+    # Probes are cached per binary (path, size, mtime), so Inkscape only starts after it changes
+    pdf2svg_probe = probe_tool('pdf2svg', ())
+    inkscape_probe = probe_tool('inkscape')
+    pdf2svg_installed = pdf2svg_probe['found']
+    inkscape_installed = inkscape_probe['found']
     
     result = {
         'pdf2svg': pdf2svg_installed,
         'inkscape': inkscape_installed,
-        'all_installed': pdf2svg_installed and inkscape_installed
+        'all_installed': pdf2svg_installed and inkscape_installed,
+        'inkscape_version': inkscape_probe['version']
     }
     
     if not result['all_installed']:
@@ -1,8 +1,4 @@
 #!/usr/bin/env python3
-# Disable PIL decompression bomb check for large PDF images
-from PIL import Image
-Image.MAX_IMAGE_PIXELS = None
-
 """pdf2ppt
 
 Convert PDF Slides to PowerPoint Presentations (PPT)
@@ -11,45 +7,117 @@ License: MIT
 GitHub: https://github.com/Teddy-van-Jerry/pdf2ppt
 """
 
+# Annotations are not evaluated, so pptx and pypdf types cost nothing at import
+from __future__ import annotations
+
 import argparse
+import importlib
+import io
+import json
 import os
 import sys
 import shutil
-import subprocess
+import tempfile
+import threading
+import time
+from itertools import count
 from pathlib import Path
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import TYPE_CHECKING, Callable
+
+# python-pptx, pypdf, PIL, lxml and rich are imported where they are first
+# used, so `pdf2ppt --version`, dependency checks and library imports stay fast
+from .cache import FileCache, emf_cache, probe_tool
+from .concurrency import AdaptiveLimiter, limited, run_child, set_child_limits
+from .preflight import preflight_svg, pil_image
+from .images import ImageOptimizer, DEFAULT_IMAGE_DPI, DEFAULT_IMAGE_QUALITY
+# get_shared_pool is not used here: it is exported for the web service and the MCP server
+from .inkscape import (InkscapePool, InkscapeTimeout, get_shared_pool, run_inkscape, run_inkscape_pipe,
+                       convert_data_via_files, WORKER_MAX_PAGES)
+from .metrics import (PAGE_SECONDS, PAGE_OUTPUT_BYTES, STAGE_FAILURES, PAGE_RETRIES, PAGE_TIMEOUTS, CONVERSIONS,
+                      INPUT_BYTES, OUTPUT_BYTES, timed_stage, track_subprocess)
 
-from pptx import Presentation
-from pptx.util import Pt
-from pypdf import PdfReader
-from rich.console import Console
-from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TaskProgressColumn
-from rich.panel import Panel
-from rich.table import Table
+if TYPE_CHECKING:
+    # Only named in annotations; importing them here would undo the lazy imports
+    from pptx.presentation import Presentation
+    from pypdf import PdfReader
+    from .native import NativeBackend
+    from .svgopt import SvgOptimizer
+    from .template import TemplateSplit
+
+# Exports of submodules that import pypdf or lxml, loaded on first access (see __getattr__)
+LAZY_EXPORTS = {
+    'SvgOptimizer': 'svgopt',
+    'fingerprint_page': 'fingerprint',
+    'fingerprint_pages': 'fingerprint',
+    'find_duplicate_pages': 'fingerprint',
+    'TemplateSplit': 'template',
+    'extract_template': 'template',
+}
 
 __version__ = '1.3.1'
 TMP_DIR_NAME = '_pdf2ppt.tmp'
+TEMPLATE_SHAPE_NAME = 'Slide template'
+BACKENDS = ('emf', 'native', 'auto')
+DEFAULT_RETRY_BACKOFF = 1.0
+# Where pdf2svg writes to make its SVG readable from a pipe
+PIPE_OUTPUT = '/dev/stdout'
 ERR_INPUT_NOT_FOUND = 1
 ERR_DEPENDENCY_MISSING = 2
 ERR_PDF2SVG = 101
 ERR_SVG2EMF = 102
 
-console = Console()
+
+class LazyConsole:
+    """The shared rich Console, created (and rich imported) on first use."""
+
+    def __init__(self):
+        self._console = None
+
+    def get(self):
+        """The Console itself, for rich objects that need more than its methods."""
+        if self._console is None:
+            from rich.console import Console
+            self._console = Console()
+        return self._console
+
+    def __getattr__(self, name):
+        return getattr(self.get(), name)
+
+
+console = LazyConsole()
+
+
+def __getattr__(name: str):
+    module = LAZY_EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    value = getattr(importlib.import_module(f'.{module}', __name__), name)
+    globals()[name] = value
+    return value
+
+
+def preload(*modules: str) -> threading.Thread:
+    """Import ``modules`` on a background thread, e.g. while waiting for pdf2svg."""
+    def load():
+        for module in modules:
+            importlib.import_module(module)
+
+    thread = threading.Thread(target=load, name='pdf2ppt-preload', daemon=True)
+    thread.start()
+    return thread
+
+
+def page_progress(verbose: bool = False):
+    """Progress bar for a per-page loop, removed when done unless ``verbose``."""
+    from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TaskProgressColumn
+    return Progress(SpinnerColumn(), TextColumn("[progress.description]{task.description}"),
+                    BarColumn(), TaskProgressColumn(), console=console.get(), transient=not verbose)
 
 
 def check_dependency(cmd: str, name: str) -> bool:
-    """Check if a command-line tool is available."""
-    try:
-        if 'pdf2svg' in cmd:
-            result = subprocess.run([cmd], capture_output=True, timeout=10)
-            return True
-        else:
-            result = subprocess.run([cmd, '--version'], capture_output=True, timeout=10)
-            return True
-    except FileNotFoundError:
-        return False
-    except subprocess.TimeoutExpired:
-        return True
+    """Check if a command-line tool is available (see :func:`probe_tool`)."""
+    return probe_tool(cmd, () if 'pdf2svg' in cmd else ('--version',))['found']
 
 
 def check_dependencies(pdf2svg_path: str, inkscape_path: str) -> bool:
@@ -60,6 +128,7 @@ def check_dependencies(pdf2svg_path: str, inkscape_path: str) -> bool:
     if not check_dependency(inkscape_path, 'inkscape'):
         missing.append(('Inkscape', 'brew install inkscape', 'sudo apt install inkscape'))
     if missing:
+        from rich.table import Table
         console.print("\n[bold red]❌ Missing dependencies:[/bold red]\n")
         table = Table(show_header=True, header_style="bold magenta")
         table.add_column("Tool")
@@ -91,90 +160,416 @@ def parse_page_range(page_str: str, total_pages: int) -> list:
     return sorted(pages)
 
 
-def pdf2svg(pdf_path: Path, pdf2svg_path: str, verbose: bool = False) -> bool:
-    """Convert PDF to SVG using pdf2svg."""
-    tmp_dir = pdf_path.parent / TMP_DIR_NAME
+def format_page_range(pages: list) -> str:
+    """Format page numbers as a compact range string like '1-5,7,9-11'."""
+    ranges = []
+    for page in sorted(set(pages)):
+        if ranges and page == ranges[-1][1] + 1:
+            ranges[-1][1] = page
+        else:
+            ranges.append([page, page])
+    return ','.join(str(a) if a == b else f'{a}-{b}' for a, b in ranges)
+
+
+def get_tmp_dir(pdf_path: Path, work_dir: Path = None) -> Path:
+    """Directory for intermediate files: ``work_dir``, or ``_pdf2ppt.tmp`` next to the PDF.
+
+    Concurrent conversions of PDFs in the same directory must each pass their
+    own ``work_dir``, otherwise they share (and clean up) one temp directory.
+    """
+    return Path(work_dir) if work_dir else pdf_path.parent / TMP_DIR_NAME
+
+
+def report_progress(progress_callback: Callable, stage: str, page: int, completed: int,
+                    total: int, elapsed: float, output=None, saved: int = None):
+    """Record a page's stage metrics and send it to ``progress_callback``, if there is one.
+
+    Events are dicts with the ``stage`` ('pdf2svg', 'svgopt', 'svg2emf' or
+    'emf2ppt'), the ``page``, the ``completed`` and ``total`` page counts of
+    the stage, the page's ``elapsed`` seconds and the ``bytes`` it produced
+    (``output`` is the file or data it produced); 'svgopt' events also have
+    the ``saved`` bytes. Callbacks may be called from worker threads.
+    """
+    try:
+        size = 0 if output is None else len(output) if isinstance(output, bytes) else output.stat().st_size
+    except OSError:
+        size = 0
+    PAGE_SECONDS.labels(stage).observe(elapsed)
+    PAGE_OUTPUT_BYTES.labels(stage).inc(size)
+    if progress_callback is None:
+        return
+    event = {'stage': stage, 'page': page, 'completed': completed, 'total': total,
+             'elapsed': round(elapsed, 4), 'bytes': size}
+    if saved is not None:
+        event['saved'] = saved
+    progress_callback(event)
+
+
+def timed_call(func: Callable, *args) -> tuple:
+    """Call ``func(*args)``. Returns (result, elapsed seconds)."""
+    started = time.monotonic()
+    result = func(*args)
+    return result, time.monotonic() - started
+
+
+def json_event_printer(stream=sys.stderr) -> Callable:
+    """Progress callback writing each event to ``stream`` as one JSON line."""
+    lock = threading.Lock()
+
+    def print_event(event: dict):
+        with lock:
+            stream.write(json.dumps(event) + '\n')
+            stream.flush()
+    return print_event
+
+
+def render_svg_page(pdf_path: Path, pdf2svg_path: str, page: int, work_dir: Path = None,
+                    svg_path: Path = None) -> bool:
+    """Render a single PDF page to SVG in the temporary directory, or to ``svg_path``."""
+    svg_path = svg_path or get_tmp_dir(pdf_path, work_dir) / f'{pdf_path.stem}_{page}.svg'
+    with track_subprocess('pdf2svg'):
+        result = run_child([pdf2svg_path, str(pdf_path), str(svg_path), str(page)])
+    return result.returncode == 0
+
+
+def render_svg_data(pdf_path: Path, pdf2svg_path: str, page: int, scratch_dir: Path) -> bytes:
+    """Render a single PDF page to SVG in memory. Returns None if pdf2svg fails.
+
+    pdf2svg writes the SVG to a pipe through ``/dev/stdout`` where the system
+    has it; otherwise, or if that fails, through a file in ``scratch_dir``
+    that is removed again.
+    """
+    if os.path.exists(PIPE_OUTPUT):
+        with track_subprocess('pdf2svg'):
+            result = run_child([pdf2svg_path, str(pdf_path), PIPE_OUTPUT, str(page)])
+        if result.returncode == 0 and result.stdout:
+            return result.stdout
+    fd, svg_name = tempfile.mkstemp(dir=scratch_dir, suffix='.svg')
+    os.close(fd)
+    try:
+        if not render_svg_page(pdf_path, pdf2svg_path, page, None, Path(svg_name)):
+            return None
+        return Path(svg_name).read_bytes()
+    finally:
+        Path(svg_name).unlink(missing_ok=True)
+
+
+@timed_stage('pdf2svg')
+def pdf2svg(pdf_path: Path, pdf2svg_path: str, verbose: bool = False,
+            pages: list = None, parallel: int = 1, work_dir: Path = None,
+            progress_callback: Callable = None) -> bool:
+    """Convert PDF to SVG using pdf2svg.
+
+    If ``pages`` is given, only those pages are rendered, one pdf2svg process
+    per page with up to ``parallel`` running at once, and each finished page
+    is reported to ``progress_callback`` (see :func:`report_progress`).
+    """
+    tmp_dir = get_tmp_dir(pdf_path, work_dir)
     tmp_dir.mkdir(parents=True, exist_ok=True)
     pdf_name = pdf_path.stem
-    cmd = [pdf2svg_path, str(pdf_path), str(tmp_dir / f'{pdf_name}_%d.svg'), 'all']
+    if pages is None:
+        cmd = [pdf2svg_path, str(pdf_path), str(tmp_dir / f'{pdf_name}_%d.svg'), 'all']
+        if verbose:
+            console.print(f"[dim]Running: {' '.join(cmd)}[/dim]")
+        with track_subprocess('pdf2svg'):
+            result = run_child(cmd)
+        return result.returncode == 0
+
+    def render_page(page: int) -> tuple:
+        success, elapsed = timed_call(render_svg_page, pdf_path, pdf2svg_path, page, work_dir)
+        return page, success, elapsed
+
+    def collect(results) -> bool:
+        for completed, (page, success, elapsed) in enumerate(results, 1):
+            if not success:
+                return False
+            report_progress(progress_callback, 'pdf2svg', page, completed, len(pages), elapsed,
+                            tmp_dir / f'{pdf_name}_{page}.svg')
+        return True
+
     if verbose:
-        console.print(f"[dim]Running: {' '.join(cmd)}[/dim]")
-    result = subprocess.run(cmd, capture_output=True)
-    return result.returncode == 0
+        console.print(f"[dim]Running: {pdf2svg_path} on {len(pages)} pages "
+                      f"with {min(parallel, len(pages))} workers[/dim]")
+    if parallel > 1 and len(pages) > 1:
+        with ThreadPoolExecutor(max_workers=parallel) as executor:
+            futures = [executor.submit(render_page, page) for page in pages]
+            return collect(future.result() for future in as_completed(futures))
+    return collect(render_page(page) for page in pages)
+
+
+def svg_page_number(svg_path: Path) -> int:
+    """Page number of an intermediate ``{pdf_name}_{page}.svg``."""
+    return int(Path(svg_path).stem.split('_')[-1])
 
 
 def convert_single_svg(args: tuple) -> tuple:
-    """Convert a single SVG to EMF. Returns (page_num, success, has_filter)."""
-    svg_path, emf_path, inkscape_path, no_check = args
-    page_num = int(svg_path.stem.split('_')[-1])
-    cmd = [inkscape_path, '--export-type=emf', str(svg_path)]
-    result = subprocess.run(cmd, capture_output=True)
-    if result.returncode != 0:
+    """Convert a single SVG to EMF. Returns (page_num, success, has_filter).
+
+    ``args`` is (svg_path, emf_path, inkscape_path, no_check, pool, cache),
+    optionally followed by a timeout in seconds for Inkscape (see
+    :class:`PagePolicy`). Unless ``no_check`` is set, the SVG is preflighted
+    (see :func:`preflight_svg`) before Inkscape runs, without loading it whole.
+    """
+    svg_path, emf_path, inkscape_path, no_check, pool, cache = args[:6]
+    timeout = args[6] if len(args) > 6 else None
+    page_num = svg_page_number(svg_path)
+    has_filter = False if no_check else preflight_svg(svg_path).has_filter
+    key = cache.key(svg_path) if cache is not None else None
+    if key is not None and cache.get(key, emf_path):
+        success = True
+    else:
+        if pool is not None:
+            success = pool.convert(svg_path, emf_path, timeout)
+        else:
+            success = run_inkscape(inkscape_path, svg_path, emf_path, timeout)
+        if success and key is not None:
+            cache.put(key, emf_path)
+    if not success:
         return (page_num, False, False)
-    has_filter = False
-    if not no_check:
-        with open(svg_path, 'r', encoding='utf-8', errors='ignore') as f:
-            if 'filter=' in f.read():
-                has_filter = True
     return (page_num, True, has_filter)
 
 
+def convert_svg_data(svg_data: bytes, inkscape_path: str, no_check: bool = False, pool: InkscapePool = None,
+                     cache: FileCache = None, scratch_dir: Path = None, timeout: float = None) -> tuple:
+    """Convert SVG data to EMF data. Returns (success, has_filter, emf_data).
+
+    The in-memory counterpart of :func:`convert_single_svg`, sharing its
+    cache entries. Without a ``pool`` Inkscape reads the SVG from stdin and
+    writes the EMF to stdout; the pool's shell workers, and Inkscape versions
+    without ``--pipe``, go through files in ``scratch_dir``.
+    """
+    has_filter = False if no_check else preflight_svg(svg_data).has_filter
+    key = cache.data_key(svg_data) if cache is not None else None
+    emf_data = cache.get_data(key) if key is not None else None
+    if emf_data is None:
+        if pool is not None:
+            emf_data = pool.convert_data(svg_data, scratch_dir, timeout)
+        else:
+            emf_data = run_inkscape_pipe(inkscape_path, svg_data, timeout) or convert_data_via_files(
+                lambda svg_path, emf_path: run_inkscape(inkscape_path, svg_path, emf_path, timeout),
+                svg_data, scratch_dir)
+        if emf_data is not None and key is not None:
+            cache.put_data(key, emf_data)
+    return (emf_data is not None, has_filter, emf_data)
+
+
+class PagePolicy:
+    """How slow and failing pages are handled when converting SVG to EMF.
+
+    Every Inkscape run is killed after ``timeout`` seconds (None: no limit
+    but the worker pool's own). A failed page is tried ``retries`` more
+    times, waiting ``backoff`` seconds before the first retry and twice as
+    long before each next one. Pages that still fail are recorded in
+    ``failed`` with the reason. They stop the conversion, cancelling the pages
+    not started yet, unless ``partial`` is set; then their slides become
+    placeholders (see :func:`add_placeholder_slide`).
+    """
+
+    def __init__(self, timeout: float = None, retries: int = 0, backoff: float = DEFAULT_RETRY_BACKOFF,
+                 partial: bool = False):
+        self.timeout = timeout
+        self.retries = max(0, retries)
+        self.backoff = backoff
+        self.partial = partial
+        self.failed = {}
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()
+
+    def reset(self):
+        """Forget failures and cancellation of a previous run."""
+        self.failed = {}
+        self._cancelled.clear()
+
+    def cancel(self):
+        """Make every page that has not started its next attempt fail at once."""
+        self._cancelled.set()
+
+    def convert(self, task: tuple) -> tuple:
+        """:func:`convert_single_svg` with this policy. Returns (page_num, success, has_filter)."""
+        page = svg_page_number(task[0])
+        result = self._run(page, lambda: convert_single_svg(task[:6] + (self.timeout,)), lambda r: r[1])
+        return result or (page, False, False)
+
+    def convert_data(self, page: int, svg_data: bytes, inkscape_path: str, no_check: bool = False,
+                     pool: InkscapePool = None, cache: FileCache = None, scratch_dir: Path = None) -> tuple:
+        """:func:`convert_svg_data` with this policy. Returns (success, has_filter, emf_data)."""
+        result = self._run(page, lambda: convert_svg_data(svg_data, inkscape_path, no_check, pool, cache,
+                                                          scratch_dir, self.timeout), lambda r: r[0])
+        return result or (False, False, None)
+
+    def _run(self, page: int, attempt: Callable, succeeded: Callable):
+        """Result of the first successful ``attempt()``, or None after recording why the page failed."""
+        reason = None
+        for number in range(self.retries + 1):
+            if number:
+                PAGE_RETRIES.labels('svg2emf').inc()
+                self._cancelled.wait(self.backoff * 2 ** (number - 1))
+            if self._cancelled.is_set():
+                return None
+            try:
+                result = attempt()
+            except InkscapeTimeout as e:
+                PAGE_TIMEOUTS.labels('svg2emf').inc()
+                reason = str(e)
+                continue
+            if succeeded(result):
+                return result
+            reason = 'Inkscape failed'
+        with self._lock:
+            self.failed[page] = reason
+        return None
+
+
+@timed_stage('images')
+def optimize_images(pdf_reader: PdfReader, pdf_path: Path, pages: list, optimizer: ImageOptimizer,
+                    parallel: int = 1, work_dir: Path = None) -> int:
+    """Downsample oversized images in the pages' SVGs to the optimizer's DPI of the slide size.
+
+    Returns the number of SVGs that changed.
+    """
+    tmp_dir = get_tmp_dir(pdf_path, work_dir)
+    width, height = slide_size(pdf_reader)
+
+    def optimize_page(page: int) -> bool:
+        return optimizer.optimize_svg(tmp_dir / f'{pdf_path.stem}_{page}.svg', width, height)
+
+    if parallel > 1 and len(pages) > 1:
+        with ThreadPoolExecutor(max_workers=parallel) as executor:
+            return sum(executor.map(optimize_page, pages))
+    return sum(optimize_page(page) for page in pages)
+
+
+@timed_stage('svgopt')
+def optimize_svgs(pdf_path: Path, pages: list, optimizer: SvgOptimizer, parallel: int = 1,
+                  work_dir: Path = None, progress_callback: Callable = None) -> int:
+    """Rewrite the pages' SVGs with :class:`pdf2ppt.svgopt.SvgOptimizer`, reporting
+    each page to ``progress_callback``. Returns the bytes saved.
+    """
+    tmp_dir = get_tmp_dir(pdf_path, work_dir)
+    done = count(1)
+
+    def optimize_page(page: int) -> int:
+        svg_path = tmp_dir / f'{pdf_path.stem}_{page}.svg'
+        saved, elapsed = timed_call(optimizer.optimize_svg, svg_path)
+        report_progress(progress_callback, 'svgopt', page, next(done), len(pages), elapsed, svg_path, saved)
+        return saved
+
+    if parallel > 1 and len(pages) > 1:
+        with ThreadPoolExecutor(max_workers=parallel) as executor:
+            return sum(executor.map(optimize_page, pages))
+    return sum(optimize_page(page) for page in pages)
+
+
+def slide_width_emu(pdf_reader: PdfReader) -> int:
+    """Width of the slides in EMU, as set by :func:`new_presentation`."""
+    from pptx.util import Pt
+    return Pt(slide_size(pdf_reader)[0])
+
+
+@timed_stage('native')
+def svg2native(pdf_reader: PdfReader, pdf_path: Path, pages: list, backend: NativeBackend,
+               parallel: int = 1, work_dir: Path = None) -> list:
+    """Translate the SVGs of the pages ``backend`` selects into native shapes.
+
+    Returns the pages that still need Inkscape: those not selected and those
+    that fell back to EMF (see :class:`pdf2ppt.native.NativeBackend`).
+    """
+    tmp_dir = get_tmp_dir(pdf_path, work_dir)
+    width = slide_width_emu(pdf_reader)
+
+    def translate_page(page: int) -> bool:
+        return backend.translate(tmp_dir / f'{pdf_path.stem}_{page}.svg', page, width)
+
+    selected = [page for page in pages if page in backend.pages]
+    if parallel > 1 and len(selected) > 1:
+        with ThreadPoolExecutor(max_workers=parallel) as executor:
+            list(executor.map(translate_page, selected))
+    else:
+        for page in selected:
+            translate_page(page)
+    return [page for page in pages if page not in backend.slides]
+
+
+def keep_filter_svg(pdf_path: Path, page_num: int, first: bool, work_dir: Path = None):
+    """Copy the SVG of a page with filters to ``{pdf_name}_svg`` next to the PDF."""
+    pdf_name = pdf_path.stem
+    svg_dir = pdf_path.parent / f'{pdf_name}_svg'
+    if first:
+        shutil.rmtree(svg_dir, ignore_errors=True)
+        svg_dir.mkdir(parents=True, exist_ok=True)
+    svg_path = get_tmp_dir(pdf_path, work_dir) / f'{pdf_name}_{page_num}.svg'
+    shutil.copy(svg_path, svg_dir / f'{pdf_name}_{page_num}.svg')
+
+
+@timed_stage('svg2emf')
 def svg2emf(pdf_reader: PdfReader, pdf_path: Path, inkscape_path: str, 
             pages: list, verbose: bool = False, no_check: bool = False, 
-            parallel: int = 1) -> tuple:
-    """Convert SVG to EMF using inkscape."""
-    tmp_dir = pdf_path.parent / TMP_DIR_NAME
+            parallel: int = 1, pool: InkscapePool = None, cache: FileCache = None,
+            work_dir: Path = None, progress_callback: Callable = None, policy: PagePolicy = None,
+            limiter: AdaptiveLimiter = None) -> tuple:
+    """Convert SVG to EMF using inkscape.
+
+    With a ``pool`` the pages are exported by its long-lived Inkscape workers,
+    otherwise every page starts its own Inkscape process. Pages found in
+    ``cache`` are copied from it without running Inkscape. Timeouts, retries
+    and partial output follow ``policy`` (see :class:`PagePolicy`); without
+    ``partial``, the first failed page cancels the pages still queued. With
+    a ``limiter`` at most its current limit of the ``parallel`` pages convert
+    at once. Each finished page is reported to ``progress_callback`` (see
+    :func:`report_progress`).
+    """
+    policy = policy or PagePolicy()
+    policy.reset()
+    tmp_dir = get_tmp_dir(pdf_path, work_dir)
     pdf_name = pdf_path.stem
     pages_with_filters = []
-    pages_with_filters_svg_dir = pdf_path.parent / f'{pdf_name}_svg'
     tasks = []
     for page in pages:
         svg_path = tmp_dir / f'{pdf_name}_{page}.svg'
         emf_path = tmp_dir / f'{pdf_name}_{page}.emf'
-        tasks.append((svg_path, emf_path, inkscape_path, no_check))
-    with Progress(SpinnerColumn(), TextColumn("[progress.description]{task.description}"),
-                  BarColumn(), TaskProgressColumn(), console=console, transient=not verbose) as progress:
+        tasks.append((svg_path, emf_path, inkscape_path, no_check, pool, cache))
+
+    def convert(task: tuple) -> tuple:
+        with limited(limiter):
+            return timed_call(policy.convert, task)
+
+    with page_progress(verbose) as progress:
         task = progress.add_task("[cyan]Converting SVG to EMF...", total=len(tasks))
-        if parallel > 1:
-            with ThreadPoolExecutor(max_workers=parallel) as executor:
-                futures = {executor.submit(convert_single_svg, t): t for t in tasks}
-                for future in as_completed(futures):
-                    page_num, success, has_filter = future.result()
-                    if not success:
+        executor = ThreadPoolExecutor(max_workers=max(1, parallel))
+        try:
+            futures = [executor.submit(convert, t) for t in tasks]
+            for completed, future in enumerate(as_completed(futures), 1):
+                (page_num, success, has_filter), elapsed = future.result()
+                if not success:
+                    if not policy.partial:
+                        policy.cancel()
                         return (False, [])
+                else:
                     if has_filter:
                         pages_with_filters.append(page_num)
-                        if len(pages_with_filters) == 1:
-                            shutil.rmtree(pages_with_filters_svg_dir, ignore_errors=True)
-                            pages_with_filters_svg_dir.mkdir(parents=True, exist_ok=True)
-                        svg_path = tmp_dir / f'{pdf_name}_{page_num}.svg'
-                        shutil.copy(svg_path, pages_with_filters_svg_dir / f'{pdf_name}_{page_num}.svg')
-                    progress.advance(task)
-        else:
-            for t in tasks:
-                page_num, success, has_filter = convert_single_svg(t)
-                if not success:
-                    return (False, [])
-                if has_filter:
-                    pages_with_filters.append(page_num)
-                    if len(pages_with_filters) == 1:
-                        shutil.rmtree(pages_with_filters_svg_dir, ignore_errors=True)
-                        pages_with_filters_svg_dir.mkdir(parents=True, exist_ok=True)
-                    svg_path = tmp_dir / f'{pdf_name}_{page_num}.svg'
-                    shutil.copy(svg_path, pages_with_filters_svg_dir / f'{pdf_name}_{page_num}.svg')
+                        keep_filter_svg(pdf_path, page_num, len(pages_with_filters) == 1, work_dir)
+                    report_progress(progress_callback, 'svg2emf', page_num, completed, len(tasks), elapsed,
+                                    tmp_dir / f'{pdf_name}_{page_num}.emf')
                 progress.advance(task)
+        finally:
+            # Queued pages are dropped; running ones end within the policy's timeout
+            executor.shutdown(cancel_futures=True)
     return (True, sorted(pages_with_filters))
 
 
-def emf2ppt(pdf_reader: PdfReader, pdf_path: Path, ppt_path: Path, 
-            pages: list, verbose: bool = False):
-    """Convert EMF files to PowerPoint presentation."""
-    tmp_dir = pdf_path.parent / TMP_DIR_NAME
-    pdf_name = pdf_path.stem
-    prs = Presentation()
-    blank_slide_layout = prs.slide_layouts[6]
+def slide_size(pdf_reader: PdfReader) -> tuple:
+    """Slide (width, height) in points, taken from the first page's mediabox."""
     pdf_box = pdf_reader.pages[0].mediabox
-    slide_width, slide_height = float(pdf_box[2]), float(pdf_box[3])
+    return float(pdf_box[2]), float(pdf_box[3])
+
+
+def new_presentation(pdf_reader: PdfReader) -> Presentation:
+    """Create an empty presentation with the PDF's slide size and metadata."""
+    from pptx import Presentation
+    from pptx.util import Pt
+    pil_image()  # python-pptx reads image sizes with PIL
+    prs = Presentation()
+    slide_width, slide_height = slide_size(pdf_reader)
     prs.slide_width = Pt(slide_width)
     prs.slide_height = Pt(slide_height)
     if pdf_reader.metadata:
@@ -188,26 +583,445 @@ def emf2ppt(pdf_reader: PdfReader, pdf_path: Path, ppt_path: Path,
             prs.core_properties.created = pdf_reader.metadata.creation_date
     prs.core_properties.comments = 'Generated using pdf2ppt (https://github.com/neosun100/pdf2ppt)'
     prs.core_properties.last_modified_by = 'pdf2ppt'
-    with Progress(SpinnerColumn(), TextColumn("[progress.description]{task.description}"),
-                  BarColumn(), TaskProgressColumn(), console=console, transient=not verbose) as progress:
+    return prs
+
+
+def presentation_writer(prs: Presentation, ppt_path: Path, low_memory: bool = False):
+    """A writer that finishes ``ppt_path`` on ``close()``. With ``low_memory``
+    slides and their images go into the file on every ``flush()`` instead of
+    staying in memory (see :mod:`pdf2ppt.writer`)."""
+    from .writer import PptxWriter, StreamingPptxWriter
+    return (StreamingPptxWriter if low_memory else PptxWriter)(prs, ppt_path)
+
+
+def add_emf_slide(prs: Presentation, emf_path: Path, show_template: bool = True):
+    """Append a blank slide showing ``emf_path`` (a path or file object) across the full slide width.
+
+    With ``show_template=False`` the slide hides the layout's template picture.
+    """
+    from pptx.util import Pt
+    image = emf_path if hasattr(emf_path, 'read') else str(emf_path)
+    slide = prs.slides.add_slide(prs.slide_layouts[6])
+    slide.shapes.add_picture(image, Pt(0), Pt(0), width=prs.slide_width)
+    if not show_template:
+        slide._element.set('showMasterSp', '0')
+    return slide
+
+
+def add_placeholder_slide(prs: Presentation, page: int, reason: str = None, show_template: bool = True):
+    """Append a slide saying that ``page`` could not be converted, and why."""
+    from pptx.enum.text import MSO_ANCHOR, PP_ALIGN
+    from pptx.util import Pt
+    slide = prs.slides.add_slide(prs.slide_layouts[6])
+    frame = slide.shapes.add_textbox(0, 0, prs.slide_width, prs.slide_height).text_frame
+    frame.word_wrap = True
+    frame.vertical_anchor = MSO_ANCHOR.MIDDLE
+    lines = [(f'Page {page} could not be converted', Pt(28))]
+    if reason:
+        lines.append((reason, Pt(14)))
+    for i, (text, size) in enumerate(lines):
+        paragraph = frame.paragraphs[0] if i == 0 else frame.add_paragraph()
+        paragraph.text = text
+        paragraph.alignment = PP_ALIGN.CENTER
+        paragraph.font.size = size
+    if not show_template:
+        slide._element.set('showMasterSp', '0')
+    return slide
+
+
+def add_template_layout(prs: Presentation, emf_path: Path):
+    """Place ``emf_path`` (a path or file object) behind the content of the blank layout used by every slide."""
+    layout = prs.slide_layouts[6]
+    _, rId = layout.part.get_or_add_image_part(emf_path if hasattr(emf_path, 'read') else str(emf_path))
+    shapes = layout.shapes
+    pic = shapes._spTree.add_pic(shapes._next_shape_id, TEMPLATE_SHAPE_NAME, '', rId,
+                                 0, 0, prs.slide_width, prs.slide_height)
+    # The first two children of spTree are its own properties
+    shapes._spTree.insert(2, pic)
+
+
+def native_slide(native: NativeBackend, page: int):
+    """The native translation of ``page``, or None if it is converted to EMF."""
+    return native.slides.get(page) if native is not None else None
+
+
+def add_page_slide(prs: Presentation, emf_path: Path, native: NativeBackend, page: int,
+                   show_template: bool = True):
+    """Append the slide of ``page``: its native shapes if ``native`` translated it, else ``emf_path``."""
+    slide = native_slide(native, page)
+    if slide is None:
+        return add_emf_slide(prs, emf_path, show_template)
+    from .native import add_native_slide
+    return add_native_slide(prs, slide, show_template)
+
+
+def record_conversion(pdf_path: Path, ppt_path: Path):
+    """Count a finished presentation and its input and output bytes."""
+    CONVERSIONS.inc()
+    INPUT_BYTES.inc(pdf_path.stat().st_size)
+    OUTPUT_BYTES.inc(ppt_path.stat().st_size)
+
+
+@timed_stage('emf2ppt')
+def emf2ppt(pdf_reader: PdfReader, pdf_path: Path, ppt_path: Path, 
+            pages: list, verbose: bool = False, duplicates: dict = None, work_dir: Path = None,
+            progress_callback: Callable = None, template: TemplateSplit = None,
+            native: NativeBackend = None, failed: dict = None, low_memory: bool = False):
+    """Convert EMF files to PowerPoint presentation.
+
+    ``duplicates`` maps pages to an identical page whose EMF is used instead;
+    python-pptx stores each distinct image only once. With a ``template`` its
+    EMF goes on the slide layout, and slides of pages that do not share it
+    hide it. Pages translated by the ``native`` backend get its shapes
+    instead of an EMF, and pages in ``failed`` (page → reason, see
+    :class:`PagePolicy`) a placeholder. Each added slide is reported to
+    ``progress_callback`` (see :func:`report_progress`). With ``low_memory``
+    slides are written to ``ppt_path`` as they are added and EMFs are copied
+    into it from disk (see :func:`presentation_writer`).
+    """
+    failed = failed or {}
+    duplicates = duplicates or {}
+    tmp_dir = get_tmp_dir(pdf_path, work_dir)
+    pdf_name = pdf_path.stem
+    prs = new_presentation(pdf_reader)
+    with presentation_writer(prs, ppt_path, low_memory) as writer, page_progress(verbose) as progress:
+        if template is not None:
+            add_template_layout(prs, tmp_dir / f'{pdf_name}_{template.template_page}.emf')
         task = progress.add_task("[cyan]Creating PowerPoint...", total=len(pages))
-        for page in pages:
-            slide = prs.slides.add_slide(blank_slide_layout)
+        for completed, page in enumerate(pages, 1):
+            source = duplicates.get(page, page)
+            emf_path = tmp_dir / f'{pdf_name}_{source}.emf'
+            show_template = template is None or source in template.pages
+            if source in failed:
+                _, elapsed = timed_call(add_placeholder_slide, prs, page, failed[source], show_template)
+                emf_path = None
+            else:
+                _, elapsed = timed_call(add_page_slide, prs, emf_path, native, source, show_template)
+            writer.flush()
+            report_progress(progress_callback, 'emf2ppt', page, completed, len(pages), elapsed,
+                            None if native_slide(native, source) else emf_path)
+            progress.advance(task)
+        writer.close()
+    record_conversion(pdf_path, ppt_path)
+
+
+@timed_stage('stream')
+def convert_streaming(pdf_reader: PdfReader, pdf_path: Path, ppt_path: Path, pages: list,
+                      pdf2svg_path: str, inkscape_path: str, verbose: bool = False,
+                      no_check: bool = False, parallel: int = 1, pool: InkscapePool = None,
+                      keep_tmp: bool = False, cache: FileCache = None, duplicates: dict = None,
+                      work_dir: Path = None, progress_callback: Callable = None,
+                      image_optimizer: ImageOptimizer = None, template: TemplateSplit = None,
+                      native: NativeBackend = None, in_memory: bool = False, policy: PagePolicy = None,
+                      limiter: AdaptiveLimiter = None, low_memory: bool = False,
+                      svg_optimizer: SvgOptimizer = None) -> tuple:
+    """Convert PDF to PowerPoint with all three stages overlapping.
+
+    Each page goes PDF → SVG → EMF on a worker thread as soon as a worker is
+    free, while the main thread adds finished pages to the presentation in
+    page order. Intermediate files are removed as soon as their last slide has
+    been added unless ``keep_tmp`` is set. Pages in ``duplicates`` reuse the
+    EMF of the page they map to. With an ``image_optimizer`` each SVG's images
+    are downsampled before Inkscape sees them, and with an ``svg_optimizer``
+    each SVG is optimized (see :mod:`pdf2ppt.svgopt`). With a ``template`` pages are
+    rendered from its derived PDF and the template page is converted first
+    and put on the slide layout. Pages the ``native`` backend translates skip
+    Inkscape. Every stage of every page is reported to
+    ``progress_callback`` (see :func:`report_progress`).
+
+    With ``in_memory`` SVG and EMF data go through pipes and buffers instead
+    (see :func:`render_svg_data` and :func:`convert_svg_data`); the work
+    directory only serves as scratch space where a pipe is not possible, and
+    SVGs of pages with filters are not kept.
+
+    Inkscape runs follow ``policy`` (see :class:`PagePolicy`); with
+    ``partial``, pages that fail to convert to EMF get placeholder slides.
+    With a ``limiter`` at most its current limit of pages are in Inkscape at
+    once. With ``low_memory`` each slide is written to ``ppt_path`` before its
+    EMF is released (see :func:`presentation_writer`). Returns (success,
+    pages_with_filters).
+    """
+    policy = policy or PagePolicy()
+    policy.reset()
+    tmp_dir = get_tmp_dir(pdf_path, work_dir)
+    tmp_dir.mkdir(parents=True, exist_ok=True)
+    pdf_name = pdf_path.stem
+    pages_with_filters = []
+    duplicates = duplicates or {}
+    sources = [duplicates.get(page, page) for page in pages]
+    last_use = {source: i for i, source in enumerate(sources)}
+    unique_total = len(last_use)
+    render_path, render_dir = (template.path, tmp_dir) if template is not None else (pdf_path, work_dir)
+    if template is not None:
+        sources.insert(0, template.template_page)
+        unique_total += 1
+    svg_done, opt_done, emf_done = count(1), count(1), count(1)
+    width, height = slide_size(pdf_reader)
+    width_emu = slide_width_emu(pdf_reader)
+    emf_data = {}
+
+    def convert_page(page: int) -> tuple:
+        svg_path = tmp_dir / f'{pdf_name}_{page}.svg'
+        emf_path = tmp_dir / f'{pdf_name}_{page}.emf'
+        if in_memory:
+            svg, elapsed = timed_call(render_svg_data, render_path, pdf2svg_path, page, tmp_dir)
+            success = svg is not None
+        else:
+            success, elapsed = timed_call(render_svg_page, render_path, pdf2svg_path, page, render_dir)
+            svg = svg_path
+        if not success:
+            STAGE_FAILURES.labels('pdf2svg').inc()
+            return (page, False, False)
+        report_progress(progress_callback, 'pdf2svg', page, next(svg_done), unique_total, elapsed, svg)
+        if image_optimizer is not None:
+            if in_memory:
+                svg = image_optimizer.optimize_svg_data(svg, width, height)
+            else:
+                image_optimizer.optimize_svg(svg_path, width, height)
+        if svg_optimizer is not None:
+            if in_memory:
+                optimized, elapsed = timed_call(svg_optimizer.optimize_svg_data, svg)
+                saved, svg = len(svg) - len(optimized), optimized
+            else:
+                saved, elapsed = timed_call(svg_optimizer.optimize_svg, svg_path)
+            report_progress(progress_callback, 'svgopt', page, next(opt_done), unique_total, elapsed, svg, saved)
+        if native is not None and native.translate(svg, page, width_emu):
+            return (page, True, False)
+        with limited(limiter):
+            if in_memory:
+                (success, has_filter, data), elapsed = timed_call(policy.convert_data, page, svg, inkscape_path,
+                                                                  no_check, pool, cache, tmp_dir)
+                emf_data[page] = data
+                result, output = (page, success, has_filter), data
+            else:
+                result, elapsed = timed_call(policy.convert,
+                                             (svg_path, emf_path, inkscape_path, no_check, pool, cache))
+                output = emf_path
+        if not result[1]:
+            STAGE_FAILURES.labels('svg2emf').inc()
+        else:
+            report_progress(progress_callback, 'svg2emf', page, next(emf_done), unique_total, elapsed, output)
+        return result
+
+    def emf_source(page: int):
+        """The page's EMF as a path, or a buffer with ``in_memory``."""
+        if in_memory:
+            return io.BytesIO(emf_data[page]) if page in emf_data else None
+        return tmp_dir / f'{pdf_name}_{page}.emf'
+
+    def release(page: int, translated: bool):
+        """Drop the page's intermediate data once its last slide has been added."""
+        if translated:
+            del native.slides[page]  # Its shapes are on the slide now
+        if in_memory:
+            emf_data.pop(page, None)
+        elif not keep_tmp:
             emf_path = tmp_dir / f'{pdf_name}_{page}.emf'
-            slide.shapes.add_picture(str(emf_path), Pt(0), Pt(0), width=prs.slide_width)
+            emf_path.unlink(missing_ok=translated or page in policy.failed)
+            emf_path.with_suffix('.svg').unlink()
+
+    prs = new_presentation(pdf_reader)
+    with presentation_writer(prs, ppt_path, low_memory) as writer, page_progress(verbose) as progress, \
+            ThreadPoolExecutor(max_workers=max(1, parallel)) as executor:
+        task = progress.add_task("[cyan]Converting pages...", total=len(pages))
+        futures = {source: executor.submit(convert_page, source) for source in dict.fromkeys(sources)}
+        if template is not None:
+            page_num, success, has_filter = futures[sources.pop(0)].result()
+            if not success:
+                policy.cancel()
+                for pending in futures.values():
+                    pending.cancel()
+                return (False, [])
+            if has_filter:
+                pages_with_filters.append(page_num)
+                if not in_memory:
+                    keep_filter_svg(pdf_path, page_num, True, work_dir)
+            add_template_layout(prs, emf_source(page_num))
+            writer.flush()
+            release(page_num, False)
+        for i, (page, source) in enumerate(zip(pages, sources)):
+            page_num, success, has_filter = futures[source].result()
+            show_template = template is None or source in template.pages
+            if not success and policy.partial and source in policy.failed:
+                _, elapsed = timed_call(add_placeholder_slide, prs, page, policy.failed[source], show_template)
+                writer.flush()
+                report_progress(progress_callback, 'emf2ppt', page, i + 1, len(pages), elapsed)
+                if last_use[source] == i:
+                    release(source, False)
+                progress.advance(task)
+                continue
+            if not success:
+                policy.cancel()
+                for pending in futures.values():
+                    pending.cancel()
+                return (False, [])
+            if has_filter and page == source:
+                pages_with_filters.append(page_num)
+                if not in_memory:
+                    keep_filter_svg(pdf_path, page_num, len(pages_with_filters) == 1, work_dir)
+            emf = emf_source(source)
+            translated = native_slide(native, source) is not None
+            _, elapsed = timed_call(add_page_slide, prs, emf, native, source, show_template)
+            writer.flush()
+            output = None if translated else emf_data.get(source) if in_memory else emf
+            report_progress(progress_callback, 'emf2ppt', page, i + 1, len(pages), elapsed, output)
+            if last_use[source] == i:
+                release(source, translated)
             progress.advance(task)
-    prs.save(ppt_path)
+        writer.close()
+    record_conversion(pdf_path, ppt_path)
+    return (True, pages_with_filters)
+
 
+class BatchDocument:
+    """One PDF of a :func:`convert_batch` run and, once it is done, its outcome.
 
-def clean_tmp(pdf_path: Path, verbose: bool = False):
+    ``pages`` defaults to every page. ``error`` is None if the presentation
+    was written.
+    """
+
+    def __init__(self, pdf_path: Path, ppt_path: Path, pages: list = None, work_dir: Path = None):
+        self.pdf_path = Path(pdf_path)
+        self.ppt_path = Path(ppt_path)
+        self.pages = pages
+        self.work_dir = work_dir
+        self.total_pages = 0
+        self.duplicates = {}
+        self.pages_with_filters = []
+        self.error = None
+        self.pdf_reader = None
+
+    @property
+    def unique_pages(self) -> list:
+        return [page for page in self.pages if self.duplicates.get(page, page) == page]
+
+
+def convert_batch(documents: list, pdf2svg_path: str, inkscape_path: str, parallel: int = 1,
+                  no_check: bool = False, pool: InkscapePool = None, cache: FileCache = None,
+                  progress_callback: Callable = None, on_document: Callable = None,
+                  limiter: AdaptiveLimiter = None) -> list:
+    """Convert several PDFs with one queue of pages shared by all of them.
+
+    Every unique page of every :class:`BatchDocument` goes PDF → SVG → EMF on
+    one pool of ``parallel`` workers, so small documents never leave workers
+    idle and one document's last pages overlap the next one's first. The
+    worker that finishes a document's last page assembles its presentation
+    and passes the document to ``on_document`` right away. After a failed
+    page the rest of its document is skipped. With a ``limiter`` at most its
+    current limit of pages are in Inkscape at once. Progress events carry the
+    PDF name as ``document`` (see :func:`report_progress`).
+    Returns ``documents``.
+    """
+    from pypdf import PdfReader
+    from .fingerprint import find_duplicate_pages
+    lock = threading.Lock()
+    assemble_lock = threading.Lock()  # Rich allows one live progress display at a time
+    remaining = {}
+
+    def document_progress(doc: BatchDocument) -> Callable:
+        if progress_callback is None:
+            return None
+        return lambda event: progress_callback(dict(event, document=doc.pdf_path.name))
+
+    def finish(doc: BatchDocument):
+        if doc.error is None:
+            doc.pages_with_filters = [page for page in doc.pages
+                                      if doc.duplicates.get(page, page) in doc.pages_with_filters]
+            try:
+                with assemble_lock:
+                    emf2ppt(doc.pdf_reader, doc.pdf_path, doc.ppt_path, doc.pages, False, doc.duplicates,
+                            doc.work_dir, document_progress(doc))
+            except Exception as e:
+                doc.error = f'Failed to create PowerPoint: {e}'
+        if on_document is not None:
+            on_document(doc)
+
+    def convert_page(doc: BatchDocument, page: int, svg_done, emf_done, total: int):
+        tmp_dir = get_tmp_dir(doc.pdf_path, doc.work_dir)
+        svg_path = tmp_dir / f'{doc.pdf_path.stem}_{page}.svg'
+        emf_path = svg_path.with_suffix('.emf')
+        try:
+            if doc.error is not None:
+                return
+            success, elapsed = timed_call(render_svg_page, doc.pdf_path, pdf2svg_path, page, doc.work_dir)
+            if not success:
+                STAGE_FAILURES.labels('pdf2svg').inc()
+                doc.error = f'Failed to convert page {page} to SVG'
+                return
+            report_progress(document_progress(doc), 'pdf2svg', page, next(svg_done), total, elapsed, svg_path)
+            with limited(limiter):
+                (_, success, has_filter), elapsed = timed_call(
+                    convert_single_svg, (svg_path, emf_path, inkscape_path, no_check, pool, cache))
+            if not success:
+                STAGE_FAILURES.labels('svg2emf').inc()
+                doc.error = f'Failed to convert page {page} to EMF'
+                return
+            report_progress(document_progress(doc), 'svg2emf', page, next(emf_done), total, elapsed, emf_path)
+            if has_filter:
+                with lock:
+                    doc.pages_with_filters.append(page)
+        except Exception as e:
+            doc.error = f'Unexpected error on page {page}: {e}'
+        finally:
+            with lock:
+                remaining[doc] -= 1
+                last = remaining[doc] == 0
+            if last:
+                finish(doc)
+
+    with ThreadPoolExecutor(max_workers=max(1, parallel)) as executor:
+        for doc in documents:
+            try:
+                doc.pdf_reader = PdfReader(doc.pdf_path)
+                doc.total_pages = len(doc.pdf_reader.pages)
+                if doc.pages is None:
+                    doc.pages = list(range(1, doc.total_pages + 1))
+                doc.duplicates = find_duplicate_pages(doc.pdf_reader, doc.pages)
+                get_tmp_dir(doc.pdf_path, doc.work_dir).mkdir(parents=True, exist_ok=True)
+            except Exception as e:
+                doc.error = f'Failed to read PDF: {e}'
+                finish(doc)
+                continue
+            unique_pages = doc.unique_pages
+            if not unique_pages:
+                doc.error = 'No pages to convert'
+                finish(doc)
+                continue
+            remaining[doc] = len(unique_pages)
+            svg_done, emf_done = count(1), count(1)
+            for page in unique_pages:
+                executor.submit(convert_page, doc, page, svg_done, emf_done, len(unique_pages))
+    return documents
+
+
+def clean_tmp(pdf_path: Path, verbose: bool = False, work_dir: Path = None):
     """Clean up temporary files."""
-    tmp_dir = pdf_path.parent / TMP_DIR_NAME
+    tmp_dir = get_tmp_dir(pdf_path, work_dir)
     if tmp_dir.exists():
         shutil.rmtree(tmp_dir)
         if verbose:
             console.print("[dim]Cleaned up temporary files.[/dim]")
 
 
+def parallel_workers(value: str):
+    """``--parallel`` value: a positive worker count, or ``auto``."""
+    if value == 'auto':
+        return value
+    try:
+        workers = int(value)
+    except ValueError:
+        workers = 0
+    if workers < 1:
+        raise argparse.ArgumentTypeError(f"expected a positive number or 'auto', got {value!r}")
+    return workers
+
+
+def print_page_failures(policy: PagePolicy):
+    """Print why each page of ``policy.failed`` could not be converted."""
+    for page, reason in sorted(policy.failed.items()):
+        console.print(f"[dim]   Page {page}: {reason}[/dim]")
+
+
 def main():
     parser = argparse.ArgumentParser(prog='pdf2ppt',
         description='Convert PDF Slides to PowerPoint Presentations with Vector Graphics')
@@ -219,10 +1033,93 @@ def main():
     parser.add_argument('--no-check', action='store_true', help='Skip SVG filter check')
     parser.add_argument('--force', '-f', action='store_true', help='Overwrite output file if exists')
     parser.add_argument('--pages', '-p', type=str, help='Page range (e.g., "1-5,7,9-11")')
-    parser.add_argument('--parallel', '-j', type=int, default=1, help='Parallel workers (default: 1)')
+    parser.add_argument('--parallel', '-j', type=parallel_workers, default=1,
+                        help='Parallel workers, or "auto" to adapt them to CPU, memory and page latency '
+                             '(default: 1)')
+    parser.add_argument('--max-parallel', type=int, default=None, metavar='N',
+                        help='Upper bound for --parallel auto (default: the available CPUs)')
+    parser.add_argument('--child-memory', type=int, default=None, metavar='MB',
+                        help='Address space limit of each pdf2svg and Inkscape process')
+    parser.add_argument('--child-nice', type=int, default=None, metavar='N',
+                        help='Run pdf2svg and Inkscape with their niceness raised by N')
     parser.add_argument('--pdf2svg-path', type=str, default='pdf2svg', help='Path to pdf2svg')
     parser.add_argument('--inkscape-path', type=str, default='inkscape', help='Path to inkscape')
+    parser.add_argument('--work-dir', type=Path, default=None,
+                        help=f'Create temporary files in a new directory under DIR (default: {TMP_DIR_NAME} next to the input)')
+    parser.add_argument('--stream', action='store_true',
+                        help='Overlap PDF→SVG, SVG→EMF and slide assembly page by page')
+    parser.add_argument('--in-memory', action='store_true',
+                        help='Pass SVG and EMF data through pipes and memory instead of temporary files '
+                             '(implies --stream; --work-dir sets the scratch space used where pipes are not possible)')
+    parser.add_argument('--low-memory', action='store_true',
+                        help='Write slides into the PPTX as they are added and copy EMFs into it from disk, '
+                             'so memory does not grow with the number of slides')
+    parser.add_argument('--page-timeout', type=float, default=None, metavar='SECONDS',
+                        help='Kill Inkscape if one page takes longer than SECONDS (default: no limit)')
+    parser.add_argument('--retries', type=int, default=0, metavar='N',
+                        help='Try a page that fails to convert to EMF up to N more times (default: 0)')
+    parser.add_argument('--retry-backoff', type=float, default=DEFAULT_RETRY_BACKOFF, metavar='SECONDS',
+                        help=f'Wait before the first retry, doubled for each next one '
+                             f'(default: {DEFAULT_RETRY_BACKOFF})')
+    parser.add_argument('--partial', action='store_true',
+                        help='Write the presentation with placeholder slides for pages that fail to convert')
+    parser.add_argument('--no-dedup', action='store_true',
+                        help='Convert identical pages separately instead of once')
+    parser.add_argument('--no-pool', action='store_true',
+                        help='Start a new Inkscape process for every page instead of reusing workers')
+    parser.add_argument('--worker-max-pages', type=int, default=WORKER_MAX_PAGES,
+                        help=f'Restart each Inkscape worker after N pages (default: {WORKER_MAX_PAGES})')
+    parser.add_argument('--cache-dir', type=Path, default=None,
+                        help='EMF cache directory (default: $PDF2PPT_CACHE_DIR or ~/.cache/pdf2ppt)')
+    parser.add_argument('--cache-size', type=int, default=None, metavar='MB',
+                        help='EMF cache size limit in MB (default: $PDF2PPT_CACHE_SIZE_MB or 512)')
+    parser.add_argument('--no-cache', action='store_true', help='Do not use the EMF cache')
+    parser.add_argument('--image-dpi', type=int, default=None, metavar='DPI',
+                        help=f'Downsample embedded images above DPI of the slide size (e.g. {DEFAULT_IMAGE_DPI})')
+    parser.add_argument('--image-quality', type=int, default=DEFAULT_IMAGE_QUALITY,
+                        help=f'JPEG quality for downsampled opaque images, 0 keeps PNG '
+                             f'(default: {DEFAULT_IMAGE_QUALITY})')
+    parser.add_argument('--optimize-svg', action='store_true',
+                        help='Round coordinates, flatten groups, drop unused definitions and join strokes '
+                             'in each SVG before Inkscape converts it')
+    parser.add_argument('--template', action='store_true',
+                        help='Convert the background, header and footer shared by most pages once '
+                             'and put it on the slide layout')
+    parser.add_argument('--watch', action='store_true',
+                        help='Keep running and update the output, converting only changed pages, '
+                             'whenever the input PDF changes')
+    parser.add_argument('--watch-interval', type=float, default=1.0, metavar='SECONDS',
+                        help='How often --watch checks the input PDF (default: 1.0)')
+    parser.add_argument('--backend', choices=BACKENDS, default='emf',
+                        help='Slide content: EMF pictures made by Inkscape, native editable shapes translated '
+                             'from the SVG, or native for pages simple enough (default: emf)')
+    parser.add_argument('--native-pages', type=str, metavar='RANGE',
+                        help='Pages to translate to native shapes whatever --backend is (e.g. "2-4")')
+    parser.add_argument('--events', action='store_true',
+                        help='Print per-page progress events as JSON lines to stderr')
     args = parser.parse_args()
+    if args.watch and args.template:
+        parser.error('--watch cannot be combined with --template')
+    if args.watch and (args.backend != 'emf' or args.native_pages):
+        parser.error('--watch supports only the EMF backend')
+    if args.watch and args.in_memory:
+        parser.error('--watch cannot be combined with --in-memory')
+    if args.watch and args.partial:
+        parser.error('--watch cannot be combined with --partial')
+    if args.watch and args.low_memory:
+        parser.error('--watch cannot be combined with --low-memory')
+    args.stream = args.stream or args.in_memory
+    limiter = None
+    if args.parallel == 'auto':
+        limiter = AdaptiveLimiter(max_limit=args.max_parallel)
+        # Enough workers for the highest limit; the limiter decides how many convert at once
+        args.parallel = limiter.max_limit
+    set_child_limits(args.child_memory, args.child_nice)
+    from pypdf import PdfReader
+    from rich.panel import Panel
+    from rich.table import Table
+    from .fingerprint import find_duplicate_pages
+    from .template import extract_template
     if not args.input.exists():
         console.print(f"[bold red]❌ Error:[/bold red] Input file not found: {args.input}")
         sys.exit(ERR_INPUT_NOT_FOUND)
@@ -236,29 +1133,147 @@ def main():
     console.print(Panel.fit(f"[bold blue]pdf2ppt[/bold blue] v{__version__}\n"
         f"[dim]Converting:[/dim] {args.input.name} → {ppt_path.name}", border_style="blue"))
     pdf_reader = PdfReader(args.input)
+    preload('pptx')  # needed once the pages are converted
     total_pages = len(pdf_reader.pages)
     pages = parse_page_range(args.pages, total_pages)
     if args.verbose:
         console.print(f"[dim]Processing {len(pages)} of {total_pages} pages[/dim]")
-    with console.status("[bold green]Converting PDF to SVG..."):
-        if not pdf2svg(args.input, args.pdf2svg_path, args.verbose):
-            console.print("[bold red]❌ Error:[/bold red] Failed to convert PDF to SVG")
-            sys.exit(ERR_PDF2SVG)
-    success, pages_with_filters = svg2emf(pdf_reader, args.input, args.inkscape_path,
-        pages, args.verbose, args.no_check, args.parallel)
-    if not success:
-        console.print("[bold red]❌ Error:[/bold red] Failed to convert SVG to EMF")
-        sys.exit(ERR_SVG2EMF)
+    work_dir = None
+    if args.work_dir:
+        args.work_dir.mkdir(parents=True, exist_ok=True)
+        work_dir = Path(tempfile.mkdtemp(prefix='pdf2ppt-', dir=args.work_dir))
+    elif args.in_memory:
+        # Scratch space stays out of the input directory, which may be slow or read-only
+        work_dir = Path(tempfile.mkdtemp(prefix='pdf2ppt-'))
+    pool = None if args.no_pool else InkscapePool(args.inkscape_path, args.parallel, args.worker_max_pages)
+    cache = None if args.no_cache else emf_cache(args.inkscape_path, args.cache_dir, args.cache_size)
+    on_progress = json_event_printer() if args.events else None
+    optimizer = ImageOptimizer(args.image_dpi, args.image_quality) if args.image_dpi else None
+    svg_optimizer = None
+    if args.optimize_svg:
+        from .svgopt import SvgOptimizer
+        svg_optimizer = SvgOptimizer()
+    policy = PagePolicy(args.page_timeout, args.retries, args.retry_backoff, args.partial)
+    if args.watch:
+        from .watch import watch_pdf
+        try:
+            watch_pdf(args.input, ppt_path, args.pages, args.pdf2svg_path, args.inkscape_path, args.parallel,
+                      args.no_check, pool, cache, optimizer, work_dir, args.no_clean, on_progress,
+                      args.watch_interval, policy, limiter, svg_optimizer)
+        finally:
+            if pool is not None:
+                pool.close()
+        return
+    duplicates = {} if args.no_dedup else find_duplicate_pages(pdf_reader, pages)
+    unique_pages = [page for page in pages if duplicates.get(page, page) == page]
+    if len(unique_pages) < len(pages):
+        console.print(f"[dim]Collapsed {len(pages) - len(unique_pages)} duplicate pages "
+                      f"({len(unique_pages)} unique)[/dim]")
+    template = None
+    if args.template:
+        template = extract_template(pdf_reader, unique_pages, get_tmp_dir(args.input, work_dir) / args.input.name)
+        if template is not None:
+            console.print(f"[dim]Found a template layer shared by {len(template.pages)} pages[/dim]")
+        elif args.verbose:
+            console.print("[dim]No template layer shared by enough pages[/dim]")
+    native = None
+    if args.backend != 'emf' or args.native_pages:
+        from .native import NativeBackend
+        forced = parse_page_range(args.native_pages, total_pages) if args.native_pages else ()
+        native = NativeBackend.for_pages(unique_pages, args.backend, forced)
+    if template is not None:
+        render_path, render_dir = template.path, get_tmp_dir(args.input, work_dir)
+        convert_pages = unique_pages + [template.template_page]
+    else:
+        render_path, render_dir, convert_pages = args.input, work_dir, unique_pages
+    try:
+        if args.stream:
+            success, pages_with_filters = convert_streaming(pdf_reader, args.input, ppt_path, pages,
+                args.pdf2svg_path, args.inkscape_path, args.verbose, args.no_check, args.parallel,
+                pool, args.no_clean, cache, duplicates, work_dir, on_progress, optimizer, template, native,
+                args.in_memory, policy, limiter, args.low_memory, svg_optimizer)
+            if not success:
+                console.print("[bold red]❌ Error:[/bold red] Failed to convert PDF to PowerPoint")
+                print_page_failures(policy)
+                sys.exit(ERR_SVG2EMF)
+        else:
+            with console.status("[bold green]Converting PDF to SVG..."):
+                if not pdf2svg(render_path, args.pdf2svg_path, args.verbose, convert_pages, args.parallel,
+                               render_dir, on_progress):
+                    console.print("[bold red]❌ Error:[/bold red] Failed to convert PDF to SVG")
+                    sys.exit(ERR_PDF2SVG)
+            if optimizer is not None:
+                with console.status("[bold green]Downsampling embedded images..."):
+                    optimize_images(pdf_reader, args.input, convert_pages, optimizer, args.parallel, work_dir)
+            if svg_optimizer is not None:
+                with console.status("[bold green]Optimizing SVG..."):
+                    optimize_svgs(args.input, convert_pages, svg_optimizer, args.parallel, work_dir, on_progress)
+            if native is not None:
+                with console.status("[bold green]Translating SVG to native shapes..."):
+                    convert_pages = svg2native(pdf_reader, args.input, convert_pages, native, args.parallel,
+                                               work_dir)
+            success, pages_with_filters = svg2emf(pdf_reader, args.input, args.inkscape_path,
+                convert_pages, args.verbose, args.no_check, args.parallel, pool, cache, work_dir,
+                on_progress, policy, limiter)
+            if template is not None and template.template_page in policy.failed:
+                success = False  # Every slide would miss its template
+            if not success:
+                console.print("[bold red]❌ Error:[/bold red] Failed to convert SVG to EMF")
+                print_page_failures(policy)
+                sys.exit(ERR_SVG2EMF)
+    finally:
+        if pool is not None:
+            pool.close()
+    if template is not None and template.template_page in pages_with_filters:
+        pages_with_filters = list(pages_with_filters) + sorted(template.pages)
+    pages_with_filters = [page for page in pages if duplicates.get(page, page) in pages_with_filters]
+    failed_pages = [page for page in pages if duplicates.get(page, page) in policy.failed]
+    if failed_pages:
+        console.print(f"[bold yellow]⚠️  Warning:[/bold yellow] Pages {failed_pages} could not be converted "
+                      f"and have placeholder slides.")
+        if args.verbose:
+            print_page_failures(policy)
+    if native is not None and native.fallbacks and args.verbose:
+        for page, reason in sorted(native.fallbacks.items()):
+            console.print(f"[dim]Page {page} converted to EMF: {reason}[/dim]")
     if pages_with_filters:
         console.print(f"[bold yellow]⚠️  Warning:[/bold yellow] Pages {pages_with_filters} may have transparency issues.")
         console.print("[dim]   See: https://github.com/neosun100/pdf2ppt/issues/1[/dim]")
-    emf2ppt(pdf_reader, args.input, ppt_path, pages, args.verbose)
+    if not args.stream:
+        emf2ppt(pdf_reader, args.input, ppt_path, pages, args.verbose, duplicates, work_dir, on_progress,
+                template, native, policy.failed, args.low_memory)
     if not args.no_clean:
-        clean_tmp(args.input, args.verbose)
+        clean_tmp(args.input, args.verbose, work_dir)
     console.print(f"\n[bold green]✅ Success![/bold green] Created: [cyan]{ppt_path}[/cyan]")
     table = Table(show_header=False, box=None)
     table.add_row("Pages converted:", f"[cyan]{len(pages)}[/cyan]")
+    if len(unique_pages) < len(pages):
+        table.add_row("Duplicate pages:", f"[cyan]{len(pages) - len(unique_pages)}[/cyan]")
+    if template is not None:
+        table.add_row("Template layer:", f"[cyan]shared by {len(template.pages)} pages[/cyan]")
+    if failed_pages:
+        table.add_row("Placeholder slides:", f"[yellow]{len(failed_pages)}[/yellow]")
+    if native is not None:
+        stats = native.stats()
+        table.add_row("Native slides:", f"[cyan]{stats['native']} ({stats['shapes']} shapes), "
+                      f"{stats['fallbacks']} fell back to EMF[/cyan]")
+    if limiter is not None:
+        stats = limiter.stats()
+        table.add_row("Adaptive workers:", f"[cyan]{stats['limit']} (peak {stats['peak']} of "
+                      f"{stats['max_limit']})[/cyan]")
     table.add_row("Output file:", f"[cyan]{ppt_path}[/cyan]")
+    if cache is not None:
+        stats = cache.stats()
+        table.add_row("EMF cache:", f"[cyan]{stats['hits']} hits, {stats['misses']} misses[/cyan]")
+    if optimizer is not None and optimizer.resized:
+        stats = optimizer.stats()
+        table.add_row("Images downsampled:", f"[cyan]{stats['resized']} ({stats['bytes_before'] / 1e6:.1f} MB → "
+                      f"{stats['bytes_after'] / 1e6:.1f} MB)[/cyan]")
+    if svg_optimizer is not None and svg_optimizer.pages:
+        stats = svg_optimizer.stats()
+        saved = 1 - stats['bytes_after'] / stats['bytes_before'] if stats['bytes_before'] else 0
+        table.add_row("SVG optimized:", f"[cyan]{stats['pages']} pages, {saved:.0%} smaller "
+                      f"in {stats['seconds']:.2f}s[/cyan]")
     console.print(table)
 
 
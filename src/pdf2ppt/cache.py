@@ -0,0 +1,258 @@
+"""Content-addressed file cache for pdf2ppt.
+
+Converted pages are stored under a hash of their input, so reconverting a deck
+where only a few slides changed only runs Inkscape for those slides. The same
+directory remembers which external tools were found, so they are not started
+just to check that they exist.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+from pathlib import Path
+from typing import Callable
+
+from .metrics import CACHE_REQUESTS, CACHE_EVICTIONS
+
+CACHE_DIR_ENV = 'PDF2PPT_CACHE_DIR'
+CACHE_SIZE_ENV = 'PDF2PPT_CACHE_SIZE_MB'
+DEFAULT_CACHE_SIZE_MB = 512
+HASH_CHUNK_SIZE = 1 << 20
+PROBE_FILE = 'probes.json'
+PROBE_TIMEOUT = 10
+
+
+def default_cache_dir() -> Path:
+    """Cache location from ``$PDF2PPT_CACHE_DIR``, else the user cache directory."""
+    if os.environ.get(CACHE_DIR_ENV):
+        return Path(os.environ[CACHE_DIR_ENV]).expanduser()
+    base = os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache'
+    return Path(base) / 'pdf2ppt'
+
+
+def default_cache_size_mb() -> int:
+    return int(os.environ.get(CACHE_SIZE_ENV, DEFAULT_CACHE_SIZE_MB))
+
+
+def hash_file(path: Path, *extra: str) -> str:
+    """SHA-256 of a file's contents followed by ``extra`` strings."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    for item in extra:
+        digest.update(b'\0' + item.encode('utf-8'))
+    return digest.hexdigest()
+
+
+def hash_data(data: bytes, *extra: str) -> str:
+    """Like :func:`hash_file`, for contents already in memory."""
+    digest = hashlib.sha256(data)
+    for item in extra:
+        digest.update(b'\0' + item.encode('utf-8'))
+    return digest.hexdigest()
+
+
+def executable_fingerprint(cmd: str) -> str:
+    """Identify an installed tool by resolved path, size and mtime, without running it."""
+    resolved = shutil.which(cmd) or cmd
+    try:
+        stat = os.stat(resolved)
+    except OSError:
+        return resolved
+    return f'{os.path.realpath(resolved)}:{stat.st_size}:{stat.st_mtime_ns}'
+
+
+def probe_tool(cmd: str, args: tuple = ('--version',), cache_dir: Path = None) -> dict:
+    """Check that ``cmd`` runs. Returns {'found', 'path', 'version'}.
+
+    ``version`` is the first line the tool prints for ``args``. Results for
+    found tools are kept in ``probes.json`` in the cache directory, keyed by
+    :func:`executable_fingerprint`, so a tool only runs again once it changes.
+    """
+    resolved = shutil.which(cmd)
+    if resolved is None:
+        return {'found': False, 'path': cmd, 'version': None}
+    fingerprint = executable_fingerprint(cmd)
+    key = f"{fingerprint} {' '.join(args)}"
+    probe_path = Path(cache_dir or default_cache_dir()) / PROBE_FILE
+    probes = _read_probes(probe_path)
+    if key in probes:
+        return probes[key]
+    try:
+        result = subprocess.run([resolved, *args], capture_output=True, timeout=PROBE_TIMEOUT)
+        output = (result.stdout.strip() or result.stderr.strip()).decode('utf-8', 'replace')
+        version = output.splitlines()[0] if output else ''
+    except subprocess.TimeoutExpired:
+        version = ''
+    except OSError:
+        return {'found': False, 'path': resolved, 'version': None}
+    probe = {'found': True, 'path': os.path.realpath(resolved), 'version': version}
+    # Re-read so concurrent probes of other tools are kept, and drop older builds of this one
+    probes = {k: v for k, v in _read_probes(probe_path).items()
+              if v.get('path') != probe['path'] or k.startswith(fingerprint + ' ')}
+    probes[key] = probe
+    try:
+        probe_path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=probe_path.parent, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(probes, f, indent=1)
+        os.replace(tmp_name, probe_path)
+    except OSError:
+        pass  # A read-only cache only costs the next run another probe
+    return probe
+
+
+def _read_probes(path: Path) -> dict:
+    try:
+        with open(path) as f:
+            probes = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return probes if isinstance(probes, dict) else {}
+
+
+class FileCache:
+    """Files stored by content key and evicted least-recently-used beyond ``max_bytes``.
+
+    Recency is tracked with file modification times, so several processes can
+    share one cache directory (e.g. a Docker volume).
+    """
+
+    def __init__(self, directory: Path, max_bytes: int, namespace: str = '', suffix: str = ''):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.namespace = namespace
+        self.suffix = suffix
+        self.name = namespace.split(':', 1)[0] or 'default'
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self._size = None
+        self._lock = threading.Lock()
+
+    def key(self, path: Path) -> str:
+        """Cache key for the contents of ``path`` within this cache's namespace."""
+        return hash_file(path, self.namespace)
+
+    def data_key(self, data: bytes) -> str:
+        """Cache key for ``data``; the same as :meth:`key` of a file holding it."""
+        return hash_data(data, self.namespace)
+
+    def text_key(self, *parts: str) -> str:
+        """Cache key for a sequence of strings within this cache's namespace."""
+        digest = hashlib.sha256(self.namespace.encode('utf-8'))
+        for part in parts:
+            digest.update(b'\0' + part.encode('utf-8'))
+        return digest.hexdigest()
+
+    def _entry(self, key: str) -> Path:
+        return self.directory / key[:2] / f'{key}{self.suffix}'
+
+    def get(self, key: str, dest: Path) -> bool:
+        """Copy the entry for ``key`` to ``dest``. Returns False on a miss."""
+        entry = self._entry(key)
+        try:
+            shutil.copyfile(entry, dest)
+            os.utime(entry)
+        except OSError:
+            self._count(False)
+            return False
+        self._count(True)
+        return True
+
+    def get_data(self, key: str) -> bytes:
+        """Contents of the entry for ``key``, or None on a miss."""
+        entry = self._entry(key)
+        try:
+            data = entry.read_bytes()
+            os.utime(entry)
+        except OSError:
+            self._count(False)
+            return None
+        self._count(True)
+        return data
+
+    def _count(self, hit: bool):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        CACHE_REQUESTS.labels(self.name, 'hit' if hit else 'miss').inc()
+
+    def put(self, key: str, src: Path):
+        """Store a copy of ``src`` under ``key``, evicting old entries if over budget."""
+        self._store(key, lambda tmp_name: shutil.copyfile(src, tmp_name))
+
+    def put_data(self, key: str, data: bytes):
+        """Store ``data`` under ``key``, evicting old entries if over budget."""
+        self._store(key, lambda tmp_name: Path(tmp_name).write_bytes(data))
+
+    def _store(self, key: str, write: Callable):
+        entry = self._entry(key)
+        entry.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=entry.parent, suffix='.tmp')
+        os.close(fd)
+        try:
+            write(tmp_name)
+            size = os.path.getsize(tmp_name)
+            os.replace(tmp_name, entry)
+        except OSError:
+            Path(tmp_name).unlink(missing_ok=True)
+            return
+        with self._lock:
+            self.stores += 1
+            if self._size is None:
+                self._size = sum(e.stat().st_size for e in self._entries())
+            else:
+                self._size += size
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _entries(self) -> list:
+        if not self.directory.exists():
+            return []
+        return [p for p in self.directory.glob(f'??/*{self.suffix}') if not p.name.endswith('.tmp')]
+
+    def _evict(self):
+        entries = []
+        for path in self._entries():
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+        self._size = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if self._size <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            self._size -= size
+            self.evictions += 1
+            CACHE_EVICTIONS.labels(self.name).inc()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'stores': self.stores,
+            'evictions': self.evictions,
+        }
+
+
+def emf_cache(inkscape_path: str = 'inkscape', directory: Path = None, size_mb: int = None) -> FileCache:
+    """Cache of per-page EMF output, keyed by the SVG and the converter versions."""
+    from . import __version__
+    directory = Path(directory) if directory else default_cache_dir()
+    size_mb = default_cache_size_mb() if size_mb is None else size_mb
+    namespace = f'emf:{__version__}:{executable_fingerprint(inkscape_path)}'
+    return FileCache(directory / 'emf', size_mb << 20, namespace, '.emf')
@@ -0,0 +1,261 @@
+"""Adaptive concurrency for pdf2ppt's external processes.
+
+How many Inkscape processes a machine can run at once depends on the pages:
+a text slide needs a few dozen megabytes, a page with a huge embedded image
+several gigabytes. Instead of a fixed ``--parallel``, an
+:class:`AdaptiveLimiter` lets conversions start only while the number in
+flight is below a limit that it tunes as pages finish: it grows while the CPUs
+have headroom and shrinks on CPU saturation, memory pressure or rising
+per-page latency. CPU and memory are read from the process's cgroup when
+there is one, so container limits are respected.
+
+Child processes can also be started with a lower priority and an address
+space limit (:func:`set_child_limits`), so one huge page cannot starve or
+take down the machine.
+"""
+
+import os
+import subprocess
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from .metrics import CONCURRENCY_LIMIT
+
+CGROUP_ROOT = Path('/sys/fs/cgroup')
+# Seconds between two limit adjustments
+ADJUST_INTERVAL = 1.0
+# Free memory below which the limit is halved
+DEFAULT_MIN_FREE_MB = 512
+# CPU utilization (of the CPUs available to the process) to stay below
+DEFAULT_TARGET_UTILIZATION = 0.9
+# Latency this many times the best seen so far counts as contention
+LATENCY_TOLERANCE = 2.0
+LATENCY_SMOOTHING = 0.3
+
+_child_limits = {'memory_mb': None, 'nice': None}
+
+
+def _read(path: Path) -> str:
+    try:
+        return path.read_text().strip()
+    except OSError:
+        return None
+
+
+def effective_cpus() -> float:
+    """CPUs this process may use: its affinity mask, capped by a cgroup CPU quota."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except (AttributeError, OSError):
+        cpus = os.cpu_count() or 1
+    quota = _read(CGROUP_ROOT / 'cpu.max')  # cgroup v2: "<quota> <period>" or "max <period>"
+    if quota and not quota.startswith('max'):
+        limit, period = (int(v) for v in quota.split()[:2])
+        return max(0.1, min(cpus, limit / period))
+    limit, period = _read(CGROUP_ROOT / 'cpu' / 'cpu.cfs_quota_us'), _read(CGROUP_ROOT / 'cpu' / 'cpu.cfs_period_us')
+    if limit and period and int(limit) > 0:
+        return max(0.1, min(cpus, int(limit) / int(period)))
+    return float(cpus)
+
+
+def _cpu_seconds() -> float:
+    """CPU time used so far by the process's cgroup, or by the whole machine. None if unknown."""
+    stat = _read(CGROUP_ROOT / 'cpu.stat')
+    if stat:
+        for line in stat.splitlines():
+            name, _, value = line.partition(' ')
+            if name == 'usage_usec':
+                return int(value) / 1e6
+    usage = _read(CGROUP_ROOT / 'cpuacct' / 'cpuacct.usage')
+    if usage:
+        return int(usage) / 1e9
+    stat = _read(Path('/proc/stat'))
+    if stat:
+        fields = [int(v) for v in stat.splitlines()[0].split()[1:]]
+        idle = fields[3] + (fields[4] if len(fields) > 4 else 0)
+        busy = (sum(fields[:8]) - idle) / os.sysconf('SC_CLK_TCK')
+        # Scaled so that dividing by effective_cpus() gives the machine's utilization
+        return busy / (os.cpu_count() or 1) * effective_cpus()
+    return None
+
+
+def free_memory() -> int:
+    """Bytes of memory still available to the process: the smaller of the cgroup's
+    headroom and the machine's MemAvailable. None if neither is known."""
+    candidates = []
+    limit, usage, stat = (_read(CGROUP_ROOT / name) for name in ('memory.max', 'memory.current', 'memory.stat'))
+    inactive_key = 'inactive_file'
+    if limit is None:  # cgroup v1
+        limit, usage, stat = (_read(CGROUP_ROOT / 'memory' / name)
+                              for name in ('memory.limit_in_bytes', 'memory.usage_in_bytes', 'memory.stat'))
+        inactive_key = 'total_inactive_file'
+    if limit and usage and limit != 'max' and int(limit) < 1 << 60:
+        # Like the kubelet, count reclaimable page cache as free
+        inactive = 0
+        for line in (stat or '').splitlines():
+            name, _, value = line.partition(' ')
+            if name == inactive_key:
+                inactive = int(value)
+        candidates.append(int(limit) - max(0, int(usage) - inactive))
+    meminfo = _read(Path('/proc/meminfo'))
+    for line in (meminfo or '').splitlines():
+        if line.startswith('MemAvailable:'):
+            candidates.append(int(line.split()[1]) * 1024)
+    return min(candidates) if candidates else None
+
+
+class CpuMeter:
+    """CPU utilization between consecutive calls, as a fraction of the CPUs available."""
+
+    def __init__(self):
+        self.cpus = effective_cpus()
+        self._last = (time.monotonic(), _cpu_seconds())
+
+    def utilization(self) -> float:
+        now, used = time.monotonic(), _cpu_seconds()
+        (then, before), self._last = self._last, (now, used)
+        if used is None or before is None or now <= then:
+            try:
+                return os.getloadavg()[0] / self.cpus
+            except (AttributeError, OSError):
+                return None
+        return max(0.0, (used - before) / ((now - then) * self.cpus))
+
+
+class AdaptiveLimiter:
+    """A concurrency limit between ``min_limit`` and ``max_limit`` tuned from system load.
+
+    Work runs inside :meth:`slot`, which waits while ``limit`` slots are in
+    use. At most every ``interval`` seconds, when a slot is released, the
+    limit is halved if free memory is below ``min_free_mb``, lowered by one
+    if CPU utilization is above ``target_utilization`` or the smoothed
+    latency of a slot exceeds twice the best seen, and raised by one if work
+    was waiting and the CPUs have headroom. One limiter can be shared by
+    concurrent conversions.
+    """
+
+    def __init__(self, min_limit: int = 1, max_limit: int = None, min_free_mb: int = DEFAULT_MIN_FREE_MB,
+                 target_utilization: float = DEFAULT_TARGET_UTILIZATION, interval: float = ADJUST_INTERVAL):
+        self.cpu = CpuMeter()
+        self.max_limit = max(1, max_limit or round(self.cpu.cpus))
+        self.min_limit = max(1, min(min_limit, self.max_limit))
+        self.min_free = min_free_mb << 20
+        self.target_utilization = target_utilization
+        self.interval = interval
+        # Start in the middle so the first pages neither crawl nor overload
+        self.limit = max(self.min_limit, min(self.max_limit, round(self.cpu.cpus / 2)))
+        self.peak = self.limit
+        CONCURRENCY_LIMIT.set(self.limit)
+        self.adjustments = {}
+        self.latency = None
+        self.best_latency = None
+        self._active = 0
+        self._waiting = 0
+        self._last_adjust = time.monotonic()
+        self._cond = threading.Condition()
+
+    @contextmanager
+    def slot(self):
+        """Hold one of the ``limit`` slots while the block runs."""
+        with self._cond:
+            self._waiting += 1
+            while self._active >= self.limit:
+                self._cond.wait()
+            self._waiting -= 1
+            self._active += 1
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - started
+            with self._cond:
+                self._active -= 1
+                self._observe(elapsed)
+                self._cond.notify_all()
+
+    def _observe(self, elapsed: float):
+        self.latency = elapsed if self.latency is None else \
+            LATENCY_SMOOTHING * elapsed + (1 - LATENCY_SMOOTHING) * self.latency
+        if self.best_latency is None or self.latency < self.best_latency:
+            self.best_latency = self.latency
+        now = time.monotonic()
+        if now - self._last_adjust < self.interval:
+            return
+        self._last_adjust = now
+        limit, reason = self.next_limit(self.cpu.utilization(), free_memory())
+        if limit != self.limit:
+            self.limit = limit
+            self.peak = max(self.peak, limit)
+            CONCURRENCY_LIMIT.set(limit)
+            self.adjustments[reason] = self.adjustments.get(reason, 0) + 1
+
+    def next_limit(self, utilization: float, free: int) -> tuple:
+        """(new limit, reason) for the measured CPU ``utilization`` and ``free`` memory bytes."""
+        if free is not None and free < self.min_free:
+            return max(self.min_limit, self.limit // 2), 'memory'
+        if utilization is not None and utilization > self.target_utilization:
+            return max(self.min_limit, self.limit - 1), 'cpu'
+        if self.best_latency and self.latency > self.best_latency * LATENCY_TOLERANCE and \
+                self.limit > self.min_limit:
+            # Let the baseline drift up, so slower pages alone do not keep shrinking the limit
+            self.best_latency = self.latency / LATENCY_TOLERANCE
+            return self.limit - 1, 'latency'
+        if self._waiting and self._active + 1 >= self.limit:
+            return min(self.max_limit, self.limit + 1), 'increase'
+        return self.limit, None
+
+    def stats(self) -> dict:
+        return {
+            'limit': self.limit,
+            'min_limit': self.min_limit,
+            'max_limit': self.max_limit,
+            'peak': self.peak,
+            'adjustments': dict(self.adjustments),
+            'latency': round(self.latency, 4) if self.latency is not None else None,
+        }
+
+
+@contextmanager
+def limited(limiter: AdaptiveLimiter):
+    """``limiter.slot()``, or nothing if there is no limiter."""
+    if limiter is None:
+        yield
+    else:
+        with limiter.slot():
+            yield
+
+
+def set_child_limits(memory_mb: int = None, nice: int = None):
+    """Start pdf2svg and Inkscape processes with at most ``memory_mb`` MB of address
+    space and ``nice`` added to their niceness (None leaves either unchanged).
+
+    Applies to processes started afterwards, process-wide. Only on POSIX.
+    """
+    _child_limits.update(memory_mb=memory_mb, nice=nice)
+
+
+def limited_command(cmd: list) -> list:
+    """``cmd`` started through ``sh``, which applies :func:`set_child_limits` and then
+    execs it; ``cmd`` itself if no limits are set.
+
+    The limits hold from the command's first instruction, without a
+    ``preexec_fn`` (which can deadlock the child when the parent runs
+    threads). A niceness the process may not set (a negative one without
+    privileges) is skipped with a warning from ``nice`` on stderr.
+    """
+    memory_mb, nice = _child_limits['memory_mb'], _child_limits['nice']
+    if os.name != 'posix' or (memory_mb is None and not nice):
+        return cmd
+    script = []
+    if memory_mb is not None:
+        script.append(f'ulimit -v {memory_mb << 10}')  # In KB
+    script.append(f'exec nice -n {int(nice)} "$@"' if nice else 'exec "$@"')
+    return ['sh', '-c', '; '.join(script), 'sh', *map(str, cmd)]
+
+
+def run_child(cmd: list, input: bytes = None, timeout: float = None) -> subprocess.CompletedProcess:
+    """``subprocess.run(cmd, input=input, capture_output=True, timeout=timeout)`` with
+    :func:`set_child_limits` applied to the process."""
+    return subprocess.run(limited_command(cmd), input=input, capture_output=True, timeout=timeout)
@@ -0,0 +1,75 @@
+"""Page fingerprints for pdf2ppt.
+
+A page's fingerprint is a hash of everything that determines how it renders:
+its content streams, the resources they use (fonts, images, forms, ...) and
+its geometry. Pages with equal fingerprints render identically, which is
+common in Beamer decks where ``\\pause`` and overlays repeat whole frames.
+"""
+
+import hashlib
+
+from pypdf.generic import ArrayObject, DictionaryObject, IndirectObject, StreamObject
+
+# Keys that point back into the page tree rather than at page content
+SKIPPED_KEYS = {'/Parent', '/P', '/Dest', '/StructParent', '/StructParents'}
+PAGE_KEYS = ('/Contents', '/Resources', '/MediaBox', '/CropBox', '/Rotate', '/Group')
+
+
+def _object_digest(obj, memo: dict) -> bytes:
+    """Hash a PDF object tree, hashing each indirect object only once."""
+    if isinstance(obj, IndirectObject):
+        ref = (obj.idnum, obj.generation)
+        if ref not in memo:
+            memo[ref] = b'cycle:%d' % obj.idnum
+            memo[ref] = _object_digest(obj.get_object(), memo)
+        return memo[ref]
+    digest = hashlib.sha256()
+    if isinstance(obj, DictionaryObject):
+        digest.update(b'dict')
+        for key in sorted(obj.keys()):
+            if key in SKIPPED_KEYS:
+                continue
+            digest.update(key.encode('utf-8', 'replace'))
+            digest.update(_object_digest(obj.raw_get(key), memo))
+        if isinstance(obj, StreamObject):
+            digest.update(b'stream')
+            digest.update(obj._data)
+    elif isinstance(obj, ArrayObject):
+        digest.update(b'array')
+        for item in obj:
+            digest.update(_object_digest(item, memo))
+    else:
+        digest.update(type(obj).__name__.encode())
+        digest.update(repr(obj).encode('utf-8', 'replace'))
+    return digest.digest()
+
+
+def fingerprint_page(page, memo: dict = None) -> str:
+    """Hex fingerprint of a pypdf page. Share ``memo`` across pages of one document."""
+    memo = {} if memo is None else memo
+    digest = hashlib.sha256()
+    for key in PAGE_KEYS:
+        value = page.get(key)
+        digest.update(key.encode())
+        if value is not None:
+            digest.update(_object_digest(page.raw_get(key), memo))
+    for annot in page.get('/Annots') or []:
+        appearance = annot.get_object().get('/AP')
+        if appearance is not None:
+            digest.update(_object_digest(appearance, memo))
+    return digest.hexdigest()
+
+
+def fingerprint_pages(pdf_reader, pages: list) -> dict:
+    """Map each 1-based page number in ``pages`` to its fingerprint."""
+    memo = {}
+    return {page: fingerprint_page(pdf_reader.pages[page - 1], memo) for page in pages}
+
+
+def find_duplicate_pages(pdf_reader, pages: list) -> dict:
+    """Map every page in ``pages`` to the first page that renders identically."""
+    first_seen = {}
+    duplicates = {}
+    for page, fingerprint in fingerprint_pages(pdf_reader, pages).items():
+        duplicates[page] = first_seen.setdefault(fingerprint, page)
+    return duplicates
@@ -0,0 +1,131 @@
+"""Embedded image optimization for pdf2ppt.
+
+pdf2svg embeds every raster at its full resolution, and Inkscape copies it
+into the EMF pixel for pixel. A 24-megapixel photo shown on a 10-inch slide
+needs far fewer pixels, so images are resampled to a target DPI of the page
+they are on before the SVG reaches Inkscape.
+"""
+
+import base64
+import hashlib
+import io
+import math
+import os
+import re
+import tempfile
+import threading
+from concurrent.futures import Future
+from pathlib import Path
+
+from .preflight import pil_image, preflight_svg
+
+DEFAULT_IMAGE_DPI = 200
+DEFAULT_IMAGE_QUALITY = 85
+DATA_URI = re.compile(r'data:image/(?:png|jpeg|jpg|gif|bmp|webp);base64,([A-Za-z0-9+/=\s]+)')
+
+
+class ImageOptimizer:
+    """Caps embedded SVG images at ``dpi`` pixels per inch of the page.
+
+    Oversized images are resampled and re-encoded as JPEG at ``quality`` when
+    they are opaque (PNG otherwise; ``quality=0`` always keeps PNG). One
+    optimizer is shared by all pages of a document, so an image repeated on
+    many pages is resampled once and every page gets identical bytes.
+    """
+
+    def __init__(self, dpi: int = DEFAULT_IMAGE_DPI, quality: int = DEFAULT_IMAGE_QUALITY):
+        self.dpi = dpi
+        self.quality = quality
+        self.resized = 0
+        self.reused = 0
+        self.bytes_before = 0
+        self.bytes_after = 0
+        self._memo = {}
+        self._lock = threading.Lock()
+
+    def max_size(self, page_width: float, page_height: float) -> tuple:
+        """Largest useful pixel size for a page of the given size in points."""
+        return (math.ceil(page_width / 72 * self.dpi), math.ceil(page_height / 72 * self.dpi))
+
+    def optimize_svg(self, svg_path: Path, page_width: float, page_height: float) -> bool:
+        """Rewrite ``svg_path`` with its oversized images resampled. Returns True if it changed."""
+        svg_path = Path(svg_path)
+        optimized = self._optimize_text(svg_path, page_width, page_height)
+        if optimized is None:
+            return False
+        fd, tmp_name = tempfile.mkstemp(dir=svg_path.parent, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(optimized)
+        os.replace(tmp_name, svg_path)
+        return True
+
+    def optimize_svg_data(self, svg_data: bytes, page_width: float, page_height: float) -> bytes:
+        """``svg_data`` with its oversized images resampled (the same bytes if none are)."""
+        text = self._optimize_text(svg_data, page_width, page_height)
+        return svg_data if text is None else text.encode('utf-8')
+
+    def _optimize_text(self, svg, page_width: float, page_height: float) -> str:
+        """Text of the SVG at a path or in bytes with oversized images resampled, or None if unchanged."""
+        max_w, max_h = self.max_size(page_width, page_height)
+        if not any(w > max_w or h > max_h for w, h, _ in preflight_svg(svg).images):
+            return None
+        text = svg.decode('utf-8') if isinstance(svg, bytes) else svg.read_text(encoding='utf-8')
+        optimized = DATA_URI.sub(lambda m: self._optimize_uri(m, max_w, max_h), text)
+        return optimized if optimized != text else None
+
+    def _optimize_uri(self, match: re.Match, max_w: int, max_h: int) -> str:
+        data = ''.join(match.group(1).split())
+        key = (hashlib.sha1(data.encode('ascii')).hexdigest(), max_w, max_h)
+        with self._lock:
+            future = self._memo.get(key)
+            owner = future is None
+            if owner:
+                future = self._memo[key] = Future()
+            else:
+                self.reused += 1
+        if owner:
+            # Pages converting in parallel wait for this result instead of resampling again
+            try:
+                uri = self._resample(base64.b64decode(data), max_w, max_h)
+            except BaseException as e:
+                future.set_exception(e)
+                raise
+            future.set_result(uri)
+            if uri is not None:
+                with self._lock:
+                    self.resized += 1
+                    self.bytes_before += len(data) * 3 // 4
+                    self.bytes_after += len(uri) * 3 // 4
+        return future.result() or match.group(0)
+
+    def _resample(self, raw: bytes, max_w: int, max_h: int) -> str:
+        """Data URI of the resampled image, or None if it is small enough already."""
+        Image = pil_image()
+        try:
+            with Image.open(io.BytesIO(raw)) as image:
+                scale = min(max_w / image.width, max_h / image.height)
+                if scale >= 1:
+                    return None
+                size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+                image = image.resize(size, Image.LANCZOS, reducing_gap=3.0)
+        except (OSError, ValueError):
+            return None
+        out = io.BytesIO()
+        transparent = image.mode in ('RGBA', 'LA', 'PA') or 'transparency' in image.info
+        if self.quality and not transparent:
+            image.convert('RGB').save(out, 'JPEG', quality=self.quality, optimize=True)
+            mime = 'jpeg'
+        else:
+            if image.mode not in ('1', 'L', 'LA', 'P', 'RGB', 'RGBA'):
+                image = image.convert('RGBA')
+            image.save(out, 'PNG', optimize=True)
+            mime = 'png'
+        return f'data:image/{mime};base64,' + base64.b64encode(out.getvalue()).decode('ascii')
+
+    def stats(self) -> dict:
+        return {
+            'resized': self.resized,
+            'reused': self.reused,
+            'bytes_before': self.bytes_before,
+            'bytes_after': self.bytes_after,
+        }
@@ -0,0 +1,312 @@
+"""Inkscape process management for pdf2ppt.
+
+Starting Inkscape takes seconds, so instead of launching one process per page
+the converter keeps a pool of long-lived ``inkscape --shell`` workers and feeds
+them pages through the actions interface.
+"""
+
+import atexit
+import os
+import queue
+import subprocess
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from .concurrency import limited_command, run_child
+from .metrics import ACTIVE_SUBPROCESSES, track_subprocess
+
+SHELL_PROMPT = b'> '
+WORKER_MAX_PAGES = 200
+WORKER_START_TIMEOUT = 60
+# A shell that exits this soon without a prompt is taken as ``--shell`` being unsupported
+SHELL_PROBE_SECONDS = 5
+# Seconds before the first restart attempt after a worker failed to start, doubling up to the maximum
+WORKER_RESTART_BACKOFF = 1.0
+WORKER_RESTART_MAX_BACKOFF = 60.0
+
+
+class InkscapeError(RuntimeError):
+    """Raised when an Inkscape shell worker dies or stops responding."""
+
+
+class InkscapeShellUnsupported(InkscapeError):
+    """Raised when Inkscape exits at once instead of offering a shell."""
+
+
+class InkscapeTimeout(InkscapeError):
+    """Raised when Inkscape exceeds the time allowed for a page. The process has been killed."""
+
+
+def run_inkscape(inkscape_path: str, svg_path: Path, emf_path: Path, timeout: float = None) -> bool:
+    """Convert one SVG to EMF with a dedicated Inkscape process.
+
+    The process is killed and InkscapeTimeout raised after ``timeout`` seconds.
+    """
+    cmd = [inkscape_path, '--export-type=emf', f'--export-filename={emf_path}', str(svg_path)]
+    try:
+        with track_subprocess('inkscape'):
+            result = run_child(cmd, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        raise InkscapeTimeout(f'Inkscape took longer than {timeout:g}s')
+    return result.returncode == 0
+
+
+def run_inkscape_pipe(inkscape_path: str, svg_data: bytes, timeout: float = None) -> bytes:
+    """Convert SVG data to EMF data with a dedicated Inkscape process reading
+    stdin and writing stdout. Returns None if Inkscape fails; raises
+    InkscapeTimeout as :func:`run_inkscape` does."""
+    cmd = [inkscape_path, '--pipe', '--export-type=emf', '--export-filename=-']
+    try:
+        with track_subprocess('inkscape'):
+            result = run_child(cmd, svg_data, timeout)
+    except subprocess.TimeoutExpired:
+        raise InkscapeTimeout(f'Inkscape took longer than {timeout:g}s')
+    return result.stdout if result.returncode == 0 and result.stdout else None
+
+
+def convert_data_via_files(convert, svg_data: bytes, scratch_dir: Path) -> bytes:
+    """Run ``convert(svg_path, emf_path)`` on SVG data through files in
+    ``scratch_dir``, which are removed again. Returns the EMF data or None."""
+    fd, svg_name = tempfile.mkstemp(dir=scratch_dir, suffix='.svg')
+    svg_path = Path(svg_name)
+    emf_path = svg_path.with_suffix('.emf')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(svg_data)
+        if not convert(svg_path, emf_path):
+            return None
+        return emf_path.read_bytes()
+    except OSError:
+        return None
+    finally:
+        svg_path.unlink(missing_ok=True)
+        emf_path.unlink(missing_ok=True)
+
+
+class InkscapeWorker:
+    """A single ``inkscape --shell`` process that exports one page at a time."""
+
+    def __init__(self, inkscape_path: str = 'inkscape', max_pages: int = WORKER_MAX_PAGES):
+        self.inkscape_path = inkscape_path
+        self.max_pages = max_pages
+        self.pages_done = 0
+        self._proc = None
+        self._output = None
+
+    @property
+    def alive(self) -> bool:
+        return self._proc is not None and self._proc.poll() is None
+
+    @property
+    def healthy(self) -> bool:
+        """True if the worker is running and has not reached its page budget."""
+        return self.alive and self.pages_done < self.max_pages
+
+    def start(self):
+        """Launch the shell process and wait for its first prompt."""
+        self.stop()
+        self._proc = subprocess.Popen(limited_command([self.inkscape_path, '--shell']), stdin=subprocess.PIPE,
+                                      stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        ACTIVE_SUBPROCESSES.labels('inkscape-shell').inc()
+        self._output = queue.Queue()
+        threading.Thread(target=self._pump, args=(self._proc.stdout, self._output), daemon=True).start()
+        self.pages_done = 0
+        started = time.monotonic()
+        try:
+            self._read_until_prompt(WORKER_START_TIMEOUT)
+        except InkscapeError as e:
+            self.stop()
+            if not isinstance(e, InkscapeTimeout) and time.monotonic() - started < SHELL_PROBE_SECONDS:
+                raise InkscapeShellUnsupported(f'{self.inkscape_path} exited without a shell prompt') from e
+            raise
+
+    def stop(self, kill: bool = False):
+        """Ask the shell to quit, killing it if it does not exit promptly (or at once with ``kill``)."""
+        proc, self._proc = self._proc, None
+        if proc is None:
+            return
+        ACTIVE_SUBPROCESSES.labels('inkscape-shell').dec()
+        if kill:
+            proc.kill()
+            proc.wait()
+            return
+        try:
+            if proc.poll() is None:
+                proc.stdin.write(b'quit\n')
+                proc.stdin.flush()
+                proc.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            proc.kill()
+            proc.wait()
+
+    def export_emf(self, svg_path: Path, emf_path: Path, timeout: float = None) -> bool:
+        """Export ``svg_path`` to ``emf_path``, waiting at most ``timeout`` seconds (None: no limit).
+        Raises InkscapeError if the worker breaks."""
+        if any(c in f'{svg_path}{emf_path}' for c in ';\n'):
+            raise ValueError('Path cannot be passed through the Inkscape shell')
+        emf_path = Path(emf_path)
+        emf_path.unlink(missing_ok=True)
+        command = (f'file-open:{svg_path};export-filename:{emf_path};'
+                   'export-type:emf;export-do;file-close\n')
+        try:
+            self._proc.stdin.write(command.encode('utf-8'))
+            self._proc.stdin.flush()
+        except OSError as e:
+            self.stop()
+            raise InkscapeError(f'Inkscape shell is not accepting input: {e}') from e
+        try:
+            self._read_until_prompt(timeout)
+        except InkscapeError as e:
+            # A worker stuck on a page would not react to quit
+            self.stop(kill=isinstance(e, InkscapeTimeout))
+            raise
+        self.pages_done += 1
+        return emf_path.exists() and emf_path.stat().st_size > 0
+
+    @staticmethod
+    def _pump(stream, output: queue.Queue):
+        for chunk in iter(lambda: stream.read1(4096), b''):
+            output.put(chunk)
+        output.put(None)
+
+    def _read_until_prompt(self, timeout: float) -> bytes:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        buffer = b''
+        while not buffer.endswith(SHELL_PROMPT):
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                raise InkscapeTimeout(f'Inkscape shell did not respond within {timeout:g}s')
+            try:
+                chunk = self._output.get(timeout=remaining)
+            except queue.Empty:
+                continue
+            if chunk is None:
+                raise InkscapeError('Inkscape shell exited unexpectedly')
+            buffer += chunk
+        return buffer
+
+
+class InkscapePool:
+    """A fixed number of Inkscape shell workers shared by concurrent conversions.
+
+    At most ``size`` Inkscape processes run at once, including the one-shot
+    fallback used when a worker crashes or the shell cannot export a page.
+    Workers are started lazily and recycled after ``max_pages`` pages.
+    """
+
+    def __init__(self, inkscape_path: str = 'inkscape', size: int = 1,
+                 max_pages: int = WORKER_MAX_PAGES):
+        self.inkscape_path = inkscape_path
+        self.size = max(1, size)
+        self._workers = [InkscapeWorker(inkscape_path, max_pages) for _ in range(self.size)]
+        self._idle = queue.LifoQueue()
+        for worker in self._workers:
+            self._idle.put(worker)
+        self._shell_supported = True
+        self._start_failures = 0
+        self._restart_at = 0.0
+
+    def warm(self):
+        """Start every worker now so the first conversion does not pay for startup."""
+        workers = [self._idle.get() for _ in range(self.size)]
+        try:
+            for worker in workers:
+                self._ensure_started(worker)
+        finally:
+            for worker in workers:
+                self._idle.put(worker)
+
+    def convert(self, svg_path: Path, emf_path: Path, timeout: float = None) -> bool:
+        """Convert one SVG to EMF on the next free worker.
+
+        A page that takes longer than ``timeout`` seconds (None: no limit, as
+        for a one-shot process) kills its worker and raises InkscapeTimeout
+        instead of being tried again with a one-shot process.
+        """
+        worker = self._idle.get()
+        try:
+            if self._ensure_started(worker):
+                try:
+                    if worker.export_emf(svg_path, emf_path, timeout):
+                        return True
+                    worker.stop()
+                except InkscapeTimeout:
+                    raise
+                except (InkscapeError, ValueError):
+                    pass
+            return run_inkscape(self.inkscape_path, svg_path, emf_path, timeout)
+        finally:
+            self._idle.put(worker)
+
+    def convert_data(self, svg_data: bytes, scratch_dir: Path, timeout: float = None) -> bytes:
+        """Convert SVG data to EMF data on the next free worker.
+
+        The shell only exports files, so the page passes through
+        ``scratch_dir`` (ideally a tmpfs). Returns None if conversion fails.
+        """
+        return convert_data_via_files(lambda svg_path, emf_path: self.convert(svg_path, emf_path, timeout),
+                                      svg_data, scratch_dir)
+
+    def _ensure_started(self, worker: InkscapeWorker) -> bool:
+        """(Re)start ``worker`` if needed. Returns False if the page should use a one-shot process.
+
+        The shell is disabled for good only if Inkscape cannot provide one (it
+        is missing, or exits at once without a prompt). Other start failures,
+        like a timeout on a loaded machine, back off exponentially before the
+        next attempt, with one-shot conversions meanwhile.
+        """
+        if not self._shell_supported:
+            return False
+        if worker.healthy:
+            return True
+        if time.monotonic() < self._restart_at:
+            return False
+        try:
+            worker.start()
+        except (InkscapeShellUnsupported, FileNotFoundError):
+            self._shell_supported = False
+            return False
+        except (InkscapeError, OSError):
+            self._start_failures += 1
+            backoff = WORKER_RESTART_BACKOFF * 2 ** (self._start_failures - 1)
+            self._restart_at = time.monotonic() + min(backoff, WORKER_RESTART_MAX_BACKOFF)
+            return False
+        self._start_failures = 0
+        return True
+
+    def close(self):
+        """Stop all workers. The pool restarts them if it is used again."""
+        workers = [self._idle.get() for _ in range(self.size)]
+        for worker in workers:
+            worker.stop()
+            self._idle.put(worker)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+_shared_pools = {}
+_shared_pools_lock = threading.Lock()
+
+
+def get_shared_pool(inkscape_path: str = 'inkscape', size: int = 1,
+                    max_pages: int = WORKER_MAX_PAGES) -> InkscapePool:
+    """Return the process-wide pool for ``inkscape_path``, creating it on first use."""
+    with _shared_pools_lock:
+        pool = _shared_pools.get(inkscape_path)
+        if pool is None:
+            pool = _shared_pools[inkscape_path] = InkscapePool(inkscape_path, size, max_pages)
+        return pool
+
+
+@atexit.register
+def close_shared_pools():
+    with _shared_pools_lock:
+        for pool in _shared_pools.values():
+            pool.close()
+        _shared_pools.clear()
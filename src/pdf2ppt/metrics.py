@@ -0,0 +1,201 @@
+"""In-process metrics for pdf2ppt in the Prometheus text format.
+
+The converter records how long each stage and page takes, how many external
+processes are running and how the caches perform. The web service exposes
+everything at ``/metrics``; the CLI records the same numbers and drops them.
+"""
+
+import functools
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+_registry = []
+
+
+def _format_labels(labelnames: tuple, values: tuple, extra: str = '') -> str:
+    pairs = []
+    for name, value in zip(labelnames, values):
+        value = value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{name}="{value}"')
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """A named metric with optional labels, registered for :func:`render`."""
+
+    type = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def labels(self, *values) -> '_Child':
+        if len(values) != len(self.labelnames):
+            raise ValueError(f'{self.name} expects labels {self.labelnames}')
+        return _Child(self, tuple(str(v) for v in values))
+
+    def _add(self, key: tuple, amount: float):
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _set(self, key: tuple, value: float):
+        with self._lock:
+            self._values[key] = value
+
+    def samples(self) -> list:
+        """(suffix, label values, extra label, value) tuples for the exposition."""
+        with self._lock:
+            return [('', key, '', value) for key, value in sorted(self._values.items())]
+
+
+class _Child:
+    """A metric bound to one set of label values."""
+
+    def __init__(self, metric: Metric, key: tuple):
+        self._metric = metric
+        self._key = key
+
+    def inc(self, amount: float = 1):
+        self._metric._add(self._key, amount)
+
+    def dec(self, amount: float = 1):
+        self._metric._add(self._key, -amount)
+
+    def set(self, value: float):
+        self._metric._set(self._key, value)
+
+    def observe(self, value: float):
+        self._metric._observe(self._key, value)
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, amount: float = 1):
+        self._add((), amount)
+
+
+class Gauge(Metric):
+    type = 'gauge'
+
+    def inc(self, amount: float = 1):
+        self._add((), amount)
+
+    def dec(self, amount: float = 1):
+        self._add((), -amount)
+
+    def set(self, value: float):
+        self._set((), value)
+
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (),
+                 buckets: tuple = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value: float):
+        self._observe((), value)
+
+    def _observe(self, key: tuple, value: float):
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * len(self.buckets), 0.0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self._values[key] = (counts, total + value)
+
+    def samples(self) -> list:
+        samples = []
+        with self._lock:
+            for key, (counts, total) in sorted(self._values.items()):
+                for bound, count in zip(self.buckets, counts):
+                    samples.append(('_bucket', key, f'le="{_format_value(bound)}"', count))
+                samples.append(('_sum', key, '', total))
+                samples.append(('_count', key, '', counts[-1]))
+        return samples
+
+
+def render() -> str:
+    """All registered metrics in the Prometheus text exposition format."""
+    lines = []
+    for metric in _registry:
+        lines.append(f'# HELP {metric.name} {metric.documentation}')
+        lines.append(f'# TYPE {metric.name} {metric.type}')
+        for suffix, key, extra, value in metric.samples():
+            labels = _format_labels(metric.labelnames, key, extra)
+            lines.append(f'{metric.name}{suffix}{labels} {_format_value(value)}')
+    return '\n'.join(lines) + '\n'
+
+
+STAGE_SECONDS = Histogram('pdf2ppt_stage_duration_seconds',
+                          'Wall time of one call of a conversion stage', ('stage',))
+PAGE_SECONDS = Histogram('pdf2ppt_page_duration_seconds',
+                         'Time spent on one page in a conversion stage', ('stage',))
+PAGE_OUTPUT_BYTES = Counter('pdf2ppt_page_output_bytes_total',
+                            'Bytes of SVG and EMF produced per stage (emf2ppt: EMF placed on slides)',
+                            ('stage',))
+STAGE_FAILURES = Counter('pdf2ppt_stage_failures_total', 'Failed conversion stages', ('stage',))
+PAGE_RETRIES = Counter('pdf2ppt_page_retries_total', 'Page conversions tried again after a failure', ('stage',))
+PAGE_TIMEOUTS = Counter('pdf2ppt_page_timeouts_total', 'Page conversions killed at their timeout', ('stage',))
+ACTIVE_SUBPROCESSES = Gauge('pdf2ppt_active_subprocesses',
+                            'External processes currently running', ('tool',))
+CONCURRENCY_LIMIT = Gauge('pdf2ppt_concurrency_limit', 'Current limit of an adaptive concurrency limiter')
+CONVERSIONS = Counter('pdf2ppt_conversions_total', 'Presentations written')
+INPUT_BYTES = Counter('pdf2ppt_input_bytes_total', 'Bytes of PDF input converted to presentations')
+OUTPUT_BYTES = Counter('pdf2ppt_output_bytes_total', 'Bytes of PPTX output written')
+CACHE_REQUESTS = Counter('pdf2ppt_cache_requests_total', 'Cache lookups by result', ('cache', 'result'))
+CACHE_EVICTIONS = Counter('pdf2ppt_cache_evictions_total', 'Entries evicted from a cache', ('cache',))
+OUTPUT_STORE_BYTES = Gauge('pdf2ppt_output_store_bytes', 'Bytes of finished presentations kept for download')
+OUTPUT_EVICTIONS = Counter('pdf2ppt_output_evictions_total', 'Presentations removed from the output store',
+                           ('reason',))
+
+
+def timed_stage(stage: str):
+    """Decorator recording a stage's duration and counting it as failed if it
+    raises or returns False (or a tuple starting with False)."""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.monotonic()
+            try:
+                result = func(*args, **kwargs)
+            except BaseException:
+                STAGE_FAILURES.labels(stage).inc()
+                raise
+            finally:
+                STAGE_SECONDS.labels(stage).observe(time.monotonic() - started)
+            if result is False or (isinstance(result, tuple) and result and result[0] is False):
+                STAGE_FAILURES.labels(stage).inc()
+            return result
+        return wrapper
+    return decorate
+
+
+@contextmanager
+def track_subprocess(tool: str):
+    """Count ``tool`` as a running external process for the duration of the block."""
+    gauge = ACTIVE_SUBPROCESSES.labels(tool)
+    gauge.inc()
+    try:
+        yield
+    finally:
+        gauge.dec()
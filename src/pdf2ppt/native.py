@@ -0,0 +1,738 @@
+"""Native DrawingML backend for pdf2ppt.
+
+Instead of converting a page's SVG to an EMF picture with Inkscape, the SVG
+that pdf2svg (cairo) writes is translated directly into PowerPoint freeform
+shapes and pictures, which are editable and need no Inkscape at all.
+
+cairo's output is a small subset of SVG: paths made of M/L/C/Z, glyphs as
+``<symbol>`` outlines placed with ``<use>``, rectangles, embedded images,
+matrix transforms and rectangular clips. Consecutive shapes painted the same
+way (typically the glyphs of a line of text) become one freeform with several
+paths. Anything the translation cannot reproduce faithfully (filters, masks,
+gradients, group opacity, non-rectangular clips, ...) raises
+:class:`UnsupportedSvg`, so the page can fall back to EMF.
+"""
+
+import base64
+import binascii
+import io
+import math
+import re
+import threading
+
+from lxml import etree
+
+from .preflight import preflight_svg
+
+SVG_NS = '{http://www.w3.org/2000/svg}'
+XLINK_HREF = '{http://www.w3.org/1999/xlink}href'
+# Properties inherited from ancestors, with their initial values
+INHERITED = {
+    'fill': 'black', 'fill-opacity': '1', 'fill-rule': 'nonzero', 'stroke': 'none', 'stroke-width': '1',
+    'stroke-opacity': '1', 'stroke-linecap': 'butt', 'stroke-linejoin': 'miter', 'stroke-miterlimit': '4',
+    'stroke-dasharray': 'none', 'visibility': 'visible',
+}
+NAMED_COLORS = {'black': (0, 0, 0), 'white': (255, 255, 255), 'red': (255, 0, 0), 'green': (0, 128, 0),
+                'blue': (0, 0, 255)}
+LINE_CAPS = {'butt': 'flat', 'round': 'rnd', 'square': 'sq'}
+IDENTITY = (1.0, 0.0, 0.0, 1.0, 0.0, 0.0)
+PATH_TOKEN = re.compile(r'([MmLlHhVvCcSsQqTtAaZz])|([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)')
+TRANSFORM = re.compile(r'(matrix|translate|scale|rotate|skewX|skewY)\s*\(([^)]*)\)')
+NUMBER = re.compile(r'[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?')
+CLIP_URL = re.compile(r'url\(#([^)]+)\)')
+# With --backend auto, busier pages stay EMF: PowerPoint draws one picture
+# faster than thousands of freeforms
+NATIVE_MAX_SHAPES = 2000
+# Slack for shapes touching the edge of their clip rectangle, in user units
+CLIP_TOLERANCE = 0.5
+# Chords per cubic Bezier when checking how a path fills
+CURVE_STEPS = 4
+# Drawing elements that cairo does not write and are not translated
+UNSUPPORTED_TAGS = {'text', 'circle', 'ellipse', 'line', 'polyline', 'polygon', 'svg', 'pattern',
+                    'foreignObject', 'switch', 'a'}
+
+
+class UnsupportedSvg(Exception):
+    """The SVG uses a feature the native backend cannot reproduce."""
+
+
+class NativeSlide:
+    """Translated content of one page.
+
+    ``items`` holds, in drawing order, ``('shape', (x, y, cx, cy, paths_xml,
+    fill_xml, line_xml))`` and ``('picture', (blob, x, y, cx, cy))`` entries,
+    all in EMU.
+    """
+
+    def __init__(self):
+        self.items = []
+
+    @property
+    def shapes(self) -> int:
+        return sum(kind == 'shape' for kind, _ in self.items)
+
+    @property
+    def pictures(self) -> int:
+        return sum(kind == 'picture' for kind, _ in self.items)
+
+
+def _multiply(m: tuple, n: tuple) -> tuple:
+    """The transform applying ``n`` first, then ``m``."""
+    a, b, c, d, e, f = m
+    a2, b2, c2, d2, e2, f2 = n
+    return (a * a2 + c * b2, b * a2 + d * b2, a * c2 + c * d2, b * c2 + d * d2,
+            a * e2 + c * f2 + e, b * e2 + d * f2 + f)
+
+
+def parse_transform(value: str) -> tuple:
+    matrix = IDENTITY
+    for name, args in TRANSFORM.findall(value or ''):
+        v = [float(x) for x in NUMBER.findall(args)]
+        if name == 'matrix' and len(v) == 6:
+            step = tuple(v)
+        elif name == 'translate' and v:
+            step = (1, 0, 0, 1, v[0], v[1] if len(v) > 1 else 0)
+        elif name == 'scale' and v:
+            step = (v[0], 0, 0, v[1] if len(v) > 1 else v[0], 0, 0)
+        elif name == 'rotate' and v:
+            angle = math.radians(v[0])
+            cos, sin = math.cos(angle), math.sin(angle)
+            step = (cos, sin, -sin, cos, 0, 0)
+            if len(v) == 3:
+                step = _multiply(_multiply((1, 0, 0, 1, v[1], v[2]), step), (1, 0, 0, 1, -v[1], -v[2]))
+        elif name in ('skewX', 'skewY') and v:
+            t = math.tan(math.radians(v[0]))
+            step = (1, 0, t, 1, 0, 0) if name == 'skewX' else (1, t, 0, 1, 0, 0)
+        else:
+            raise UnsupportedSvg(f'transform {name}({args})')
+        matrix = _multiply(matrix, step)
+    return matrix
+
+
+def parse_path(d: str) -> list:
+    """Subpaths of a path's ``d`` as lists of ('M'|'L', x, y), ('C', x1, y1, x2, y2, x, y) and ('Z',)."""
+    tokens = PATH_TOKEN.findall(d or '')
+    subpaths = []
+    current = None
+    x = y = start_x = start_y = 0.0
+    last_control = None  # For S/T: (command family, control point)
+    i = 0
+    command = None
+
+    def numbers(count: int) -> list:
+        nonlocal i
+        values = []
+        while len(values) < count:
+            if i >= len(tokens) or tokens[i][0]:
+                raise UnsupportedSvg('malformed path data')
+            values.append(float(tokens[i][1]))
+            i += 1
+        return values
+
+    while i < len(tokens):
+        if tokens[i][0]:
+            command = tokens[i][0]
+            i += 1
+        elif command is None:
+            raise UnsupportedSvg('malformed path data')
+        relative = command.islower()
+        op = command.upper()
+        dx, dy = (x, y) if relative else (0.0, 0.0)
+        if op == 'Z':
+            if current is not None:
+                current.append(('Z',))
+            x, y = start_x, start_y
+            current = None
+            last_control = None
+            command = None
+            continue
+        if op == 'M':
+            px, py = numbers(2)
+            x, y = px + dx, py + dy
+            start_x, start_y = x, y
+            current = [('M', x, y)]
+            subpaths.append(current)
+            command = 'l' if relative else 'L'  # Further pairs are line segments
+            last_control = None
+            continue
+        if current is None:  # Drawing after Z continues from the subpath's start
+            current = [('M', x, y)]
+            subpaths.append(current)
+        if op == 'L':
+            px, py = numbers(2)
+            x, y = px + dx, py + dy
+            current.append(('L', x, y))
+            last_control = None
+        elif op == 'H':
+            x = numbers(1)[0] + dx
+            current.append(('L', x, y))
+            last_control = None
+        elif op == 'V':
+            y = numbers(1)[0] + (dy if relative else 0.0)
+            current.append(('L', x, y))
+            last_control = None
+        elif op in ('C', 'S'):
+            if op == 'C':
+                x1, y1, x2, y2, px, py = numbers(6)
+                x1, y1 = x1 + dx, y1 + dy
+            else:
+                x2, y2, px, py = numbers(4)
+                if last_control and last_control[0] == 'C':
+                    x1, y1 = 2 * x - last_control[1], 2 * y - last_control[2]
+                else:
+                    x1, y1 = x, y
+            x2, y2, px, py = x2 + dx, y2 + dy, px + dx, py + dy
+            current.append(('C', x1, y1, x2, y2, px, py))
+            x, y = px, py
+            last_control = ('C', x2, y2)
+        elif op in ('Q', 'T'):
+            if op == 'Q':
+                qx, qy, px, py = numbers(4)
+                qx, qy = qx + dx, qy + dy
+            else:
+                px, py = numbers(2)
+                if last_control and last_control[0] == 'Q':
+                    qx, qy = 2 * x - last_control[1], 2 * y - last_control[2]
+                else:
+                    qx, qy = x, y
+            px, py = px + dx, py + dy
+            # A quadratic Bézier is a cubic with control points 2/3 of the way to its control point
+            current.append(('C', x + 2 / 3 * (qx - x), y + 2 / 3 * (qy - y),
+                            px + 2 / 3 * (qx - px), py + 2 / 3 * (qy - py), px, py))
+            x, y = px, py
+            last_control = ('Q', qx, qy)
+        else:
+            raise UnsupportedSvg(f'path command {command}')
+    return subpaths
+
+
+def _transform_subpaths(subpaths: list, m: tuple) -> list:
+    a, b, c, d, e, f = m
+    result = []
+    for subpath in subpaths:
+        out = []
+        for segment in subpath:
+            if segment[0] == 'Z':
+                out.append(segment)
+                continue
+            coords = segment[1:]
+            points = []
+            for j in range(0, len(coords), 2):
+                px, py = coords[j], coords[j + 1]
+                points.extend((a * px + c * py + e, b * px + d * py + f))
+            out.append((segment[0], *points))
+        result.append(out)
+    return result
+
+
+def _bbox(subpaths: list) -> tuple:
+    xs, ys = [], []
+    for subpath in subpaths:
+        for segment in subpath:
+            xs.extend(segment[1::2])
+            ys.extend(segment[2::2])
+    if not xs:
+        return None
+    return (min(xs), min(ys), max(xs), max(ys))
+
+
+def _polyline(subpath: list) -> list:
+    """Points along a subpath, with each curve flattened to ``CURVE_STEPS`` chords."""
+    points = []
+    for segment in subpath:
+        if segment[0] == 'C' and points:
+            (x0, y0), (x1, y1, x2, y2, x3, y3) = points[-1], segment[1:]
+            for step in range(1, CURVE_STEPS + 1):
+                t = step / CURVE_STEPS
+                u = 1 - t
+                points.append((u ** 3 * x0 + 3 * u * u * t * x1 + 3 * u * t * t * x2 + t ** 3 * x3,
+                               u ** 3 * y0 + 3 * u * u * t * y1 + 3 * u * t * t * y2 + t ** 3 * y3))
+        elif segment[0] != 'Z':
+            points.append(segment[-2:])
+    return points
+
+
+def _signed_area(points: list) -> float:
+    """Shoelace area of a closed polyline, positive for one orientation and negative for the other."""
+    return sum(x0 * y1 - x1 * y0 for (x0, y0), (x1, y1) in zip(points, points[1:] + points[:1])) / 2
+
+
+def _crosses(p: tuple, q: tuple, r: tuple, s: tuple) -> bool:
+    """True if segments pq and rs have a point in common."""
+    def side(a, b, c):
+        return (b[0] - a[0]) * (c[1] - a[1]) - (b[1] - a[1]) * (c[0] - a[0])
+
+    def on(a, b, c):
+        # c, known to be collinear with ab, lies within it
+        return min(a[0], b[0]) <= c[0] <= max(a[0], b[0]) and min(a[1], b[1]) <= c[1] <= max(a[1], b[1])
+
+    d1, d2, d3, d4 = side(r, s, p), side(r, s, q), side(p, q, r), side(p, q, s)
+    if d1 * d2 < 0 and d3 * d4 < 0:
+        return True
+    return ((d1 == 0 and on(r, s, p)) or (d2 == 0 and on(r, s, q)) or
+            (d3 == 0 and on(p, q, r)) or (d4 == 0 and on(p, q, s)))
+
+
+def _self_intersects(points: list) -> bool:
+    """True if two non-adjacent edges of the closed polyline through ``points`` cross or touch."""
+    points = [point for k, point in enumerate(points) if point != points[k - 1]]
+    if len(points) < 4:
+        return False  # A triangle (or less) cannot cross itself
+    edges = [(points[k], points[(k + 1) % len(points)]) for k in range(len(points))]
+    order = sorted(range(len(edges)), key=lambda k: min(edges[k][0][0], edges[k][1][0]))
+    for i, k in enumerate(order):
+        p, q = edges[k]
+        right = max(p[0], q[0])
+        for j in order[i + 1:]:
+            r, s = edges[j]
+            if min(r[0], s[0]) > right:
+                break  # Sorted by left end, so no later edge reaches this one
+            if abs(k - j) in (1, len(edges) - 1):
+                continue  # Adjacent edges share a point
+            if _crosses(p, q, r, s):
+                return True
+    return False
+
+
+def _nonzero_as_evenodd(subpaths: list) -> bool:
+    """True if filling ``subpaths`` with the nonzero rule gives the same result as even-odd,
+    the only rule DrawingML has.
+
+    Both rules agree when no subpath crosses itself and every region has a
+    winding number of 0 or ±1 exactly where its nesting depth is even or
+    odd. Subpaths are taken not to cross each other (as in glyph outlines),
+    so nesting follows from bounding boxes: boxes that overlap without one
+    containing the other may differ, and so fall back.
+    """
+    contours = []
+    for subpath in subpaths:
+        points = _polyline(subpath)
+        if _self_intersects(points):
+            return False
+        area = _signed_area(points)
+        if area == 0:
+            continue  # Encloses nothing under either rule
+        xs, ys = [x for x, _ in points], [y for _, y in points]
+        contours.append([(min(xs), min(ys), max(xs), max(ys)), 1 if area > 0 else -1, 0, 0])
+    contours.sort(key=lambda contour: contour[0])
+    # Each contour collects the winding and depth its ancestors add
+    for i, outer in enumerate(contours):
+        box = outer[0]
+        for inner in contours[i + 1:]:
+            other = inner[0]
+            if other[0] > box[2]:
+                break  # Sorted by left edge, so no later box overlaps ``box``
+            if other[1] > box[3] or other[3] < box[1]:
+                continue
+            if other == box:
+                return False
+            if other[2] <= box[2] and other[1] >= box[1] and other[3] <= box[3]:
+                parent, child = outer, inner
+            elif other[0] == box[0] and box[2] <= other[2] and box[1] >= other[1] and box[3] <= other[3]:
+                parent, child = inner, outer
+            else:
+                return False
+            child[2] += parent[1]
+            child[3] += 1
+    # The region just inside each contour is filled by nonzero if its winding
+    # is not 0, and by even-odd if it lies inside an odd number of contours
+    return all((sign + winding != 0) == (depth % 2 == 0) for _, sign, winding, depth in contours)
+
+
+def _parse_color(value: str) -> tuple:
+    value = value.strip()
+    if value.startswith('rgb(') and value.endswith(')'):
+        parts = [p.strip() for p in value[4:-1].split(',')]
+        if len(parts) != 3:
+            raise UnsupportedSvg(f'color {value}')
+        return tuple(max(0, min(255, round(float(p[:-1]) * 2.55 if p.endswith('%') else float(p))))
+                     for p in parts)
+    if value.startswith('#'):
+        hex_digits = value[1:]
+        if len(hex_digits) == 3:
+            hex_digits = ''.join(ch * 2 for ch in hex_digits)
+        if len(hex_digits) == 6:
+            try:
+                return tuple(int(hex_digits[k:k + 2], 16) for k in (0, 2, 4))
+            except ValueError:
+                pass
+    if value.lower() in NAMED_COLORS:
+        return NAMED_COLORS[value.lower()]
+    raise UnsupportedSvg(f'paint {value}')
+
+
+def _color_xml(value: str, opacity: float) -> str:
+    """``a:solidFill`` for an SVG paint, or None for ``none``."""
+    if value == 'none':
+        return None
+    if value.startswith('url('):
+        raise UnsupportedSvg('gradient or pattern paint')
+    r, g, b = _parse_color(value)
+    alpha = f'<a:alpha val="{round(opacity * 100000)}"/>' if opacity < 1 else ''
+    return f'<a:solidFill><a:srgbClr val="{r:02X}{g:02X}{b:02X}">{alpha}</a:srgbClr></a:solidFill>'
+
+
+def _style(element, inherited: dict) -> dict:
+    """Effective style of ``element``: inherited properties overridden by its attributes and ``style``."""
+    style = dict(inherited)
+    for name in INHERITED:
+        value = element.get(name)
+        if value is not None:
+            style[name] = value
+    for declaration in (element.get('style') or '').split(';'):
+        name, _, value = declaration.partition(':')
+        name = name.strip()
+        if name:
+            style[name] = value.strip()
+    return style
+
+
+def _opacity(value) -> float:
+    try:
+        return max(0.0, min(1.0, float(value)))
+    except (TypeError, ValueError):
+        return 1.0
+
+
+class _Translator:
+    """Walks one SVG document and collects its :class:`NativeSlide`."""
+
+    def __init__(self, root, scale: float):
+        self.root = root
+        self.scale = scale
+        self.slide = NativeSlide()
+        self.ids = {element.get('id'): element for element in root.iter() if element.get('id')}
+        self.pending = None  # (paint key, fill_xml, line_xml, clip, [subpaths per source path])
+
+    def emu(self, value: float) -> int:
+        return round(value * self.scale)
+
+    def run(self, base: tuple):
+        self.walk_children(self.root, base, dict(INHERITED), None)
+        self.flush()
+        return self.slide
+
+    def walk_children(self, parent, m: tuple, style: dict, clip: tuple):
+        for child in parent:
+            if isinstance(child.tag, str):
+                self.walk(child, m, style, clip)
+
+    def check_effects(self, element, style: dict, group: bool) -> float:
+        """Raise for effects that cannot be translated; returns the element's own opacity."""
+        for name in ('filter', 'mask'):
+            if element.get(name) or style.get(name, 'none') != 'none':
+                raise UnsupportedSvg(name)
+        opacity = _opacity(element.get('opacity', style.pop('opacity', 1)))
+        if group and opacity < 1:
+            raise UnsupportedSvg('group opacity')
+        return opacity
+
+    def element_clip(self, element, style: dict, m: tuple, clip: tuple) -> tuple:
+        value = element.get('clip-path') or style.pop('clip-path', None)
+        if not value or value == 'none':
+            return clip
+        match = CLIP_URL.match(value)
+        target = self.ids.get(match.group(1)) if match else None
+        if target is None:
+            raise UnsupportedSvg('clip path reference')
+        rect = self.clip_rect(target, m)
+        if clip is not None:
+            rect = (max(rect[0], clip[0]), max(rect[1], clip[1]), min(rect[2], clip[2]), min(rect[3], clip[3]))
+        return rect
+
+    def clip_rect(self, clip_path, m: tuple) -> tuple:
+        """Page-space rectangle of a clipPath, which must be one axis-aligned rectangle."""
+        m = _multiply(m, parse_transform(clip_path.get('transform')))
+        shapes = [child for child in clip_path if isinstance(child.tag, str)]
+        if len(shapes) != 1:
+            raise UnsupportedSvg('clip path with several shapes')
+        shape = shapes[0]
+        m = _multiply(m, parse_transform(shape.get('transform')))
+        subpaths = [sp for sp in _transform_subpaths(self.geometry(shape), m) if len(sp) > 1]
+        points = {(round(s[-2], 3), round(s[-1], 3)) for sp in subpaths for s in sp if s[0] in 'ML'}
+        if len(subpaths) != 1 or any(s[0] == 'C' for s in subpaths[0]) or len(points) != 4 or \
+                len({p[0] for p in points}) != 2 or len({p[1] for p in points}) != 2:
+            raise UnsupportedSvg('non-rectangular clip path')
+        return _bbox(subpaths)
+
+    def geometry(self, element) -> list:
+        tag = element.tag[len(SVG_NS):] if element.tag.startswith(SVG_NS) else element.tag
+        if tag == 'path':
+            return parse_path(element.get('d'))
+        if tag == 'rect':
+            if float(element.get('rx', 0) or 0) or float(element.get('ry', 0) or 0):
+                raise UnsupportedSvg('rounded rectangle')
+            x, y = float(element.get('x', 0)), float(element.get('y', 0))
+            w, h = float(element.get('width', 0)), float(element.get('height', 0))
+            return [[('M', x, y), ('L', x + w, y), ('L', x + w, y + h), ('L', x, y + h), ('Z',)]]
+        raise UnsupportedSvg(f'<{tag}> in clip path')
+
+    def walk(self, element, m: tuple, style: dict, clip: tuple):
+        tag = element.tag[len(SVG_NS):] if element.tag.startswith(SVG_NS) else element.tag
+        if tag in ('defs', 'symbol', 'clipPath', 'mask', 'linearGradient', 'radialGradient', 'title',
+                   'desc', 'metadata', 'style', 'filter'):
+            if tag == 'style':
+                raise UnsupportedSvg('style sheet')
+            return
+        if element.get('display') == 'none':
+            return
+        style = _style(element, style)
+        m = _multiply(m, parse_transform(element.get('transform')))
+        if tag == 'g':
+            self.check_effects(element, style, group=True)
+            clip = self.element_clip(element, style, m, clip)
+            self.walk_children(element, m, style, clip)
+        elif tag == 'use':
+            self.check_effects(element, style, group=True)
+            clip = self.element_clip(element, style, m, clip)
+            href = element.get(XLINK_HREF) or element.get('href') or ''
+            target = self.ids.get(href[1:]) if href.startswith('#') else None
+            if target is None:
+                raise UnsupportedSvg(f'use of {href or "nothing"}')
+            m = _multiply(m, (1, 0, 0, 1, float(element.get('x', 0)), float(element.get('y', 0))))
+            target_tag = target.tag[len(SVG_NS):]
+            if target_tag in ('symbol', 'g'):
+                if target_tag == 'g':
+                    self.check_effects(target, _style(target, style), group=True)
+                self.walk_children(target, m, _style(target, style) if target_tag == 'g' else style, clip)
+            else:
+                self.walk(target, m, style, clip)
+        elif tag in ('path', 'rect'):
+            opacity = self.check_effects(element, style, group=False)
+            clip = self.element_clip(element, style, m, clip)
+            if style.get('visibility') != 'visible':
+                return
+            self.add_shape(_transform_subpaths(self.geometry(element), m), style, opacity, m, clip)
+        elif tag == 'image':
+            opacity = self.check_effects(element, style, group=False)
+            clip = self.element_clip(element, style, m, clip)
+            self.add_image(element, m, opacity, clip)
+        elif tag in UNSUPPORTED_TAGS:
+            raise UnsupportedSvg(f'<{tag}>')
+        # Other elements (e.g. from foreign namespaces) draw nothing and are ignored
+
+    def within_clip(self, bbox: tuple, clip: tuple) -> bool:
+        return clip is None or (bbox[0] >= clip[0] - CLIP_TOLERANCE and bbox[1] >= clip[1] - CLIP_TOLERANCE and
+                                bbox[2] <= clip[2] + CLIP_TOLERANCE and bbox[3] <= clip[3] + CLIP_TOLERANCE)
+
+    def add_shape(self, subpaths: list, style: dict, opacity: float, m: tuple, clip: tuple):
+        subpaths = [sp for sp in subpaths if len(sp) > 1]
+        bbox = _bbox(subpaths)
+        if bbox is None:
+            return
+        fill = _color_xml(style['fill'], _opacity(style['fill-opacity']) * opacity)
+        line = None
+        if style['stroke'] != 'none':
+            stroke = _color_xml(style['stroke'], _opacity(style['stroke-opacity']) * opacity)
+            width = float(NUMBER.match(style['stroke-width']).group()) * math.sqrt(abs(m[0] * m[3] - m[1] * m[2]))
+            half = width / 2
+            bbox = (bbox[0] - half, bbox[1] - half, bbox[2] + half, bbox[3] + half)
+            line = self.line_xml(stroke, width, style)
+        if fill is None and line is None:
+            return
+        if not self.within_clip(bbox, clip):
+            raise UnsupportedSvg('shape extends beyond its clip path')
+        # A freeform path is filled even-odd
+        if fill is not None and style['fill-rule'] != 'evenodd' and not _nonzero_as_evenodd(subpaths):
+            raise UnsupportedSvg('crossing or overlapping subpaths filled with the nonzero rule')
+        line_xml = line or '<a:ln><a:noFill/></a:ln>'
+        key = (fill, line_xml, clip)
+        if self.pending is not None and self.pending[0] == key:
+            self.pending[4].append(subpaths)
+        else:
+            self.flush()
+            self.pending = [key, fill or '<a:noFill/>', line_xml, clip, [subpaths]]
+
+    def line_xml(self, stroke: str, width: float, style: dict) -> str:
+        if stroke is None:
+            return '<a:ln><a:noFill/></a:ln>'
+        cap = LINE_CAPS.get(style['stroke-linecap'], 'flat')
+        join = style['stroke-linejoin']
+        if join == 'round':
+            join_xml = '<a:round/>'
+        elif join == 'bevel':
+            join_xml = '<a:bevel/>'
+        else:
+            join_xml = f'<a:miter lim="{round(float(style["stroke-miterlimit"]) * 100000)}"/>'
+        dash_xml = ''
+        if style['stroke-dasharray'] not in ('none', ''):
+            dashes = [float(v) for v in NUMBER.findall(style['stroke-dasharray'])]
+            if len(dashes) % 2:
+                dashes *= 2
+            if width > 0 and dashes and any(dashes):
+                # Dash and space lengths are in thousandths of a percent of the line width
+                pairs = ''.join(f'<a:ds d="{round(d / width * 100000)}" sp="{round(sp / width * 100000)}"/>'
+                                for d, sp in zip(dashes[::2], dashes[1::2]))
+                dash_xml = f'<a:custDash>{pairs}</a:custDash>'
+        return f'<a:ln w="{max(0, self.emu(width))}" cap="{cap}">{stroke}{dash_xml}{join_xml}</a:ln>'
+
+    def flush(self):
+        """Emit the shape being accumulated, if any."""
+        if self.pending is None:
+            return
+        _, fill, line, _, sources = self.pending
+        self.pending = None
+        bbox = _bbox([sp for subpaths in sources for sp in subpaths])
+        x0, y0 = self.emu(bbox[0]), self.emu(bbox[1])
+        cx, cy = max(1, self.emu(bbox[2]) - x0), max(1, self.emu(bbox[3]) - y0)
+        paths = []
+        for subpaths in sources:
+            commands = []
+            for subpath in subpaths:
+                for segment in subpath:
+                    op = segment[0]
+                    if op == 'Z':
+                        commands.append('<a:close/>')
+                        continue
+                    pts = ''.join(f'<a:pt x="{self.emu(segment[k]) - x0}" y="{self.emu(segment[k + 1]) - y0}"/>'
+                                  for k in range(1, len(segment), 2))
+                    tag = {'M': 'moveTo', 'L': 'lnTo', 'C': 'cubicBezTo'}[op]
+                    commands.append(f'<a:{tag}>{pts}</a:{tag}>')
+            paths.append(f'<a:path w="{cx}" h="{cy}">{"".join(commands)}</a:path>')
+        self.slide.items.append(('shape', (x0, y0, cx, cy, ''.join(paths), fill, line)))
+
+    def add_image(self, element, m: tuple, opacity: float, clip: tuple):
+        a, b, c, d, e, f = m
+        if abs(b) > 1e-9 or abs(c) > 1e-9 or a <= 0 or d <= 0:
+            raise UnsupportedSvg('rotated or flipped image')
+        if opacity < 1:
+            raise UnsupportedSvg('image opacity')
+        href = element.get(XLINK_HREF) or element.get('href') or ''
+        header, _, data = href.partition(',')
+        if not header.startswith('data:image/') or ';base64' not in header:
+            raise UnsupportedSvg('linked image')
+        try:
+            blob = base64.b64decode(''.join(data.split()))
+        except (binascii.Error, ValueError):
+            raise UnsupportedSvg('undecodable image')
+        x, y = float(element.get('x', 0)), float(element.get('y', 0))
+        width, height = float(element.get('width', 0)), float(element.get('height', 0))
+        bbox = (a * x + e, d * y + f, a * (x + width) + e, d * (y + height) + f)
+        if not self.within_clip(bbox, clip):
+            raise UnsupportedSvg('image extends beyond its clip path')
+        self.flush()
+        x0, y0 = self.emu(bbox[0]), self.emu(bbox[1])
+        self.slide.items.append(('picture', (blob, x0, y0, max(1, self.emu(bbox[2]) - x0),
+                                             max(1, self.emu(bbox[3]) - y0))))
+
+
+class NativeBackend:
+    """Translates the SVGs of selected pages into :class:`NativeSlide` objects.
+
+    ``pages`` maps each page to try to whether it must pass a preflight first
+    (no filters, masks or group opacity, at most ``max_shapes`` paths and
+    glyphs). Translated pages are kept in ``slides``; the others, with the
+    reason, in ``fallbacks``, and go to Inkscape as usual. One backend is
+    shared by all pages of a document; a slide may be dropped from ``slides``
+    once it has been added, and still counts in :meth:`stats`.
+    """
+
+    def __init__(self, pages: dict, max_shapes: int = NATIVE_MAX_SHAPES):
+        self.pages = pages
+        self.max_shapes = max_shapes
+        self.slides = {}
+        self.fallbacks = {}
+        self.translated = 0
+        self.shapes = 0
+        self.pictures = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_pages(cls, pages: list, backend: str = 'native', forced: list = ()):
+        """Backend for a run: every page with ``native`` or ``auto`` (which preflights),
+        plus the ``forced`` pages with any backend."""
+        forced = set(forced)
+        return cls({page: backend == 'auto' and page not in forced
+                    for page in pages if backend != 'emf' or page in forced})
+
+    def translate(self, svg_path, page: int, slide_width: int) -> bool:
+        """Translate ``page`` (its SVG as a path or bytes) if it is selected.
+
+        Returns True if it needs no EMF.
+        """
+        if page not in self.pages:
+            return False
+        if self.pages[page]:
+            report = preflight_svg(svg_path)
+            if report.error or report.has_transparency:
+                self.fallbacks[page] = report.error or 'filters, masks or group opacity'
+                return False
+            if report.paths + report.glyphs > self.max_shapes:
+                self.fallbacks[page] = f'{report.paths + report.glyphs} shapes'
+                return False
+        try:
+            slide = svg_to_native(svg_path, slide_width)
+        except UnsupportedSvg as e:
+            self.fallbacks[page] = str(e)
+            return False
+        with self._lock:
+            self.slides[page] = slide
+            self.translated += 1
+            self.shapes += slide.shapes
+            self.pictures += slide.pictures
+        return True
+
+    def stats(self) -> dict:
+        return {
+            'native': self.translated,
+            'fallbacks': len(self.fallbacks),
+            'shapes': self.shapes,
+            'pictures': self.pictures,
+        }
+
+
+def svg_to_native(svg_path, slide_width: int) -> NativeSlide:
+    """Translate a pdf2svg SVG (a path or bytes) into shapes for a slide ``slide_width`` EMU wide.
+
+    Raises :class:`UnsupportedSvg` naming the first feature that cannot be
+    translated.
+    """
+    source = io.BytesIO(svg_path) if isinstance(svg_path, bytes) else str(svg_path)
+    try:
+        root = etree.parse(source, etree.XMLParser(huge_tree=True, remove_comments=True)).getroot()
+    except etree.XMLSyntaxError as e:
+        raise UnsupportedSvg(f'invalid SVG: {e}')
+    view_box = [float(v) for v in NUMBER.findall(root.get('viewBox') or '')]
+    if len(view_box) != 4:
+        width = float(NUMBER.match(root.get('width', '0')).group() or 0)
+        view_box = [0, 0, width, 0]
+    if view_box[2] <= 0:
+        raise UnsupportedSvg('missing page size')
+    scale = slide_width / view_box[2]
+    return _Translator(root, scale).run((1, 0, 0, 1, -view_box[0], -view_box[1]))
+
+
+def add_native_slide(prs, native: NativeSlide, show_template: bool = True):
+    """Append a blank slide with the shapes and pictures of ``native``."""
+    from pptx.oxml import parse_xml
+    from pptx.oxml.ns import nsdecls
+    slide = prs.slides.add_slide(prs.slide_layouts[6])
+    if not show_template:
+        slide._element.set('showMasterSp', '0')
+    sp_tree = slide.shapes._spTree
+    next_id = slide.shapes._next_shape_id
+    batch = []
+
+    def flush_batch():
+        if batch:
+            tree = parse_xml(f'<p:spTree {nsdecls("p", "a")}>{"".join(batch)}</p:spTree>')
+            for shape in list(tree):
+                sp_tree.insert_element_before(shape, 'p:extLst')
+            batch.clear()
+
+    for kind, item in native.items:
+        if kind == 'shape':
+            x, y, cx, cy, paths, fill, line = item
+            batch.append(
+                f'<p:sp><p:nvSpPr><p:cNvPr id="{next_id}" name="Freeform {next_id}"/><p:cNvSpPr/><p:nvPr/>'
+                f'</p:nvSpPr><p:spPr><a:xfrm><a:off x="{x}" y="{y}"/><a:ext cx="{cx}" cy="{cy}"/></a:xfrm>'
+                f'<a:custGeom><a:avLst/><a:gdLst/><a:ahLst/><a:cxnLst/><a:rect l="0" t="0" r="r" b="b"/>'
+                f'<a:pathLst>{paths}</a:pathLst></a:custGeom>{fill}{line}</p:spPr></p:sp>')
+        else:
+            flush_batch()
+            blob, x, y, cx, cy = item
+            _, rId = slide.part.get_or_add_image_part(io.BytesIO(blob))
+            sp_tree.add_pic(next_id, f'Picture {next_id}', '', rId, x, y, cx, cy)
+        next_id += 1
+    flush_batch()
+    return slide
@@ -0,0 +1,151 @@
+"""Streaming SVG preflight for pdf2ppt.
+
+Before a page goes to Inkscape, its SVG is scanned once with ``iterparse`` to
+find what is hard to reproduce in EMF (filters, masks, group opacity) and how
+heavy it is (paths, glyphs, embedded rasters). Elements are discarded as soon
+as they have been counted, so memory stays bounded by the largest single
+element (usually one inline image) instead of the whole file.
+"""
+
+import base64
+import binascii
+import io
+import re
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+SVG_NS = '{http://www.w3.org/2000/svg}'
+XLINK_HREF = '{http://www.w3.org/1999/xlink}href'
+# Enough base64 for the header of any PNG and of most JPEGs
+IMAGE_HEADER_CHARS = 1 << 16
+SVG_PATH, SVG_USE, SVG_G, SVG_IMAGE = (SVG_NS + tag for tag in ('path', 'use', 'g', 'image'))
+STYLE_OPACITY = re.compile(r'(?:^|;)\s*opacity\s*:\s*([0-9.eE+-]+)')
+STYLE_URL = re.compile(r'(?:^|;)\s*(filter|mask)\s*:\s*url\(')
+
+
+def pil_image():
+    """``PIL.Image``, imported on first use with the decompression bomb check
+    disabled, since slides legitimately embed very large images."""
+    from PIL import Image
+    Image.MAX_IMAGE_PIXELS = None
+    return Image
+
+
+@dataclass
+class SvgReport:
+    """What a page's SVG contains. ``images`` holds (width, height, bytes) per embedded raster."""
+
+    file_bytes: int = 0
+    elements: int = 0
+    paths: int = 0
+    glyphs: int = 0
+    filters: int = 0
+    masks: int = 0
+    opacity_groups: int = 0
+    images: list = field(default_factory=list)
+    error: str = None
+
+    @property
+    def has_filter(self) -> bool:
+        return self.filters > 0
+
+    @property
+    def has_transparency(self) -> bool:
+        """True if the page uses features EMF can only approximate."""
+        return bool(self.filters or self.masks or self.opacity_groups)
+
+    @property
+    def image_bytes(self) -> int:
+        return sum(size for _, _, size in self.images)
+
+    @property
+    def max_image_pixels(self) -> int:
+        return max((w * h for w, h, _ in self.images), default=0)
+
+    def to_dict(self) -> dict:
+        result = asdict(self)
+        result.update(has_transparency=self.has_transparency, image_bytes=self.image_bytes,
+                      max_image_pixels=self.max_image_pixels)
+        return result
+
+
+def _image_size(data: str) -> tuple:
+    """Pixel size of a base64 image, decoding only its header when possible."""
+    Image = pil_image()
+    for chunk in (data[:IMAGE_HEADER_CHARS], data):
+        try:
+            raw = base64.b64decode(chunk[:len(chunk) // 4 * 4])
+            with Image.open(io.BytesIO(raw)) as image:
+                return image.size
+        except (binascii.Error, OSError, ValueError, Image.DecompressionBombError):
+            if len(chunk) == len(data):
+                break
+    return (0, 0)
+
+
+def _data_uri_info(href: str) -> tuple:
+    """(width, height, bytes) of a ``data:`` image URI."""
+    header, _, data = href.partition(',')
+    if ';base64' not in header:
+        return (0, 0, len(data))
+    data = ''.join(data.split())
+    size = len(data) * 3 // 4 - data[-2:].count('=')
+    return (*_image_size(data), size)
+
+
+def _opacity(element) -> float:
+    value = element.get('opacity')
+    if value is None:
+        match = STYLE_OPACITY.search(element.get('style', ''))
+        value = match.group(1) if match else None
+    try:
+        return float(value) if value is not None else 1.0
+    except ValueError:
+        return 1.0
+
+
+def preflight_svg(svg_path) -> SvgReport:
+    """Scan ``svg_path`` (a path, or the SVG as bytes) in one streaming pass.
+
+    Parse errors are recorded in ``error``.
+    """
+    from lxml import etree
+    if isinstance(svg_path, bytes):
+        report = SvgReport(file_bytes=len(svg_path))
+        source = io.BytesIO(svg_path)
+    else:
+        report = SvgReport(file_bytes=Path(svg_path).stat().st_size)
+        source = str(svg_path)
+    try:
+        for _, element in etree.iterparse(source, events=('end',), huge_tree=True,
+                                          remove_comments=True, remove_pis=True):
+            tag = element.tag
+            get = element.get
+            report.elements += 1
+            style = get('style')
+            styled = {m.group(1) for m in STYLE_URL.finditer(style)} if style and 'url(' in style else ()
+            if get('filter') or 'filter' in styled:
+                report.filters += 1
+            if get('mask') or 'mask' in styled:
+                report.masks += 1
+            if tag == SVG_PATH:
+                report.paths += 1
+            elif tag == SVG_USE:
+                if (get(XLINK_HREF) or get('href') or '').startswith('#glyph'):
+                    report.glyphs += 1
+            elif tag == SVG_G:
+                if _opacity(element) < 1:
+                    report.opacity_groups += 1
+            elif tag == SVG_IMAGE:
+                href = get(XLINK_HREF) or get('href') or ''
+                if href.startswith('data:'):
+                    report.images.append(_data_uri_info(href))
+                else:
+                    report.images.append((0, 0, 0))
+            # Drop everything already counted so only the open ancestors stay in memory
+            element.clear()
+            while element.getprevious() is not None:
+                del element.getparent()[0]
+    except etree.XMLSyntaxError as e:
+        report.error = str(e)
+    return report
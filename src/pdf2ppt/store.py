@@ -0,0 +1,203 @@
+"""Managed output storage for the pdf2ppt web service.
+
+Finished presentations are kept under job-scoped keys (``<job id>/<name>``),
+so two uploads of ``slides.pdf`` never overwrite each other. The store is
+bounded: entries unused for longer than a TTL are removed, and beyond the
+byte quota the least recently used go first. Like :class:`pdf2ppt.cache.FileCache`
+it tracks recency with file modification times, so several processes can
+share the directory.
+
+:func:`sweep_orphans` removes upload directories and ``_pdf2ppt.tmp``
+directories that no running job owns, and :func:`parse_range` reads the
+``Range`` header that lets large downloads resume.
+"""
+
+import hashlib
+import os
+import re
+import shutil
+import threading
+import time
+from pathlib import Path
+
+from .metrics import OUTPUT_STORE_BYTES, OUTPUT_EVICTIONS
+
+DEFAULT_OUTPUT_SIZE_MB = 2048
+DEFAULT_OUTPUT_TTL = 3600
+# Keys are a job id (a UUID in hex) and a file name without path separators
+KEY = re.compile(r'[0-9a-f]{32}/[^/\\\0]+')
+BYTE_RANGE = re.compile(r'bytes=(\d*)-(\d*)')
+
+
+class OutputStore:
+    """Files under ``directory/<job id>/<name>``, removed after ``ttl`` seconds
+    without use and least-recently-used first beyond ``max_bytes``.
+
+    An entry is written once, so its ETag is derived from its key and size.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int, ttl: float = DEFAULT_OUTPUT_TTL):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.stores = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._lock = threading.Lock()
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def path(self, job_id: str, name: str) -> Path:
+        """Where the output ``name`` of job ``job_id`` is to be written (its directory is created)."""
+        job_dir = self.directory / job_id
+        job_dir.mkdir(exist_ok=True)
+        return job_dir / Path(name).name
+
+    @staticmethod
+    def key(path: Path) -> str:
+        """Key of an entry written to :meth:`path`, as used in download URLs."""
+        return f'{path.parent.name}/{path.name}'
+
+    def add(self, path: Path):
+        """Count the entry just written to ``path`` and enforce the quota, keeping it."""
+        with self._lock:
+            self.stores += 1
+            self._evict(keep=Path(path))
+
+    def lookup(self, key: str) -> tuple:
+        """(path, size, etag) of the entry for ``key``, marked as used, or None if there is none."""
+        if not KEY.fullmatch(key) or key.endswith(('/.', '/..')):
+            return None
+        path = self.directory / key
+        try:
+            size = path.stat().st_size
+            os.utime(path)
+        except OSError:
+            return None
+        etag = '"' + hashlib.sha256(f'{key}:{size}'.encode('utf-8')).hexdigest()[:32] + '"'
+        return path, size, etag
+
+    def _entries(self) -> list:
+        """(mtime, size, path) of every entry, oldest first."""
+        entries = []
+        for path in self.directory.glob('*/*'):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            if path.is_file():
+                entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+        return entries
+
+    def _remove(self, path: Path):
+        path.unlink(missing_ok=True)
+        try:
+            path.parent.rmdir()
+        except OSError:
+            pass  # Not empty, or already gone
+
+    def _evict(self, keep: Path = None) -> int:
+        cutoff = time.time() - self.ttl
+        entries = self._entries()
+        size = sum(entry_size for _, entry_size, _ in entries)
+        removed = 0
+        for mtime, entry_size, path in entries:
+            expired = mtime < cutoff
+            if path == keep or not (expired or size > self.max_bytes):
+                continue
+            self._remove(path)
+            size -= entry_size
+            removed += 1
+            if expired:
+                self.expirations += 1
+                OUTPUT_EVICTIONS.labels('ttl').inc()
+            else:
+                self.evictions += 1
+                OUTPUT_EVICTIONS.labels('quota').inc()
+        OUTPUT_STORE_BYTES.set(size)
+        return removed
+
+    def sweep(self) -> int:
+        """Remove expired entries, entries beyond the quota, empty job directories and
+        expired files outside of job directories. Returns the number of entries removed."""
+        with self._lock:
+            removed = self._evict()
+            cutoff = time.time() - self.ttl
+            for entry in self.directory.iterdir():
+                try:
+                    if entry.stat().st_mtime >= cutoff:
+                        continue
+                    if entry.is_dir():
+                        entry.rmdir()  # Only if empty, e.g. left by a failed job
+                    else:
+                        entry.unlink()  # Outputs stored before keys were job-scoped
+                        removed += 1
+                except OSError:
+                    pass
+        return removed
+
+    def stats(self) -> dict:
+        entries = self._entries()
+        return {
+            'entries': len(entries),
+            'bytes': sum(size for _, size, _ in entries),
+            'max_bytes': self.max_bytes,
+            'stores': self.stores,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+        }
+
+
+def sweep_orphans(directory: Path, active: set, max_age: float) -> int:
+    """Remove what no ``active`` job owns from ``directory`` once it is ``max_age`` seconds old.
+
+    Entries named after an active job id are kept, as is anything modified
+    more recently (an upload still being written). What goes are job
+    directories a crash, a restart or ``no_clean`` left behind, with their
+    ``_pdf2ppt.tmp`` directories, and stray files and ``_pdf2ppt.tmp``
+    directories next to them. Returns the number of entries removed.
+    """
+    cutoff = time.time() - max_age
+    removed = 0
+    for entry in Path(directory).iterdir():
+        if entry.name in active:
+            continue
+        try:
+            if entry.lstat().st_mtime >= cutoff:
+                continue
+            if entry.is_dir() and not entry.is_symlink():
+                shutil.rmtree(entry)
+            else:
+                entry.unlink()
+        except OSError:
+            continue
+        removed += 1
+    return removed
+
+
+def parse_range(header: str, size: int) -> tuple:
+    """The (first, last) byte positions of a single-range ``Range`` header.
+
+    Returns None when the whole file should be sent: no header, a syntax
+    this does not handle or several ranges (which a server may ignore).
+    Raises ValueError if the range cannot be satisfied for ``size`` bytes.
+    """
+    match = BYTE_RANGE.fullmatch((header or '').replace(' ', ''))
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # A suffix: the last N bytes
+        length = int(last)
+        if length == 0 or size == 0:
+            raise ValueError(header)
+        return (max(0, size - length), size - 1)
+    first = int(first)
+    last = min(int(last), size - 1) if last else size - 1
+    if first >= size:
+        raise ValueError(header)
+    if last < first:
+        return None  # Invalid, so ignored
+    return (first, last)
@@ -0,0 +1,343 @@
+"""SVG optimization for pdf2ppt.
+
+pdf2svg (through cairo) writes coordinates with more digits than a slide can
+show, wraps content in groups that carry nothing or only a transform, defines
+the same glyph again for every font subset that uses it and keeps definitions
+nothing refers to. Inkscape's EMF export time and the EMF's size grow with
+all of that, so :class:`SvgOptimizer` rewrites each page's SVG before
+Inkscape sees it:
+
+- coordinates are rounded to 1/65536 of the larger side of the page's
+  ``viewBox``, taking the scale of the transforms above them into account;
+- groups without attributes are unwrapped, a group's lone transform or
+  inherited style moves to its only child, identity transforms are dropped
+  and translations are folded into ``<use>`` positions and absolute path data;
+- identical glyph symbols are merged and unreferenced definitions dropped;
+- adjacent stroke-only paths drawn alike are joined into one path (fills are
+  left alone, where joining could change which areas are inside).
+"""
+
+import io
+import math
+import os
+import re
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from lxml import etree
+
+from .native import NUMBER, PATH_TOKEN, UnsupportedSvg, parse_transform
+from .preflight import SVG_NS, XLINK_HREF
+
+# Coordinates are kept to 1/2**PRECISION_BITS of the page's larger side
+PRECISION_BITS = 16
+SVG_G, SVG_PATH, SVG_USE, SVG_DEFS, SVG_SYMBOL = (SVG_NS + tag for tag in ('g', 'path', 'use', 'defs', 'symbol'))
+# Attributes holding coordinates, rounded like path data
+GEOMETRY_ATTRS = ('x', 'y', 'width', 'height', 'x1', 'y1', 'x2', 'y2', 'cx', 'cy', 'r', 'rx', 'ry')
+# Elements whose position can absorb a translation
+POSITIONED_TAGS = {SVG_NS + tag for tag in ('use', 'rect', 'image')}
+# Properties a group may hand down to its only child by copying them
+INHERITED_PREFIXES = ('fill', 'stroke', 'font')
+REFERENCE = re.compile(r'url\(\s*#([^)\s]+)\s*\)')
+# Roles of the parameters of each absolute path command: x, y or neither
+PATH_PARAMS = {'M': 'xy', 'L': 'xy', 'T': 'xy', 'H': 'x', 'V': 'y', 'C': 'xyxyxy', 'S': 'xyxy', 'Q': 'xyxy',
+               'A': '-----xy', 'Z': ''}
+
+
+def _style(element) -> dict:
+    return dict((name.strip(), value.strip()) for name, _, value in
+                (item.partition(':') for item in element.get('style', '').split(';')) if value.strip())
+
+
+def _format(value: float, decimals: int) -> str:
+    text = f'{value:.{decimals}f}'
+    if '.' in text:
+        text = text.rstrip('0').rstrip('.')
+    return '0' if text in ('-0', '') else text
+
+
+def _decimals(scale: float, tolerance: float) -> int:
+    """Decimals keeping the rounding error of a coordinate at ``scale`` below ``tolerance``."""
+    return max(0, math.ceil(math.log10(scale / (2 * tolerance)))) if scale > 0 else 0
+
+
+def _norm(matrix: tuple) -> float:
+    a, b, c, d = matrix[:4]
+    return math.sqrt(a * a + b * b + c * c + d * d)
+
+
+def _translate_path(d: str, tx: float, ty: float) -> str:
+    """``d`` moved by (tx, ty), or None if it has relative commands."""
+    out = []
+    roles = ''
+    i = 0
+    for command, number in PATH_TOKEN.findall(d):
+        if command:
+            if command.upper() != command and command != 'z':
+                return None
+            roles = PATH_PARAMS[command.upper()]
+            i = 0
+            out.append(command)
+            continue
+        if not roles:
+            return None
+        role = roles[i % len(roles)]
+        value = float(number)
+        out.append(repr(value + tx) if role == 'x' else repr(value + ty) if role == 'y' else number)
+        i += 1
+    return ' '.join(out)
+
+
+def _unwrap(group):
+    """Replace ``group`` by its children."""
+    parent = group.getparent()
+    index = parent.index(group)
+    children = list(group)
+    if children:
+        children[-1].tail = group.tail
+    elif group.tail:
+        previous = group.getprevious()
+        if previous is not None:
+            previous.tail = (previous.tail or '') + group.tail
+    parent[index:index + 1] = children
+
+
+class SvgOptimizer:
+    """Shrinks pdf2svg's SVGs for Inkscape, keeping what they draw.
+
+    One optimizer is shared by all pages of a document and counts the pages,
+    bytes before and after and seconds spent for :meth:`stats`.
+    """
+
+    def __init__(self, precision_bits: int = PRECISION_BITS):
+        self.precision_bits = precision_bits
+        self.pages = 0
+        self.bytes_before = 0
+        self.bytes_after = 0
+        self.seconds = 0.0
+        self._lock = threading.Lock()
+
+    def optimize_svg(self, svg_path: Path) -> int:
+        """Rewrite ``svg_path`` optimized. Returns the bytes saved."""
+        svg_path = Path(svg_path)
+        before = svg_path.stat().st_size
+        optimized = self._optimize(str(svg_path), before)
+        if optimized is None:
+            return 0
+        fd, tmp_name = tempfile.mkstemp(dir=svg_path.parent, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(optimized)
+        os.replace(tmp_name, svg_path)
+        return before - len(optimized)
+
+    def optimize_svg_data(self, svg_data: bytes) -> bytes:
+        """``svg_data`` optimized (the same bytes if that does not make it smaller)."""
+        optimized = self._optimize(io.BytesIO(svg_data), len(svg_data))
+        return svg_data if optimized is None else optimized
+
+    def _optimize(self, source, before: int) -> bytes:
+        """The optimized SVG, or None if it is not smaller or cannot be parsed."""
+        started = time.monotonic()
+        try:
+            tree = etree.parse(source, etree.XMLParser(huge_tree=True))
+            self._rewrite(tree.getroot())
+            optimized = etree.tostring(tree, xml_declaration=True, encoding='UTF-8')
+        except (etree.XMLSyntaxError, UnsupportedSvg, ValueError):
+            optimized = None
+        if optimized is not None and len(optimized) >= before:
+            optimized = None
+        with self._lock:
+            self.pages += 1
+            self.bytes_before += before
+            self.bytes_after += before if optimized is None else len(optimized)
+            self.seconds += time.monotonic() - started
+        return optimized
+
+    def _rewrite(self, root):
+        self._merge_symbols(root)
+        referenced = self._references(root)
+        for group in reversed(list(root.iter(SVG_G))):
+            self._flatten_group(group, referenced)
+        for element in root.iter(etree.Element):
+            if element.get('transform') is not None:
+                self._fold_transform(element)
+        for path in list(root.iter(SVG_PATH)):
+            self._merge_strokes(path)
+        self._drop_unused_defs(root)
+        self._round(root)
+
+    def _merge_symbols(self, root):
+        """Point uses of identical symbols at the first of them and drop the others."""
+        canonical = {}
+        renamed = {}
+        for symbol in list(root.iter(SVG_SYMBOL)):
+            key = (tuple(sorted((k, v) for k, v in symbol.attrib.items() if k != 'id')),
+                   b''.join(etree.tostring(child, with_tail=False) for child in symbol))
+            symbol_id = symbol.get('id')
+            if key in canonical and symbol_id:
+                renamed[symbol_id] = canonical[key]
+                symbol.getparent().remove(symbol)
+            elif symbol_id:
+                canonical[key] = symbol_id
+        if not renamed:
+            return
+        for use in root.iter(SVG_USE):
+            for attr in (XLINK_HREF, 'href'):
+                href = use.get(attr)
+                if href and href.startswith('#') and href[1:] in renamed:
+                    use.set(attr, '#' + renamed[href[1:]])
+
+    @staticmethod
+    def _references(root) -> set:
+        """Ids referenced by ``href`` or ``url(#...)`` anywhere under ``root``."""
+        referenced = set()
+        for element in root.iter(etree.Element):
+            for name, value in element.attrib.items():
+                if name in (XLINK_HREF, 'href') and value.startswith('#'):
+                    referenced.add(value[1:])
+                elif 'url(' in value:
+                    referenced.update(REFERENCE.findall(value))
+        return referenced
+
+    @staticmethod
+    def _flatten_group(group, referenced: set):
+        if group.getparent() is None:
+            return
+        attrs = {k: v for k, v in group.attrib.items() if not (k == 'id' and v not in referenced)}
+        children = list(group)
+        only_child = children[0] if len(children) == 1 and isinstance(children[0].tag, str) else None
+        if not attrs:
+            _unwrap(group)
+        elif set(attrs) == {'transform'} and only_child is not None:
+            own = only_child.get('transform')
+            only_child.set('transform', attrs['transform'] + (' ' + own if own else ''))
+            _unwrap(group)
+        elif set(attrs) == {'style'} and only_child is not None:
+            style = _style(group)
+            if not all(name.startswith(INHERITED_PREFIXES) and 'url(' not in value and
+                       only_child.get(name) is None for name, value in style.items()):
+                return
+            merged = {name: value for name, value in style.items()}
+            merged.update(_style(only_child))
+            only_child.set('style', ';'.join(f'{name}:{value}' for name, value in merged.items()) + ';')
+            _unwrap(group)
+
+    @staticmethod
+    def _fold_transform(element):
+        """Drop an identity transform, or fold a translation into the element's coordinates."""
+        try:
+            a, b, c, d, e, f = parse_transform(element.get('transform'))
+        except UnsupportedSvg:
+            return
+        if (a, b, c, d) != (1, 0, 0, 1):
+            return
+        if (e, f) == (0, 0):
+            del element.attrib['transform']
+            return
+        if any('url(' in value for value in element.attrib.values()):
+            return  # Clips, masks and gradients are in the element's own coordinates
+        if element.tag == SVG_PATH:
+            moved = _translate_path(element.get('d', ''), e, f)
+            if moved is None:
+                return
+            element.set('d', moved)
+        elif element.tag in POSITIONED_TAGS:
+            element.set('x', repr(float(element.get('x', 0)) + e))
+            element.set('y', repr(float(element.get('y', 0)) + f))
+        else:
+            return
+        del element.attrib['transform']
+
+    @staticmethod
+    def _merge_strokes(path):
+        """Append the paths following ``path`` that are stroked alike and not filled to it."""
+        if path.getparent() is None or path.get('id') is not None:
+            return
+        style = _style(path)
+        fill = style.get('fill', path.get('fill'))
+        if fill != 'none' or style.get('stroke-dasharray', path.get('stroke-dasharray', 'none')) != 'none' or \
+                any(float(style.get(name, path.get(name, 1))) < 1 for name in ('opacity', 'stroke-opacity')) or \
+                any('url(' in value for value in path.attrib.values()):
+            return
+        attrs = {k: v for k, v in path.attrib.items() if k != 'd'}
+        parts = [path.get('d', '').strip()]
+        following = path.getnext()
+        while following is not None and following.tag == SVG_PATH and \
+                {k: v for k, v in following.attrib.items() if k != 'd'} == attrs and \
+                following.get('d', '').lstrip().startswith('M'):
+            parts.append(following.get('d').strip())
+            path.tail = following.tail
+            path.getparent().remove(following)
+            following = path.getnext()
+        if len(parts) > 1:
+            path.set('d', ' '.join(parts))
+
+    def _drop_unused_defs(self, root):
+        """Remove definitions nothing refers to, until every one left is used."""
+        while True:
+            referenced = self._references(root)
+            unused = [element for defs in root.iter(SVG_DEFS) for element in defs
+                      if isinstance(element.tag, str) and element.get('id') and element.get('id') not in referenced]
+            if not unused:
+                return
+            for element in unused:
+                if element.getparent() is not None:
+                    element.getparent().remove(element)
+
+    def _round(self, root):
+        """Round coordinates to the page's precision at the scale they are drawn."""
+        box = [float(v) for v in NUMBER.findall(root.get('viewBox', ''))]
+        if len(box) != 4 or max(box[2], box[3]) <= 0:
+            return
+        extent = max(box[2], box[3])
+        tolerance = extent / (1 << self.precision_bits)
+        defs = [element for element in root if element.tag == SVG_DEFS]
+        max_scale = 1.0
+        for element in root:
+            if element.tag != SVG_DEFS:
+                max_scale = max(max_scale, self._round_element(element, 1.0, tolerance))
+        # Definitions are drawn at the scale of whatever uses them
+        for element in defs:
+            self._round_element(element, max_scale, tolerance)
+
+    def _round_element(self, element, scale: float, tolerance: float) -> float:
+        """Round ``element`` and its descendants. Returns the largest scale among them."""
+        if not isinstance(element.tag, str):
+            return scale
+        transform = element.get('transform')
+        if transform is not None:
+            try:
+                matrix = parse_transform(transform)
+            except UnsupportedSvg:
+                return scale
+            match = re.fullmatch(r'\s*matrix\(([^)]*)\)\s*', transform)
+            if match:
+                # The translation is in the parent's coordinates, the linear part is left exact
+                values = NUMBER.findall(match.group(1))
+                if len(values) == 6:
+                    outer = _decimals(scale, tolerance)
+                    values[4:] = (_format(float(v), outer) for v in values[4:])
+                    element.set('transform', f"matrix({','.join(values)})")
+            scale *= _norm(matrix)
+        decimals = _decimals(scale, tolerance)
+        if element.tag == SVG_PATH and element.get('d'):
+            element.set('d', ' '.join(NUMBER.sub(lambda m: _format(float(m.group()), decimals),
+                                                 element.get('d')).split()))
+        for name in GEOMETRY_ATTRS:
+            value = element.get(name)
+            if value is not None and NUMBER.fullmatch(value.strip()):
+                element.set(name, _format(float(value), decimals))
+        largest = scale
+        for child in element:
+            largest = max(largest, self._round_element(child, scale, tolerance))
+        return largest
+
+    def stats(self) -> dict:
+        return {
+            'pages': self.pages,
+            'bytes_before': self.bytes_before,
+            'bytes_after': self.bytes_after,
+            'seconds': round(self.seconds, 4),
+        }
@@ -0,0 +1,181 @@
+"""Shared slide template extraction for pdf2ppt.
+
+Beamer and Touying themes paint the same background, header, footer and logo
+at the start of every page. This module finds the longest run of content
+stream operators that most pages start with, so it can be converted once and
+placed on the slide layout while each slide's EMF holds only its own content.
+
+The split happens at the PDF level: a derived PDF gets one extra page with
+the shared operators, and on the pages that share them the operators are
+kept for their effect on the graphics state but stop painting anything.
+"""
+
+import hashlib
+import math
+from pathlib import Path
+
+from pypdf import PdfReader, PdfWriter
+from pypdf.generic import ContentStream, NameObject
+
+from .fingerprint import _object_digest
+
+RESOURCE_CATEGORIES = ('/Font', '/XObject', '/ExtGState', '/ColorSpace', '/Pattern', '/Shading', '/Properties')
+PATH_PAINT_OPS = {b'S', b's', b'f', b'F', b'f*', b'B', b'B*', b'b', b'b*'}
+TEXT_SHOW_OPS = {b'Tj', b'TJ'}
+OBJECT_PAINT_OPS = {b'Do', b'sh', b'INLINE IMAGE'}
+PAINT_OPS = PATH_PAINT_OPS | TEXT_SHOW_OPS | OBJECT_PAINT_OPS | {b"'", b'"'}
+BOUNDARY_OPS = PAINT_OPS | {b'Q', b'ET', b'EMC'}
+# Copied from a sharing page to the template page
+PAGE_GEOMETRY = ('/Resources', '/MediaBox', '/CropBox', '/Rotate', '/UserUnit')
+# Graphics state operators, by the part of the state they set. Runs of them are
+# hashed by their net effect, since producers emit redundant color changes.
+STATE_OPS = {
+    b'rg': 'fill', b'g': 'fill', b'k': 'fill', b'cs': 'fill', b'sc': 'fill+', b'scn': 'fill+',
+    b'RG': 'stroke', b'G': 'stroke', b'K': 'stroke', b'CS': 'stroke', b'SC': 'stroke+', b'SCN': 'stroke+',
+    b'w': 'w', b'J': 'J', b'j': 'j', b'M': 'M', b'd': 'd', b'ri': 'ri', b'i': 'i',
+}
+# The template must be shared by at least this fraction of the pages
+MIN_SHARE = 0.5
+
+
+class TemplateSplit:
+    """A shared template found in a PDF.
+
+    ``path`` is the derived PDF to render instead of the original: its page
+    ``template_page`` (one past the last original page) holds the template,
+    and the original ``pages`` that share it paint only their own content.
+    """
+
+    def __init__(self, path: Path, template_page: int, pages: set, operators: int):
+        self.path = path
+        self.template_page = template_page
+        self.pages = pages
+        self.operators = operators
+
+
+def _resource_tables(page) -> list:
+    resources = page.get('/Resources')
+    if resources is None:
+        return []
+    resources = resources.get_object()
+    return [resources[category].get_object() for category in RESOURCE_CATEGORIES if category in resources]
+
+
+def _operator_key(operands, operator: bytes, tables: list, memo: dict) -> bytes:
+    """Hashable form of one operation, with resource names replaced by the resources' digests."""
+    parts = [operator]
+    for operand in operands if isinstance(operands, list) else [operands]:
+        if isinstance(operand, NameObject):
+            table = next((t for t in tables if operand in t), None)
+            if table is not None:
+                parts.append(_object_digest(table.raw_get(operand), memo))
+                continue
+        parts.append(repr(operand).encode('utf-8', 'replace'))
+    return b'\0'.join(parts)
+
+
+def _boundaries(page, pdf_reader: PdfReader, memo: dict) -> tuple:
+    """Parse a page's content. Returns (operations, {prefix digest: (length, painted ops)}).
+
+    Only prefixes ending after a painting operator at the top level (no open
+    ``q``, text object or marked content) are candidates, so the rest of the
+    page starts from a well-defined state.
+    """
+    contents = page.get_contents()
+    if contents is None:
+        return [], {}
+    operations = ContentStream(contents, pdf_reader).operations
+    tables = _resource_tables(page)
+    digest = hashlib.sha256()
+    depth = in_text = marked = painted = 0
+    pending = {}
+    boundaries = {}
+    for i, (operands, operator) in enumerate(operations):
+        key = _operator_key(operands, operator, tables, memo)
+        family = STATE_OPS.get(operator)
+        if family is not None:
+            if family.endswith('+'):
+                pending.setdefault(family[:-1], []).append(key)
+            else:
+                pending[family] = [key]
+            continue
+        for part in sorted(pending):
+            digest.update(b'\n'.join(pending[part]) + b'\n')
+        pending.clear()
+        digest.update(key + b'\n')
+        if operator == b'q':
+            depth += 1
+        elif operator == b'Q':
+            depth -= 1
+        elif operator == b'BT':
+            in_text = 1
+        elif operator == b'ET':
+            in_text = 0
+        elif operator in (b'BMC', b'BDC'):
+            marked += 1
+        elif operator == b'EMC':
+            marked -= 1
+        if operator in PAINT_OPS:
+            painted += 1
+        if painted and depth == 0 and not in_text and marked == 0 and operator in BOUNDARY_OPS:
+            boundaries[digest.hexdigest()] = (i + 1, painted)
+    return operations, boundaries
+
+
+def _silence(operations: list) -> list:
+    """The same operations with every painting operator removed or made a no-op."""
+    silent = []
+    for operands, operator in operations:
+        if operator in PATH_PAINT_OPS:
+            silent.append(([], b'n'))
+        elif operator == b"'":
+            silent.append(([], b'T*'))
+        elif operator == b'"':
+            silent.extend([([operands[0]], b'Tw'), ([operands[1]], b'Tc'), ([], b'T*')])
+        elif operator not in TEXT_SHOW_OPS and operator not in OBJECT_PAINT_OPS:
+            silent.append((operands, operator))
+    return silent
+
+
+def extract_template(pdf_reader: PdfReader, pages: list, dest: Path, min_share: float = MIN_SHARE):
+    """Write a derived PDF with the pages' shared template split out to ``dest``.
+
+    Returns a :class:`TemplateSplit`, or None if no template is shared by at
+    least ``min_share`` of the pages (and at least two of them).
+    """
+    memo = {}
+    parsed = {page: _boundaries(pdf_reader.pages[page - 1], pdf_reader, memo) for page in pages}
+    # prefix digest -> (painted ops, {page: prefix length in that page's operations})
+    sharing = {}
+    for page, (_, boundaries) in parsed.items():
+        for key, (length, painted) in boundaries.items():
+            sharing.setdefault(key, (painted, {}))[1][page] = length
+    needed = max(2, math.ceil(min_share * len(pages)))
+    candidates = [(painted * len(lengths), lengths) for painted, lengths in sharing.values()
+                  if len(lengths) >= needed]
+    if not candidates:
+        return None
+    _, lengths = max(candidates, key=lambda c: c[0])
+    shared = sorted(lengths)
+
+    writer = PdfWriter()
+    for page in pdf_reader.pages:
+        writer.add_page(page)
+    for page in shared:
+        operations, length = parsed[page][0], lengths[page]
+        content = ContentStream(None, pdf_reader)
+        content.operations = _silence(operations[:length]) + operations[length:]
+        writer.pages[page - 1].replace_contents(content)
+    # A fresh page: adding the same source page twice would share one copy
+    first = writer.pages[shared[0] - 1]
+    template = writer.add_blank_page(first.mediabox.width, first.mediabox.height)
+    for key in PAGE_GEOMETRY:
+        if key in first:
+            template[NameObject(key)] = first[key]
+    content = ContentStream(None, pdf_reader)
+    content.operations = parsed[shared[0]][0][:lengths[shared[0]]]
+    template.replace_contents(content)
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    with open(dest, 'wb') as f:
+        writer.write(f)
+    return TemplateSplit(Path(dest), len(pdf_reader.pages) + 1, set(shared), lengths[shared[0]])
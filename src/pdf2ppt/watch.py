@@ -0,0 +1,217 @@
+"""Watch mode for pdf2ppt.
+
+While an author rebuilds a Beamer or Typst PDF, the presentation is kept up
+to date by patching it instead of converting the whole deck again. Every
+slide is named after the fingerprint of the page it shows (see
+:mod:`pdf2ppt.fingerprint`), so after a rebuild only pages with new
+fingerprints are converted; slides of unchanged pages are kept or moved, and
+slides of pages that are gone are deleted.
+"""
+
+import io
+import os
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from pptx import Presentation
+from pptx.enum.shapes import MSO_SHAPE_TYPE
+from pptx.util import Pt
+from pypdf import PdfReader
+
+from . import (TEMPLATE_SHAPE_NAME, AdaptiveLimiter, InkscapePool, FileCache, ImageOptimizer, PagePolicy,
+               add_emf_slide, clean_tmp, console, get_tmp_dir, new_presentation, optimize_images, optimize_svgs,
+               parse_page_range, pdf2svg, record_conversion, slide_size, svg2emf)
+from .svgopt import SvgOptimizer
+from .fingerprint import fingerprint_pages
+
+SLIDE_NAME_PREFIX = 'pdf2ppt:'
+DEFAULT_WATCH_INTERVAL = 1.0
+
+
+def slide_fingerprint(slide) -> str:
+    """Fingerprint of the page a slide shows, or None if pdf2ppt did not name it."""
+    name = slide.name
+    return name[len(SLIDE_NAME_PREFIX):] if name.startswith(SLIDE_NAME_PREFIX) else None
+
+
+def _picture_blob(slide) -> bytes:
+    for shape in slide.shapes:
+        if shape.shape_type == MSO_SHAPE_TYPE.PICTURE:
+            return shape.image.blob
+    return None
+
+
+def open_presentation(pdf_reader: PdfReader, ppt_path: Path) -> Presentation:
+    """The presentation at ``ppt_path`` if it can be patched for this PDF, else a new one.
+
+    Presentations of another slide size or with a template layer (see
+    ``--template``) are replaced.
+    """
+    if not ppt_path.exists():
+        return new_presentation(pdf_reader)
+    try:
+        prs = Presentation(ppt_path)
+    except Exception:
+        return new_presentation(pdf_reader)
+    width, height = slide_size(pdf_reader)
+    if (prs.slide_width, prs.slide_height) != (Pt(width), Pt(height)) or \
+            any(shape.name == TEMPLATE_SHAPE_NAME for shape in prs.slide_layouts[6].shapes):
+        return new_presentation(pdf_reader)
+    return prs
+
+
+def patch_presentation(prs: Presentation, fingerprints: list, emf_paths: dict) -> dict:
+    """Make the slides of ``prs`` show the pages with ``fingerprints``, in order.
+
+    A slide already showing a page is kept and moved into place. Other pages
+    get a new slide with the EMF in ``emf_paths`` for their fingerprint, or a
+    copy of the picture of a slide showing the same page. Remaining slides
+    are deleted. Returns counts of kept, added and removed slides.
+    """
+    slides = prs.slides
+    sld_id_lst = slides._sldIdLst
+    old = {}
+    blobs = {}
+    for slide, sld_id in zip(slides, list(sld_id_lst)):
+        fingerprint = slide_fingerprint(slide)
+        old.setdefault(fingerprint, []).append(sld_id)
+        if fingerprint is not None and fingerprint not in blobs:
+            blobs[fingerprint] = _picture_blob(slide)
+    order = []
+    kept = added = 0
+    for fingerprint in fingerprints:
+        if old.get(fingerprint):
+            order.append(old[fingerprint].pop(0))
+            kept += 1
+            continue
+        emf_path = emf_paths.get(fingerprint)
+        slide = add_emf_slide(prs, emf_path if emf_path is not None else io.BytesIO(blobs[fingerprint]))
+        slide.name = SLIDE_NAME_PREFIX + fingerprint
+        order.append(sld_id_lst[-1])
+        added += 1
+    removed = 0
+    for sld_ids in old.values():
+        for sld_id in sld_ids:
+            rId = sld_id.rId
+            sld_id_lst.remove(sld_id)
+            prs.part.drop_rel(rId)
+            removed += 1
+    for sld_id in order:
+        sld_id_lst.remove(sld_id)
+        sld_id_lst.append(sld_id)
+    return {'kept': kept, 'added': added, 'removed': removed}
+
+
+def update_presentation(pdf_path: Path, ppt_path: Path, pages: str, pdf2svg_path: str, inkscape_path: str,
+                        parallel: int = 1, no_check: bool = False, pool: InkscapePool = None,
+                        cache: FileCache = None, optimizer: ImageOptimizer = None, work_dir: Path = None,
+                        keep_tmp: bool = False, progress_callback=None, policy: PagePolicy = None,
+                        limiter: AdaptiveLimiter = None, svg_optimizer: SvgOptimizer = None) -> tuple:
+    """Bring ``ppt_path`` up to date with ``pdf_path``, converting only pages no slide shows yet.
+
+    ``pages`` is a page range as for ``--pages`` (None for all pages);
+    Inkscape timeouts and retries follow ``policy``, its concurrency ``limiter``;
+    with an ``svg_optimizer`` the SVGs are optimized first (see :func:`optimize_svgs`).
+    Returns (success, stats): stats counts converted pages and kept, added and
+    removed slides and lists pages with filters; on failure it names the
+    failed ``stage``.
+    """
+    pdf_reader = PdfReader(pdf_path)
+    pages = parse_page_range(pages, len(pdf_reader.pages))
+    fingerprints = fingerprint_pages(pdf_reader, pages)
+    prs = open_presentation(pdf_reader, ppt_path)
+    shown = {slide_fingerprint(slide) for slide in prs.slides}
+    # The first page with each fingerprint that no slide shows yet
+    missing = {}
+    for page in pages:
+        if fingerprints[page] not in shown:
+            missing.setdefault(fingerprints[page], page)
+    convert_pages = sorted(missing.values())
+    pages_with_filters = []
+    try:
+        if convert_pages:
+            if not pdf2svg(pdf_path, pdf2svg_path, False, convert_pages, parallel, work_dir, progress_callback):
+                return (False, {'stage': 'pdf2svg'})
+            if optimizer is not None:
+                optimize_images(pdf_reader, pdf_path, convert_pages, optimizer, parallel, work_dir)
+            if svg_optimizer is not None:
+                optimize_svgs(pdf_path, convert_pages, svg_optimizer, parallel, work_dir, progress_callback)
+            success, pages_with_filters = svg2emf(pdf_reader, pdf_path, inkscape_path, convert_pages, False,
+                                                  no_check, parallel, pool, cache, work_dir, progress_callback,
+                                                  policy, limiter)
+            if not success:
+                return (False, {'stage': 'svg2emf'})
+        tmp_dir = get_tmp_dir(pdf_path, work_dir)
+        emf_paths = {fingerprint: tmp_dir / f'{pdf_path.stem}_{page}.emf' for fingerprint, page in missing.items()}
+        stats = patch_presentation(prs, [fingerprints[page] for page in pages], emf_paths)
+        # Replace the file in one step, so a viewer never sees a half-written presentation
+        fd, tmp_name = tempfile.mkstemp(dir=ppt_path.parent, suffix='.pptx.tmp')
+        os.close(fd)
+        try:
+            prs.save(tmp_name)
+            os.replace(tmp_name, ppt_path)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+        record_conversion(pdf_path, ppt_path)
+    finally:
+        if not keep_tmp:
+            clean_tmp(pdf_path, False, work_dir)
+    filter_sources = {fingerprints[page] for page in pages_with_filters}
+    stats.update(pages=len(pages), converted=len(convert_pages),
+                 pages_with_filters=[page for page in pages if fingerprints[page] in filter_sources])
+    return (True, stats)
+
+
+def _file_state(path: Path) -> tuple:
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def watch_pdf(pdf_path: Path, ppt_path: Path, pages: str, pdf2svg_path: str, inkscape_path: str,
+              parallel: int = 1, no_check: bool = False, pool: InkscapePool = None, cache: FileCache = None,
+              optimizer: ImageOptimizer = None, work_dir: Path = None, keep_tmp: bool = False,
+              progress_callback=None, interval: float = DEFAULT_WATCH_INTERVAL, policy: PagePolicy = None,
+              limiter: AdaptiveLimiter = None, svg_optimizer: SvgOptimizer = None):
+    """Update ``ppt_path`` now and after every change to ``pdf_path``, until interrupted.
+
+    The PDF is polled every ``interval`` seconds and only read once it has
+    stopped changing for one interval, so a half-written rebuild is skipped.
+    """
+    console.print(f"[bold blue]👀 Watching[/bold blue] {pdf_path.name} → {ppt_path.name} "
+                  f"[dim](Ctrl+C to stop)[/dim]")
+    last = None
+    try:
+        while True:
+            state = _file_state(pdf_path)
+            if state is not None and state != last:
+                time.sleep(interval)
+                if _file_state(pdf_path) != state:
+                    continue  # Still being written
+                last = state
+                started = time.monotonic()
+                try:
+                    success, stats = update_presentation(pdf_path, ppt_path, pages, pdf2svg_path,
+                        inkscape_path, parallel, no_check, pool, cache, optimizer, work_dir, keep_tmp,
+                        progress_callback, policy, limiter, svg_optimizer)
+                except Exception as e:
+                    success, stats = False, {'stage': f'reading the PDF ({e})'}
+                clock = datetime.now().strftime('%H:%M:%S')
+                if not success:
+                    console.print(f"[dim]{clock}[/dim] [bold red]❌ Update failed[/bold red] in {stats['stage']}; "
+                                  f"waiting for the next change")
+                    continue
+                console.print(f"[dim]{clock}[/dim] [bold green]✅ Updated[/bold green] {ppt_path.name} in "
+                              f"{time.monotonic() - started:.1f}s: {stats['converted']} pages converted, "
+                              f"{stats['kept']} slides kept, {stats['added']} added, {stats['removed']} removed")
+                if stats['pages_with_filters']:
+                    console.print(f"[bold yellow]⚠️  Warning:[/bold yellow] Pages {stats['pages_with_filters']} "
+                                  f"may have transparency issues.")
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        console.print("\n[dim]Stopped watching.[/dim]")
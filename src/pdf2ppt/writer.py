@@ -0,0 +1,214 @@
+"""Low-memory PPTX writing for pdf2ppt.
+
+python-pptx keeps every part of a presentation in memory until ``save``, so
+a 1000-slide deck holds all of its EMFs at once and then the zip buffer on
+top. :class:`StreamingPptxWriter` takes over the image parts of a skeleton
+presentation built by python-pptx: each image is hashed and copied into the
+output zip straight from its file in chunks, and every slide is written and
+emptied as soon as it has been added. What stays in memory per slide is its
+part name and relationships, not its content.
+
+The slides and images are still created by python-pptx and identical images
+share one part by SHA-1, so every part of the result is the same as
+``Presentation.save`` would write; only the order of the zip entries differs.
+"""
+
+import hashlib
+import os
+import zipfile
+from pathlib import Path
+
+from pptx.opc.oxml import serialize_part_xml
+from pptx.opc.packuri import CONTENT_TYPES_URI, PACKAGE_URI, PackURI
+from pptx.opc.serialized import _ContentTypesItem
+from pptx.oxml.slide import CT_Slide
+from pptx.parts.image import Image, ImagePart
+
+# Bytes read from and copied to the zip at a time
+COPY_CHUNK_SIZE = 1 << 20
+# Enough of an image to read its format, size and resolution (JPEGs with long metadata read more)
+IMAGE_HEADER_BYTES = 1 << 16
+
+
+class StreamedImagePart(ImagePart):
+    """An image part whose data stays in its file (or buffer) until the writer copies it.
+
+    Only its SHA-1 and native size are kept once it has been written.
+    """
+
+    def __init__(self, partname: PackURI, package, source, sha1: str, size: int, image: Image):
+        super().__init__(partname, image.content_type, package, image.blob, image.filename)
+        self.source = source
+        self.size = size
+        self._sha1 = sha1
+        self._size = super()._native_size
+
+    @property
+    def sha1(self) -> str:
+        return self._sha1
+
+    @property
+    def _native_size(self) -> tuple:
+        return self._size
+
+    def release(self):
+        """Drop the header and the source once the image is in the zip."""
+        self._blob = b''
+        self.source = None
+
+
+def _chunks(source):
+    """Yield the bytes of a path or a file object (read from its start) in chunks."""
+    if hasattr(source, 'read'):
+        source.seek(0)
+        yield from iter(lambda: source.read(COPY_CHUNK_SIZE), b'')
+        return
+    with open(source, 'rb') as f:
+        yield from iter(lambda: f.read(COPY_CHUNK_SIZE), b'')
+
+
+def _header(source) -> bytes:
+    if hasattr(source, 'read'):
+        source.seek(0)
+        return source.read(IMAGE_HEADER_BYTES)
+    with open(source, 'rb') as f:
+        return f.read(IMAGE_HEADER_BYTES)
+
+
+class PptxWriter:
+    """Save the presentation ``prs`` to ``ppt_path`` with python-pptx on :meth:`close`.
+
+    Call :meth:`flush` after adding slides (a no-op here) and :meth:`close`
+    once the presentation is complete. Used as a context manager, a writer
+    left without :meth:`close`, by an error or an early return, is aborted.
+    """
+
+    def __init__(self, prs, ppt_path: Path):
+        self.prs = prs
+        self.ppt_path = Path(ppt_path)
+        self.closed = False
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.prs.save(self.ppt_path)
+        self.closed = True
+
+    def abort(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if not self.closed:
+            self.abort()
+
+
+class StreamingPptxWriter(PptxWriter):
+    """Write the presentation ``prs`` to ``ppt_path`` while its slides are added.
+
+    Create the writer before adding anything that has an image and call
+    :meth:`flush` after adding slides (or a picture to a layout): the new
+    slides and images go into the file, so the sources of their images can
+    be deleted afterwards. :meth:`close` writes the remaining parts;
+    :meth:`abort` removes the half-written file.
+    """
+
+    def __init__(self, prs, ppt_path: Path):
+        super().__init__(prs, ppt_path)
+        self.package = prs.part.package
+        self.images = 0
+        self.image_bytes = 0
+        self.reused = 0
+        self._images = {}  # SHA-1 → image part
+        self._pending = []
+        self._written = set()
+        self._slides_written = 0
+        self._next_image = self.package.next_image_partname('tmp').idx
+        for part in self.package.iter_parts():
+            if isinstance(part, ImagePart):
+                self._images[part.sha1] = part
+        # Every picture added from now on gets a streamed part instead of one holding its bytes
+        self.package.get_or_add_image_part = self._get_or_add_image_part
+        self._zip = zipfile.ZipFile(self.ppt_path, 'w', compression=zipfile.ZIP_DEFLATED)
+
+    def _get_or_add_image_part(self, image_file) -> ImagePart:
+        digest = hashlib.sha1()
+        size = 0
+        for chunk in _chunks(image_file):
+            digest.update(chunk)
+            size += len(chunk)
+        sha1 = digest.hexdigest()
+        part = self._images.get(sha1)
+        if part is not None:
+            self.reused += 1
+            return part
+        filename = None if hasattr(image_file, 'read') else os.path.basename(image_file)
+        image = Image.from_blob(_header(image_file), filename)
+        try:
+            image.size
+        except (OSError, SyntaxError, ValueError):
+            # The header was not enough; read the whole image once
+            image = Image.from_blob(b''.join(_chunks(image_file)), filename)
+        partname = PackURI(f'/ppt/media/image{self._next_image}.{image.ext}')
+        self._next_image += 1
+        part = self._images[sha1] = StreamedImagePart(partname, self.package, image_file, sha1, size, image)
+        self._pending.append(part)
+        return part
+
+    def _write(self, partname: PackURI, blob: bytes):
+        self._zip.writestr(partname.membername, blob)
+        self._written.add(partname)
+
+    def _write_image(self, part: StreamedImagePart):
+        with self._zip.open(part.partname.membername, 'w', force_zip64=part.size >= zipfile.ZIP64_LIMIT) as f:
+            for chunk in _chunks(part.source):
+                f.write(chunk)
+        self._written.add(part.partname)
+        self.images += 1
+        self.image_bytes += part.size
+        part.release()
+
+    def flush(self):
+        """Write the images and slides added since the last flush."""
+        for part in self._pending:
+            self._write_image(part)
+        self._pending.clear()
+        sld_ids = self.prs.slides._sldIdLst.sldId_lst
+        for sld_id in sld_ids[self._slides_written:]:
+            slide_part = self.prs.part.related_part(sld_id.rId)
+            self._write(slide_part.partname, slide_part.blob)
+            self._write(slide_part.partname.rels_uri, slide_part.rels.xml)
+            # The part stays for the presentation's relationships and content types, without its shapes
+            slide_part._element = CT_Slide.new()
+        self._slides_written = len(sld_ids)
+
+    def close(self):
+        """Flush and write the remaining parts, the relationships and the content types."""
+        self.flush()
+        parts = tuple(self.package.iter_parts())
+        self._zip.writestr(CONTENT_TYPES_URI.membername, serialize_part_xml(_ContentTypesItem.xml_for(parts)))
+        self._zip.writestr(PACKAGE_URI.rels_uri.membername, self.package._rels.xml)
+        for part in parts:
+            if part.partname in self._written:
+                continue
+            self._write(part.partname, part.blob)
+            if part._rels:
+                self._write(part.partname.rels_uri, part.rels.xml)
+        self._zip.close()
+        self.closed = True
+
+    def abort(self):
+        """Close and delete the half-written file."""
+        self._zip.close()
+        self.ppt_path.unlink(missing_ok=True)
+
+    def stats(self) -> dict:
+        return {
+            'slides': self._slides_written,
+            'images': self.images,
+            'image_bytes': self.image_bytes,
+            'reused': self.reused,
+        }
@@ -70,19 +70,23 @@ echo ""
 
 # Test 7: API Conversion
 echo "Test 7: API Conversion"
-curl -X POST http://127.0.0.1:8889/api/convert \
+EVENTS=$(curl -s -X POST http://127.0.0.1:8889/api/convert \
   -F "file=@demo/latex-demo.pdf" \
-  -F 'options={"pages":"1","parallel":1}' \
-  2>/dev/null | grep -q "completed"
+  -F 'options={"pages":"1","parallel":1}')
+echo "$EVENTS" | grep -q '"status": "completed"'
 test_result $? "API conversion works"
 echo ""
 
 # Test 8: Download Endpoint
 echo "Test 8: Download Endpoint"
-sleep 2
-curl -s http://127.0.0.1:8889/api/download/latex-demo.pptx -o /tmp/api-download.pptx
-[ -f /tmp/api-download.pptx ] && [ -s /tmp/api-download.pptx ]
-test_result $? "File download works"
+# Outputs are stored under the job id; the completed event names the URL
+DOWNLOAD_URL=$(echo "$EVENTS" | grep -o '"download_url": "[^"]*"' | tail -1 | cut -d'"' -f4)
+rm -f /tmp/api-download.pptx
+DOWNLOAD_STATUS=0
+{ [ -n "$DOWNLOAD_URL" ] && curl -sf "http://127.0.0.1:8889$DOWNLOAD_URL" -o /tmp/api-download.pptx \
+  && python -c "import zipfile, sys; sys.exit(zipfile.ZipFile('/tmp/api-download.pptx').testzip() is not None)"; } \
+  || DOWNLOAD_STATUS=1
+test_result $DOWNLOAD_STATUS "File download works"
 echo ""
 
 # Test 9: MCP Server
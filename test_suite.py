@@ -28,7 +28,21 @@ def test_cli():
     assert Path('/tmp/cli-test.pptx').exists(), "Output file not created"
     print("  ✅ CLI conversion passed")
     
+    # Low-memory output must hold the same parts as a prs.save of the same deck
+    result = subprocess.run([
+        'pdf2ppt', 'demo/latex-demo.pdf', '/tmp/cli-test-low-memory.pptx',
+        '--force', '--pages', '1-2', '--low-memory'
+    ], capture_output=True, text=True)
+    assert result.returncode == 0, f"Low-memory conversion failed: {result.stderr}"
+    from pptx import Presentation
+    def part_names(path):
+        return sorted(str(part.partname) for part in Presentation(path).part.package.iter_parts())
+    assert part_names('/tmp/cli-test-low-memory.pptx') == part_names('/tmp/cli-test.pptx'), \
+        "Low-memory output parts differ"
+    print("  ✅ Low-memory conversion passed")
+    
     Path('/tmp/cli-test.pptx').unlink()
+    Path('/tmp/cli-test-low-memory.pptx').unlink()
     print("✅ CLI tests passed\n")
 
 
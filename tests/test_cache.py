@@ -0,0 +1,83 @@
+"""Tests for the content-addressed file cache and the tool probe cache."""
+
+import json
+import os
+import time
+
+from pdf2ppt.cache import PROBE_FILE, FileCache, probe_tool
+
+
+def age(cache: FileCache, key: str, seconds: float):
+    then = time.time() - seconds
+    os.utime(cache._entry(key), (then, then))
+
+
+def test_get_and_put(tmp_path):
+    cache = FileCache(tmp_path, max_bytes=1 << 20, namespace='emf:1', suffix='.emf')
+    src = tmp_path / 'page.svg'
+    src.write_bytes(b'<svg/>')
+    key = cache.key(src)
+    assert key == cache.data_key(b'<svg/>')
+    assert not cache.get(key, tmp_path / 'out.emf')
+    cache.put(key, src)
+    assert cache.get(key, tmp_path / 'out.emf')
+    assert (tmp_path / 'out.emf').read_bytes() == b'<svg/>'
+    assert cache.get_data(key) == b'<svg/>'
+    assert cache._entry(key).name.endswith('.emf')
+    assert cache.stats() == {'hits': 2, 'misses': 1, 'hit_rate': 2 / 3, 'stores': 1, 'evictions': 0}
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = FileCache(tmp_path, max_bytes=250)
+    for name, seconds in (('a', 30), ('b', 20)):
+        cache.put_data(name * 64, b'x' * 100)
+        age(cache, name * 64, seconds)
+    # Reading a makes b the least recently used
+    assert cache.get_data('a' * 64) is not None
+    cache.put_data('c' * 64, b'x' * 100)
+    assert cache.get_data('b' * 64) is None
+    assert cache.get_data('a' * 64) is not None and cache.get_data('c' * 64) is not None
+    assert cache.stats()['evictions'] == 1
+    # A second instance (another process) sees the same entries and budget
+    other = FileCache(tmp_path, max_bytes=250)
+    other.put_data('d' * 64, b'x' * 100)
+    assert sum(other.get_data(k * 64) is not None for k in 'acd') == 2
+    assert other.get_data('d' * 64) is not None
+
+
+def test_namespaces_are_isolated(tmp_path):
+    old = FileCache(tmp_path, max_bytes=1 << 20, namespace='emf:1.3.0:inkscape-a')
+    new = FileCache(tmp_path, max_bytes=1 << 20, namespace='emf:1.3.1:inkscape-a')
+    old.put_data(old.data_key(b'page'), b'old output')
+    assert old.data_key(b'page') != new.data_key(b'page')
+    assert old.text_key('a', 'b') != new.text_key('a', 'b')
+    assert new.get_data(new.data_key(b'page')) is None
+    assert old.get_data(old.data_key(b'page')) == b'old output'
+    # Parts are separated, so they cannot run together
+    assert old.text_key('ab', 'c') != old.text_key('a', 'bc')
+    assert old.name == 'emf'
+
+
+def test_probe_cache(tmp_path):
+    runs = tmp_path / 'runs'
+    tool = tmp_path / 'tool'
+    tool.write_text(f'#!/bin/sh\necho run >> {runs}\necho "Tool 1.0"\n')
+    tool.chmod(0o755)
+    cache_dir = tmp_path / 'cache'
+    probe = probe_tool(str(tool), cache_dir=cache_dir)
+    assert probe == {'found': True, 'path': str(tool.resolve()), 'version': 'Tool 1.0'}
+    assert probe_tool(str(tool), cache_dir=cache_dir) == probe
+    assert runs.read_text().count('run') == 1
+    # Another version (size or mtime) is probed again and replaces the old entry
+    tool.write_text(f'#!/bin/sh\necho run >> {runs}\necho "Tool 2.0 (new)"\n')
+    assert probe_tool(str(tool), cache_dir=cache_dir)['version'] == 'Tool 2.0 (new)'
+    assert runs.read_text().count('run') == 2
+    assert len(json.loads((cache_dir / PROBE_FILE).read_text())) == 1
+    # Other arguments are a separate probe, kept next to the first
+    probe_tool(str(tool), ('--help',), cache_dir=cache_dir)
+    probe_tool(str(tool), cache_dir=cache_dir)
+    assert runs.read_text().count('run') == 3
+    assert len(json.loads((cache_dir / PROBE_FILE).read_text())) == 2
+    # Missing tools are reported and not remembered
+    assert probe_tool(str(tmp_path / 'missing'), cache_dir=cache_dir)['found'] is False
+    assert len(json.loads((cache_dir / PROBE_FILE).read_text())) == 2
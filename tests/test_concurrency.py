@@ -0,0 +1,117 @@
+"""Tests for the adaptive concurrency limiter and child process limits."""
+
+import subprocess
+import threading
+
+import pytest
+
+from pdf2ppt import concurrency
+from pdf2ppt.concurrency import AdaptiveLimiter, limited_command, set_child_limits
+
+PLENTY = 64 << 30  # Free memory bytes
+
+
+def limiter(limit: int, **kwargs) -> AdaptiveLimiter:
+    adaptive = AdaptiveLimiter(min_limit=1, max_limit=8, min_free_mb=512, **kwargs)
+    adaptive.limit = adaptive.peak = limit
+    return adaptive
+
+
+def test_memory_pressure_halves():
+    adaptive = limiter(6)
+    assert adaptive.next_limit(0.1, 100 << 20) == (3, 'memory')
+    adaptive.limit = 1
+    assert adaptive.next_limit(0.1, 100 << 20) == (1, 'memory')
+    # Memory wins over CPU
+    adaptive.limit = 6
+    assert adaptive.next_limit(1.0, 100 << 20) == (3, 'memory')
+
+
+def test_cpu_saturation_lowers_by_one():
+    adaptive = limiter(6, target_utilization=0.9)
+    assert adaptive.next_limit(0.95, PLENTY) == (5, 'cpu')
+    assert adaptive.next_limit(0.5, PLENTY) == (6, None)
+    adaptive.limit = 1
+    assert adaptive.next_limit(0.95, PLENTY) == (1, 'cpu')
+
+
+def test_latency_lowers_and_rebases():
+    adaptive = limiter(4)
+    adaptive.best_latency, adaptive.latency = 1.0, 3.0
+    assert adaptive.next_limit(0.5, PLENTY) == (3, 'latency')
+    assert adaptive.best_latency == 1.5
+    adaptive.latency = 2.0
+    assert adaptive.next_limit(0.5, PLENTY) == (4, None)
+
+
+def test_waiting_work_raises_to_max():
+    adaptive = limiter(7)
+    adaptive._waiting, adaptive._active = 2, 6
+    assert adaptive.next_limit(0.5, PLENTY) == (8, 'increase')
+    # Never past the maximum
+    adaptive.limit, adaptive._active = 8, 8
+    assert adaptive.next_limit(0.5, PLENTY)[0] == 8
+    # Nothing waiting, or slots to spare: no change
+    adaptive.limit, adaptive._active = 7, 6
+    adaptive._waiting = 0
+    assert adaptive.next_limit(0.5, PLENTY) == (7, None)
+    adaptive._waiting, adaptive._active = 2, 3
+    assert adaptive.next_limit(0.5, PLENTY) == (7, None)
+    # Unknown measurements do not block an increase
+    adaptive._active = 6
+    assert adaptive.next_limit(None, None) == (8, 'increase')
+
+
+def test_slots_adjust_the_limit(monkeypatch):
+    adaptive = limiter(4, interval=0)
+    free = [PLENTY]
+    monkeypatch.setattr(concurrency, 'free_memory', lambda: free[0])
+    monkeypatch.setattr(adaptive.cpu, 'utilization', lambda: 0.95)
+    with adaptive.slot():
+        pass
+    assert adaptive.limit == 3
+    free[0] = 100 << 20
+    with adaptive.slot():
+        pass
+    assert adaptive.limit == 1
+    stats = adaptive.stats()
+    assert stats['adjustments'] == {'cpu': 1, 'memory': 1}
+    assert (stats['limit'], stats['peak']) == (1, 4)
+
+
+def test_slots_wait_for_the_limit():
+    adaptive = limiter(2, interval=3600)
+    running = []
+    peak = []
+    lock = threading.Lock()
+    release = threading.Event()
+
+    def work():
+        with adaptive.slot():
+            with lock:
+                running.append(1)
+                peak.append(len(running))
+            release.wait(5)
+            with lock:
+                running.pop()
+
+    threads = [threading.Thread(target=work) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert max(peak) <= 2 and len(peak) == 5
+
+
+@pytest.mark.skipif(subprocess.run(['sh', '-c', 'true']).returncode != 0, reason='needs a POSIX shell')
+def test_limited_command():
+    try:
+        set_child_limits()
+        assert limited_command(['echo', 'hi']) == ['echo', 'hi']
+        set_child_limits(memory_mb=512, nice=5)
+        result = subprocess.run(limited_command(['sh', '-c', 'ulimit -v; nice']), capture_output=True, text=True)
+        assert result.stdout.split() == [str(512 << 10), str(int(subprocess.run(
+            ['nice'], capture_output=True, text=True).stdout) + 5)]
+    finally:
+        set_child_limits()
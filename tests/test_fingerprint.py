@@ -0,0 +1,70 @@
+"""Tests for page fingerprints and duplicate page detection."""
+
+import io
+
+from pypdf import PdfReader, PdfWriter
+from pypdf.generic import ArrayObject, DecodedStreamObject, DictionaryObject, NameObject, RectangleObject
+
+from pdf2ppt.fingerprint import find_duplicate_pages, fingerprint_pages
+
+
+def stream(writer: PdfWriter, data: bytes):
+    obj = DecodedStreamObject()
+    obj.set_data(data)
+    return writer._add_object(obj)
+
+
+def annotation(writer: PdfWriter, appearance: bytes = None):
+    annot = DictionaryObject({NameObject('/Type'): NameObject('/Annot'),
+                              NameObject('/Subtype'): NameObject('/Link'),
+                              NameObject('/Rect'): RectangleObject([0, 0, 10, 10])})
+    if appearance is not None:
+        annot[NameObject('/Subtype')] = NameObject('/Square')
+        annot[NameObject('/AP')] = DictionaryObject({NameObject('/N'): stream(writer, appearance)})
+    return writer._add_object(annot)
+
+
+def deck(pages: list) -> PdfReader:
+    """A PDF with a page per (content, appearances) in ``pages``; None is a link without appearance."""
+    writer = PdfWriter()
+    for content, appearances in pages:
+        page = writer.add_blank_page(100, 100)
+        page[NameObject('/Contents')] = stream(writer, content)
+        if appearances:
+            page[NameObject('/Annots')] = ArrayObject(annotation(writer, ap) for ap in appearances)
+    data = io.BytesIO()
+    writer.write(data)
+    return PdfReader(data)
+
+
+def test_equal_pages_collapse():
+    reader = deck([(b'0 0 m 10 10 l S', ()), (b'0 0 m 10 10 l S', ()), (b'0 0 m 20 20 l S', ()),
+                   (b'0 0 m 10 10 l S', ())])
+    assert find_duplicate_pages(reader, [1, 2, 3, 4]) == {1: 1, 2: 1, 3: 3, 4: 1}
+    # Only the pages asked for are compared
+    assert find_duplicate_pages(reader, [2, 3, 4]) == {2: 2, 3: 3, 4: 2}
+    fingerprints = fingerprint_pages(reader, [1, 2, 3])
+    assert fingerprints[1] == fingerprints[2] != fingerprints[3]
+
+
+def test_annotation_appearances_count():
+    content = b'0 0 m 10 10 l S'
+    reader = deck([
+        (content, ()),
+        (content, (b'1 0 0 rg 0 0 10 10 re f',)),
+        (content, (b'0 0 1 rg 0 0 10 10 re f',)),
+        (content, (b'1 0 0 rg 0 0 10 10 re f',)),  # The same appearance in another object
+        (content, (None,)),  # A link draws nothing
+    ])
+    assert find_duplicate_pages(reader, [1, 2, 3, 4, 5]) == {1: 1, 2: 2, 3: 3, 4: 2, 5: 1}
+
+
+def test_geometry_counts():
+    writer = PdfWriter()
+    for width in (100, 100, 200):
+        writer.add_blank_page(width, 100)
+    writer.pages[1].rotation = 90
+    data = io.BytesIO()
+    writer.write(data)
+    reader = PdfReader(data)
+    assert find_duplicate_pages(reader, [1, 2, 3]) == {1: 1, 2: 2, 3: 3}
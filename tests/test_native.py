@@ -0,0 +1,133 @@
+"""Tests for the native DrawingML backend: SVG in, shapes and DrawingML out."""
+
+import math
+
+import pytest
+
+from pdf2ppt.native import (NativeBackend, UnsupportedSvg, add_native_slide, parse_path, parse_transform,
+                            svg_to_native, _nonzero_as_evenodd)
+
+# A 100 x 100 page on a slide 1270000 EMU wide: one user unit is 12700 EMU
+SLIDE_WIDTH = 1270000
+UNIT = 12700
+STAR = 'M 50 5 L 79 95 L 2 40 L 98 40 L 21 95 Z'
+
+
+def page(body: str) -> bytes:
+    return ('<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" '
+            f'width="100pt" height="100pt" viewBox="0 0 100 100">{body}</svg>').encode('utf-8')
+
+
+def square(x0, y0, x1, y1, clockwise=True) -> str:
+    if clockwise:
+        return f'M {x0} {y0} L {x1} {y0} L {x1} {y1} L {x0} {y1} Z'
+    return f'M {x0} {y0} L {x0} {y1} L {x1} {y1} L {x1} {y0} Z'
+
+
+def shapes(body: str) -> list:
+    return [item for kind, item in svg_to_native(page(body), SLIDE_WIDTH).items if kind == 'shape']
+
+
+def test_parse_path():
+    assert parse_path('M 10 20 l 5 0 h 5 v 5 z m 1 1 L 2 2 C 1 1 2 2 3 3') == [
+        [('M', 10, 20), ('L', 15, 20), ('L', 20, 20), ('L', 20, 25), ('Z',)],
+        [('M', 11, 21), ('L', 2, 2), ('C', 1, 1, 2, 2, 3, 3)],
+    ]
+    with pytest.raises(UnsupportedSvg):
+        parse_path('M 10')
+
+
+def test_parse_transform():
+    assert parse_transform('translate(10 20) scale(2)') == (2, 0, 0, 2, 10, 20)
+    a, b, c, d, e, f = parse_transform('rotate(90)')
+    assert (round(a, 9), round(b, 9), round(c, 9), round(d, 9)) == (0, 1, -1, 0)
+    assert parse_transform(None) == (1, 0, 0, 1, 0, 0)
+    with pytest.raises(UnsupportedSvg):
+        parse_transform('scale()')
+
+
+def test_rect():
+    [(x, y, cx, cy, paths, fill, line)] = shapes('<rect x="10" y="20" width="30" height="40" fill="#ff0000"/>')
+    assert (x, y, cx, cy) == (10 * UNIT, 20 * UNIT, 30 * UNIT, 40 * UNIT)
+    assert paths.count('<a:lnTo>') == 3 and '<a:close/>' in paths
+    assert 'val="FF0000"' in fill
+    assert line == '<a:ln><a:noFill/></a:ln>'
+
+
+def test_clipped_stroke():
+    clip = '<defs><clipPath id="c"><rect x="0" y="0" width="50" height="50"/></clipPath></defs>'
+    [(x, y, cx, cy, _, fill, line)] = shapes(
+        f'{clip}<g clip-path="url(#c)"><path d="M 10 10 L 40 10" fill="none" stroke="blue" stroke-width="2"/></g>')
+    assert (x, y, cx, cy) == (10 * UNIT, 10 * UNIT, 30 * UNIT, 1)
+    assert fill == '<a:noFill/>'
+    assert f'w="{2 * UNIT}"' in line and 'val="0000FF"' in line
+    with pytest.raises(UnsupportedSvg, match='beyond its clip path'):
+        shapes(f'{clip}<g clip-path="url(#c)"><path d="M 10 10 L 90 10" fill="none" stroke="blue"/></g>')
+
+
+def test_glyph_use_is_merged():
+    glyph = '<defs><symbol id="g"><path d="M 0 0 L 4 0 L 4 -6 L 0 -6 Z"/></symbol></defs>'
+    [(x, y, cx, cy, paths, fill, _)] = shapes(
+        f'{glyph}<g fill="#000000"><use xlink:href="#g" x="10" y="20"/><use xlink:href="#g" x="20" y="20"/></g>')
+    # Both glyphs are paths of one freeform spanning them
+    assert paths.count('<a:path ') == 2
+    assert (x, y, cx, cy) == (10 * UNIT, 14 * UNIT, 14 * UNIT, 6 * UNIT)
+    assert 'val="000000"' in fill
+
+
+def test_nonzero_star_falls_back():
+    with pytest.raises(UnsupportedSvg, match='nonzero'):
+        shapes(f'<path d="{STAR}" style="fill-rule:nonzero"/>')
+    assert len(shapes(f'<path d="{STAR}" fill-rule="evenodd"/>')) == 1
+    # Only fills depend on the rule
+    assert len(shapes(f'<path d="{STAR}" fill="none" stroke="black"/>')) == 1
+    backend = NativeBackend({1: False})
+    assert not backend.translate(page(f'<path d="{STAR}"/>'), 1, SLIDE_WIDTH)
+    assert 1 in backend.fallbacks and 1 not in backend.slides
+
+
+def test_nonzero_as_evenodd():
+    assert _nonzero_as_evenodd(parse_path(square(10, 10, 90, 90)))
+    assert not _nonzero_as_evenodd(parse_path(STAR))
+    # Bow tie: its lobes wind in opposite directions, but its edges cross
+    assert not _nonzero_as_evenodd(parse_path('M 10 10 L 90 90 L 90 10 L 10 90 Z'))
+    assert _nonzero_as_evenodd(parse_path(square(0, 0, 5, 5) + square(50, 50, 60, 60)))
+    # A hole winds the other way; an island in the hole winds either way
+    assert _nonzero_as_evenodd(parse_path(square(10, 10, 90, 90) + square(30, 30, 70, 70, False)))
+    assert _nonzero_as_evenodd(parse_path(
+        square(10, 10, 90, 90) + square(20, 20, 80, 80, False) + square(40, 40, 60, 60)))
+    assert _nonzero_as_evenodd(parse_path(
+        square(10, 10, 90, 90) + square(20, 20, 80, 80, False) + square(40, 40, 60, 60, False)))
+    # Nested the same way (winding 2) or partly overlapping
+    assert not _nonzero_as_evenodd(parse_path(square(10, 10, 90, 90) + square(30, 30, 70, 70)))
+    assert not _nonzero_as_evenodd(parse_path(square(10, 10, 90, 90) + square(50, 50, 95, 95)))
+
+
+def test_curved_hole():
+    ring = ('M 50 10 C 80 10 90 30 90 50 C 90 80 70 90 50 90 C 20 90 10 70 10 50 C 10 20 30 10 50 10 Z '
+            'M 50 30 C 40 30 30 40 30 50 C 30 60 40 70 50 70 C 60 70 70 60 70 50 C 70 40 60 30 50 30 Z')
+    [(_, _, _, _, paths, _, _)] = shapes(f'<path d="{ring}"/>')
+    assert paths.count('<a:cubicBezTo>') == 8 and paths.count('<a:close/>') == 2
+
+
+def test_gradient_falls_back():
+    gradient = ('<defs><linearGradient id="lg"><stop offset="0" stop-color="red"/></linearGradient></defs>'
+                '<rect width="10" height="10" fill="url(#lg)"/>')
+    backend = NativeBackend({1: False, 2: False})
+    assert not backend.translate(page(gradient), 1, SLIDE_WIDTH)
+    assert backend.fallbacks[1] == 'gradient or pattern paint'
+    assert backend.translate(page('<rect width="10" height="10"/>'), 2, SLIDE_WIDTH)
+    assert backend.stats() == {'native': 1, 'fallbacks': 1, 'shapes': 1, 'pictures': 0}
+    assert not backend.translate(page('<rect width="10" height="10"/>'), 3, SLIDE_WIDTH)  # Not selected
+
+
+def test_add_native_slide():
+    from pptx import Presentation
+    prs = Presentation()
+    slide = add_native_slide(prs, svg_to_native(page(f'<path d="{STAR}" fill-rule="evenodd" fill="red"/>'),
+                                                SLIDE_WIDTH))
+    [shape] = slide.shapes
+    xml = shape._element.xml
+    assert '<a:custGeom>' in xml and xml.count('<a:lnTo>') == 4
+    assert (shape.left, shape.top) == (2 * UNIT, 5 * UNIT)
+    assert math.isclose(shape.width, 96 * UNIT, abs_tol=1)
@@ -0,0 +1,105 @@
+"""Tests for the web service's output store and download ranges."""
+
+import os
+import time
+
+import pytest
+
+from pdf2ppt.store import OutputStore, parse_range, sweep_orphans
+
+JOB_A, JOB_B, JOB_C = 'a' * 32, 'b' * 32, 'c' * 32
+
+
+def write(store: OutputStore, job_id: str, size: int, age: float = 0) -> str:
+    path = store.path(job_id, 'slides.pptx')
+    path.write_bytes(b'x' * size)
+    if age:
+        then = time.time() - age
+        os.utime(path, (then, then))
+    store.add(path)
+    return store.key(path)
+
+
+def test_parse_range():
+    assert parse_range(None, 1000) is None
+    assert parse_range('', 1000) is None
+    assert parse_range('bytes=0-99', 1000) == (0, 99)
+    assert parse_range('bytes = 500-', 1000) == (500, 999)
+    assert parse_range('bytes=0-5000', 1000) == (0, 999)
+    # Suffix ranges: the last N bytes
+    assert parse_range('bytes=-100', 1000) == (900, 999)
+    assert parse_range('bytes=-2000', 1000) == (0, 999)
+    with pytest.raises(ValueError):
+        parse_range('bytes=-0', 1000)
+    with pytest.raises(ValueError):
+        parse_range('bytes=-5', 0)
+    # Starting at or past the end cannot be satisfied
+    with pytest.raises(ValueError):
+        parse_range('bytes=1000-', 1000)
+    with pytest.raises(ValueError):
+        parse_range('bytes=2000-3000', 1000)
+    # Ignored, so the whole file is sent: backwards, several ranges, other units
+    assert parse_range('bytes=5-3', 1000) is None
+    assert parse_range('bytes=0-10,20-30', 1000) is None
+    assert parse_range('bytes=-', 1000) is None
+    assert parse_range('items=0-5', 1000) is None
+
+
+def test_lookup_validates_keys(tmp_path):
+    store = OutputStore(tmp_path / 'outputs', max_bytes=1 << 20)
+    (tmp_path / 'secret').write_text('secret')
+    key = write(store, JOB_A, 10)
+    path, size, etag = store.lookup(key)
+    assert (path.name, size) == ('slides.pptx', 10)
+    assert store.lookup(key)[2] == etag
+    for bad in ('../secret', f'{JOB_A}/../../secret', f'{JOB_A}/..', f'{JOB_A}/.', 'abc/slides.pptx',
+                f'{JOB_A.upper()}/slides.pptx', f'{JOB_A}/sub/slides.pptx', f'{JOB_A}/..\\secret',
+                f'{JOB_B}/slides.pptx'):
+        assert store.lookup(bad) is None, bad
+
+
+def test_quota_evicts_least_recently_used(tmp_path):
+    store = OutputStore(tmp_path, max_bytes=250)
+    key_a = write(store, JOB_A, 100, age=30)
+    key_b = write(store, JOB_B, 100, age=20)
+    # Using A makes B the least recently used
+    assert store.lookup(key_a) is not None
+    key_c = write(store, JOB_C, 100)
+    assert store.lookup(key_b) is None
+    assert store.lookup(key_a) is not None and store.lookup(key_c) is not None
+    assert not (tmp_path / JOB_B).exists()
+    assert store.stats()['evictions'] == 1
+    # The entry just written is kept even if it alone exceeds the quota
+    key_big = write(store, JOB_B, 300)
+    assert store.lookup(key_big) is not None
+    assert store.stats()['entries'] == 1
+
+
+def test_ttl_expires_entries(tmp_path):
+    store = OutputStore(tmp_path, max_bytes=1 << 20, ttl=60)
+    path = store.path(JOB_A, 'slides.pptx')
+    path.write_bytes(b'x' * 10)
+    then = time.time() - 120
+    os.utime(path, (then, then))
+    (tmp_path / JOB_C).mkdir()  # Left by a failed job
+    os.utime(tmp_path / JOB_C, (then, then))
+    assert store.sweep() == 1
+    assert not any(tmp_path.iterdir())
+    assert store.stats()['expirations'] == 1
+    # Adding an entry expires old ones too
+    old = write(store, JOB_A, 10, age=120)
+    fresh = write(store, JOB_B, 10)
+    assert store.lookup(old) is None and store.lookup(fresh) is not None
+    assert store.stats()['expirations'] == 2
+
+
+def test_sweep_orphans(tmp_path):
+    then = time.time() - 120
+    for name in (JOB_A, JOB_B, '_pdf2ppt.tmp'):
+        (tmp_path / name / 'sub').mkdir(parents=True)
+        os.utime(tmp_path / name, (then, then))
+    (tmp_path / 'stray.pdf').write_bytes(b'%PDF')
+    os.utime(tmp_path / 'stray.pdf', (then, then))
+    (tmp_path / JOB_C).mkdir()  # Still being written
+    assert sweep_orphans(tmp_path, {JOB_A}, max_age=60) == 3
+    assert sorted(entry.name for entry in tmp_path.iterdir()) == [JOB_A, JOB_C]
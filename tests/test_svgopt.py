@@ -0,0 +1,120 @@
+"""Tests for SvgOptimizer: what it rewrites and what it must leave alone."""
+
+from lxml import etree
+
+from pdf2ppt.native import svg_to_native
+from pdf2ppt.preflight import SVG_NS
+from pdf2ppt.svgopt import PRECISION_BITS, SvgOptimizer
+
+# An unreferenced definition the optimizer drops, so every page gets smaller
+# and the optimized bytes are returned
+UNUSED = '<defs><path id="unused" d="M 0 0 L 1 1 L 2 2 L 3 3 L 4 4 L 5 5 L 6 6 L 7 7"/></defs>'
+
+
+def page(body: str) -> bytes:
+    return ('<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" '
+            f'width="100pt" height="100pt" viewBox="0 0 100 100">{UNUSED}{body}</svg>').encode('utf-8')
+
+
+def optimize(body: str):
+    data = page(body)
+    optimized = SvgOptimizer().optimize_svg_data(data)
+    assert len(optimized) < len(data)
+    return etree.fromstring(optimized)
+
+
+def groups(root) -> list:
+    return list(root.iter(SVG_NS + 'g'))
+
+
+def paths(root) -> list:
+    return list(root.iter(SVG_NS + 'path'))
+
+
+def test_plain_groups_are_flattened():
+    root = optimize('<g><g transform="translate(10,20)"><path d="M 0 0 L 5 5" stroke="black"/></g></g>')
+    assert not groups(root)
+    [path] = paths(root)
+    assert path.get('transform') is None
+    assert path.get('d') == 'M 10 20 L 15 25'
+
+
+def test_groups_with_effects_are_kept():
+    for attrs in ('opacity="0.5"', 'style="opacity:0.5"', 'clip-path="url(#c)"', 'filter="url(#f)"',
+                  'mask="url(#m)"'):
+        root = optimize('<clipPath id="c"><rect width="50" height="50"/></clipPath>'
+                        '<filter id="f"><feGaussianBlur stdDeviation="2"/></filter>'
+                        '<mask id="m"><rect width="50" height="50" fill="white"/></mask>'
+                        f'<g {attrs}><path d="M 0 0 L 90 90" stroke="black"/></g>')
+        [group] = groups(root)
+        assert etree.tostring(group).count(b'<path') == 1, attrs
+        name, _, value = attrs.partition('=')
+        assert group.get(name) == value.strip('"'), attrs
+    # A transform next to a clip stays on the group, where the clip is defined
+    root = optimize('<clipPath id="c"><rect width="50" height="50"/></clipPath>'
+                    '<g clip-path="url(#c)" transform="translate(5,5)"><path d="M 0 0 L 9 9" stroke="red"/></g>')
+    [group] = groups(root)
+    assert group.get('transform') == 'translate(5,5)'
+    assert paths(root)[0].get('d') == 'M 0 0 L 9 9'
+
+
+def test_only_strokes_drawn_alike_are_merged():
+    stroke = 'fill="none" stroke="black" stroke-width="1"'
+    root = optimize(f'<path d="M 0 0 L 10 0" {stroke}/><path d="M 0 5 L 10 5" {stroke}/>'
+                    '<path d="M 0 9 L 10 9" fill="none" stroke="black" stroke-width="2"/>'
+                    '<path d="M 0 12 L 10 12" fill="none" stroke="red" stroke-width="1"/>')
+    assert [path.get('d') for path in paths(root)] == ['M 0 0 L 10 0 M 0 5 L 10 5', 'M 0 9 L 10 9',
+                                                       'M 0 12 L 10 12']
+    # Fills, dashes and translucent strokes are never joined
+    for extra in ('fill="black" stroke="black"', 'fill="none" stroke="black" stroke-dasharray="2 1"',
+                  'fill="none" stroke="black" stroke-opacity="0.5"'):
+        root = optimize(f'<path d="M 0 0 L 10 0 L 10 10 Z" {extra}/><path d="M 50 50 L 60 50 L 60 60 Z" {extra}/>')
+        assert len(paths(root)) == 2, extra
+
+
+def test_identical_symbols_are_merged():
+    glyph = '<path d="M 0 0 L 4 0 L 4 -6 Z"/>'
+    root = optimize(f'<defs><symbol id="a">{glyph}</symbol><symbol id="b">{glyph}</symbol></defs>'
+                    '<use xlink:href="#a" x="1" y="10"/><use xlink:href="#b" x="9" y="10"/>')
+    assert [symbol.get('id') for symbol in root.iter(SVG_NS + 'symbol')] == ['a']
+    assert [use.get('{http://www.w3.org/1999/xlink}href') for use in root.iter(SVG_NS + 'use')] == ['#a', '#a']
+
+
+def test_drawing_is_unchanged():
+    body = ('<defs><symbol id="a"><path d="M 0 0 L 4 0 L 4 -6 Z"/></symbol>'
+            '<symbol id="b"><path d="M 0 0 L 4 0 L 4 -6 Z"/></symbol></defs>'
+            '<g transform="translate(10.123456789,20.987654321)"><g style="fill:#ff0000">'
+            '<path d="M 0.000001 0 L 30.3333333333 0 L 30.3333333333 20 Z"/></g></g>'
+            '<g fill="#0000ff"><use xlink:href="#a" x="50" y="60"/><use xlink:href="#b" x="60" y="60"/></g>'
+            '<path d="M 5 90 L 95 90" fill="none" stroke="black"/>'
+            '<path d="M 5 95 L 95 95" fill="none" stroke="black"/>')
+    data = page(body)
+    optimized = SvgOptimizer().optimize_svg_data(data)
+    assert len(optimized) < len(data)
+
+    def boxes(svg: bytes) -> list:
+        # Outlines merged into one freeform still cover the same area and paint
+        items = svg_to_native(svg, 1270000).items
+        union = {}
+        for _, (x, y, cx, cy, _, fill, line) in items:
+            x0, y0, x1, y1 = union.get((fill, line), (x, y, x + cx, y + cy))
+            union[(fill, line)] = (min(x0, x), min(y0, y), max(x1, x + cx), max(y1, y + cy))
+        return sorted(union.items())
+
+    # Coordinates may move by the rounding precision, 1/2**16 of the page (about 19 EMU here)
+    tolerance = 1270000 / (1 << PRECISION_BITS)
+    before, after = boxes(data), boxes(optimized)
+    assert [paint for paint, _ in before] == [paint for paint, _ in after]
+    for (_, box), (_, box_after) in zip(before, after):
+        assert all(abs(a - b) <= tolerance for a, b in zip(box, box_after))
+
+
+def test_stats():
+    optimizer = SvgOptimizer()
+    data = page('<g><path d="M 0 0 L 1 1" stroke="black"/></g>')
+    optimizer.optimize_svg_data(data)
+    optimizer.optimize_svg_data(b'not xml')
+    stats = optimizer.stats()
+    assert stats['pages'] == 2
+    assert stats['bytes_before'] == len(data) + 7
+    assert stats['bytes_after'] < stats['bytes_before']
@@ -0,0 +1,48 @@
+"""Tests for patching an existing presentation in watch mode."""
+
+import io
+
+from PIL import Image
+from pptx import Presentation
+
+from pdf2ppt.watch import SLIDE_NAME_PREFIX, _picture_blob, patch_presentation, slide_fingerprint
+
+
+def picture(color: str) -> io.BytesIO:
+    data = io.BytesIO()
+    Image.new('RGB', (8, 6), color).save(data, 'PNG')
+    data.seek(0)
+    return data
+
+
+def fingerprints(prs) -> list:
+    return [slide_fingerprint(slide) for slide in prs.slides]
+
+
+def test_patch_presentation(tmp_path):
+    prs = Presentation()
+    counts = patch_presentation(prs, ['a', 'b', 'c'], {'a': picture('red'), 'b': picture('green'),
+                                                       'c': picture('blue')})
+    assert counts == {'kept': 0, 'added': 3, 'removed': 0}
+    assert [slide.name for slide in prs.slides] == [SLIDE_NAME_PREFIX + name for name in 'abc']
+    blob_a = _picture_blob(prs.slides[0])
+    # A slide someone added by hand shows no page and goes too
+    prs.slides.add_slide(prs.slide_layouts[6])
+
+    # c moves to the front, b goes, d is new and a second copy of a reuses its picture
+    counts = patch_presentation(prs, ['c', 'a', 'd', 'a'], {'d': picture('white')})
+    assert counts == {'kept': 2, 'added': 2, 'removed': 2}
+    assert fingerprints(prs) == ['c', 'a', 'd', 'a']
+    assert _picture_blob(prs.slides[1]) == _picture_blob(prs.slides[3]) == blob_a
+
+    path = tmp_path / 'slides.pptx'
+    prs.save(path)
+    reopened = Presentation(path)
+    assert fingerprints(reopened) == ['c', 'a', 'd', 'a']
+    # Removed slides are not left in the package
+    slide_parts = [part for part in reopened.part.package.iter_parts() if '/slides/slide' in str(part.partname)]
+    assert len(slide_parts) == 4
+
+    # Nothing changed: every slide is kept where it is
+    assert patch_presentation(reopened, ['c', 'a', 'd', 'a'], {}) == {'kept': 4, 'added': 0, 'removed': 0}
+    assert fingerprints(reopened) == ['c', 'a', 'd', 'a']
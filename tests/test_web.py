@@ -0,0 +1,76 @@
+"""Tests for the web service's download endpoint."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip('fastapi')
+pytest.importorskip('httpx')  # For TestClient
+from fastapi.testclient import TestClient  # noqa: E402
+
+from pdf2ppt.store import OutputStore  # noqa: E402
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'web'))
+import app as web  # noqa: E402
+
+JOB_ID = 'd' * 32
+DATA = bytes(range(256)) * 4
+URL = f'/api/download/{JOB_ID}/my%20slides.pptx'
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    store = OutputStore(tmp_path, max_bytes=1 << 20)
+    path = store.path(JOB_ID, 'my slides.pptx')
+    path.write_bytes(DATA)
+    store.add(path)
+    monkeypatch.setattr(web, 'OUTPUT_STORE', store)
+    return TestClient(web.app)
+
+
+def test_download(client):
+    response = client.get(URL)
+    assert response.status_code == 200
+    assert response.content == DATA
+    assert response.headers['accept-ranges'] == 'bytes'
+    assert response.headers['content-length'] == str(len(DATA))
+    assert "filename*=utf-8''my%20slides.pptx" in response.headers['content-disposition']
+    assert client.get(f'/api/download/{JOB_ID}/other.pptx').status_code == 404
+    assert client.get(f'/api/download/{JOB_ID}/..%2F..%2Fetc%2Fpasswd').status_code == 404
+
+
+def test_range(client):
+    response = client.get(URL, headers={'Range': 'bytes=100-199'})
+    assert response.status_code == 206
+    assert response.content == DATA[100:200]
+    assert response.headers['content-range'] == f'bytes 100-199/{len(DATA)}'
+    response = client.get(URL, headers={'Range': 'bytes=-24'})
+    assert response.status_code == 206 and response.content == DATA[-24:]
+    # Several ranges are answered with the whole file
+    response = client.get(URL, headers={'Range': 'bytes=0-1,5-6'})
+    assert response.status_code == 200 and response.content == DATA
+
+
+def test_if_range(client):
+    etag = client.get(URL).headers['etag']
+    response = client.get(URL, headers={'Range': 'bytes=10-19', 'If-Range': etag})
+    assert response.status_code == 206 and response.content == DATA[10:20]
+    # The file changed since the first part was downloaded: start over
+    response = client.get(URL, headers={'Range': 'bytes=10-19', 'If-Range': '"stale"'})
+    assert response.status_code == 200 and response.content == DATA
+
+
+def test_not_modified(client):
+    etag = client.get(URL).headers['etag']
+    response = client.get(URL, headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.headers['etag'] == etag and not response.content
+    assert client.get(URL, headers={'If-None-Match': '"other"'}).status_code == 200
+
+
+def test_range_not_satisfiable(client):
+    for header in (f'bytes={len(DATA)}-', 'bytes=-0'):
+        response = client.get(URL, headers={'Range': header})
+        assert response.status_code == 416, header
+        assert response.headers['content-range'] == f'bytes */{len(DATA)}'
@@ -8,13 +8,21 @@ from PIL import Image
 Image.MAX_IMAGE_PIXELS = None
 
 import asyncio
+import hashlib
+import itertools
 import json
+import logging
+import os
+import shutil
 import sys
+import time
+import uuid
 from pathlib import Path
+from urllib.parse import quote
 from typing import Optional, List
 
 from fastapi import FastAPI, File, UploadFile, Form, HTTPException
-from fastapi.responses import FileResponse, StreamingResponse
+from fastapi.responses import Response, StreamingResponse, PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from starlette.requests import Request
@@ -23,7 +31,12 @@ from pydantic import BaseModel, Field
 
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
-from pdf2ppt import pdf2svg, svg2emf, emf2ppt, clean_tmp, parse_page_range
+from pdf2ppt import pdf2svg, svg2emf, emf2ppt, optimize_images, optimize_svgs, ImageOptimizer, SvgOptimizer, parse_page_range, format_page_range, get_shared_pool, emf_cache, find_duplicate_pages, TMP_DIR_NAME
+from pdf2ppt import __version__
+from pdf2ppt.concurrency import AdaptiveLimiter, set_child_limits
+from pdf2ppt.cache import FileCache, default_cache_dir, executable_fingerprint
+from pdf2ppt.store import OutputStore, DEFAULT_OUTPUT_SIZE_MB, parse_range, sweep_orphans
+from pdf2ppt import metrics
 from pypdf import PdfReader
 
 app = FastAPI(
@@ -48,13 +61,68 @@ This API provides multiple ways to convert PDF presentations to PowerPoint forma
     license_info={"name": "MIT License", "url": "https://opensource.org/licenses/MIT"},
 )
 
+logger = logging.getLogger('pdf2ppt.web')
+
 app.mount("/static", StaticFiles(directory="web/static"), name="static")
 templates = Jinja2Templates(directory="web/templates")
 
 UPLOAD_DIR = Path("/tmp/pdf2ppt/uploads")
 OUTPUT_DIR = Path("/tmp/pdf2ppt/outputs")
 UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
-OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+
+# One set of Inkscape workers serves every request, so conversions never pay Inkscape's startup
+INKSCAPE_POOL = get_shared_pool('inkscape', size=int(os.environ.get('INKSCAPE_WORKERS', 4)))
+# ADAPTIVE_CONCURRENCY=1 shares one limiter between all jobs, which tunes how many pages are in
+# Inkscape at once from CPU load, free memory and page latency (see pdf2ppt.concurrency)
+LIMITER = AdaptiveLimiter(max_limit=INKSCAPE_POOL.size) if os.environ.get('ADAPTIVE_CONCURRENCY') else None
+# CHILD_MEMORY_MB / CHILD_NICE cap the address space and priority of every pdf2svg and Inkscape process
+set_child_limits(int(os.environ['CHILD_MEMORY_MB']) if os.environ.get('CHILD_MEMORY_MB') else None,
+                 int(os.environ.get('CHILD_NICE') or 0))
+# Per-page EMF cache, located by PDF2PPT_CACHE_DIR / PDF2PPT_CACHE_SIZE_MB
+EMF_CACHE = emf_cache('inkscape')
+# Finished presentations, keyed by the uploaded PDF's SHA-256 and the options that affect the output
+RESULT_CACHE = FileCache(
+    Path(os.environ.get('RESULT_CACHE_DIR') or default_cache_dir() / 'results'),
+    int(os.environ.get('RESULT_CACHE_SIZE_MB', 1024)) << 20,
+    namespace=f"pptx:{__version__}:{executable_fingerprint('pdf2svg')}:{executable_fingerprint('inkscape')}",
+    suffix='.pptx',
+)
+
+
+# Jobs run in a bounded number of slots; everything else waits in the queue
+MAX_CONCURRENT_JOBS = int(os.environ.get('MAX_CONCURRENT_JOBS', 2))
+JOB_RETENTION_SECONDS = int(os.environ.get('JOB_RETENTION_SECONDS', 3600))
+# Finished presentations, under <job id>/<name>; removed OUTPUT_TTL_SECONDS after their last
+# download and least recently used first beyond OUTPUT_STORE_SIZE_MB
+OUTPUT_STORE = OutputStore(
+    OUTPUT_DIR,
+    int(os.environ.get('OUTPUT_STORE_SIZE_MB', DEFAULT_OUTPUT_SIZE_MB)) << 20,
+    int(os.environ.get('OUTPUT_TTL_SECONDS', JOB_RETENTION_SECONDS)),
+)
+# Every SWEEP_INTERVAL_SECONDS expired outputs go, and so do upload directories no queued or
+# running job owns once they are ORPHAN_MAX_AGE_SECONDS old
+SWEEP_INTERVAL_SECONDS = int(os.environ.get('SWEEP_INTERVAL_SECONDS', 300))
+ORPHAN_MAX_AGE_SECONDS = int(os.environ.get('ORPHAN_MAX_AGE_SECONDS', 3600))
+# Uploads are copied to disk in chunks and rejected once they exceed the limit
+MAX_FILE_SIZE = int(os.environ.get('MAX_FILE_SIZE_MB', 100)) << 20
+UPLOAD_CHUNK_SIZE = 1 << 20
+DOWNLOAD_CHUNK_SIZE = 1 << 20
+PPTX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.presentationml.presentation"
+
+
+# Service-level metrics; the converter's own stage, page, process and cache metrics live in pdf2ppt.metrics
+QUEUE_DEPTH = metrics.Gauge('pdf2ppt_queue_depth', 'Jobs waiting for a conversion slot')
+RUNNING_JOBS = metrics.Gauge('pdf2ppt_running_jobs', 'Jobs currently converting')
+JOBS_FINISHED = metrics.Counter('pdf2ppt_jobs_total', 'Finished jobs by outcome', ('status', 'cached'))
+JOB_SECONDS = metrics.Histogram('pdf2ppt_job_duration_seconds', 'Time from upload to finished job')
+
+
+def new_job_dir() -> tuple:
+    """Allocate a private directory for one conversion. Returns (job_id, job_dir)."""
+    job_id = uuid.uuid4().hex
+    job_dir = UPLOAD_DIR / job_id
+    job_dir.mkdir(parents=True)
+    return job_id, job_dir
 
 
 class ConversionOptions(BaseModel):
@@ -62,6 +130,9 @@ class ConversionOptions(BaseModel):
     parallel: int = Field(4, ge=1, le=16, description="Parallel workers (1-16)")
     force: bool = Field(True, description="Force overwrite")
     no_clean: bool = Field(False, description="Keep temp files")
+    priority: int = Field(0, description="Queue priority; higher runs first, FIFO within a priority")
+    image_dpi: Optional[int] = Field(None, ge=24, le=1200, description="Downsample embedded images above this DPI of the slide size")
+    optimize_svg: bool = Field(False, description="Round coordinates, flatten groups and drop unused definitions in each SVG before Inkscape")
 
 
 class HealthResponse(BaseModel):
@@ -69,6 +140,324 @@ class HealthResponse(BaseModel):
     version: str = Field(..., description="API version")
 
 
+class JobStatus(BaseModel):
+    job_id: str = Field(..., description="Job ID")
+    filename: str = Field(..., description="Uploaded file name")
+    input_size: Optional[int] = Field(None, description="Uploaded file size in bytes")
+    input_sha256: Optional[str] = Field(None, description="SHA-256 of the uploaded file")
+    status: str = Field(..., description="queued, processing, completed or error")
+    progress: int = Field(..., description="Progress percentage")
+    message: Optional[str] = Field(None, description="Current step")
+    queue_position: Optional[int] = Field(None, description="Jobs ahead of this one while queued")
+    output_file: Optional[str] = Field(None, description="Output file name when completed")
+    download_url: Optional[str] = Field(None, description="Download URL when completed")
+    error: Optional[str] = Field(None, description="Error message if the job failed")
+    duplicate_pages: Optional[int] = Field(None, description="Identical pages converted only once")
+    cached: bool = Field(False, description="Result served from the result cache")
+
+
+# Progress range (percent) each stage's per-page events are spread over
+STAGE_PROGRESS = {'pdf2svg': (20, 50), 'svg2emf': (50, 80), 'emf2ppt': (80, 95)}
+STAGE_MESSAGES = {'pdf2svg': 'Converted to SVG', 'svg2emf': 'Converted to EMF', 'emf2ppt': 'Added slide for'}
+
+
+class Job:
+    """A queued conversion and the progress events it has published so far."""
+
+    def __init__(self, job_id: str, job_dir: Path, input_path: Path, filename: str, opts: ConversionOptions):
+        self.id = job_id
+        self.job_dir = job_dir
+        self.input_path = input_path
+        self.filename = filename
+        self.opts = opts
+        self.input_size = None
+        self.input_sha256 = None
+        self.status = 'queued'
+        self.progress = 0
+        self.message = 'Queued'
+        self.output_file = None
+        self.error = None
+        self.duplicate_pages = None
+        self.cached = False
+        self.cache_key = None
+        self.created_at = time.time()
+        self.finished_at = None
+        self.sort_key = None
+        self.events = []
+        self._updated = asyncio.Event()
+
+    @property
+    def done(self) -> bool:
+        return self.status in ('completed', 'error')
+
+    @property
+    def download_url(self) -> Optional[str]:
+        """URL of the output, with the file name percent-encoded (it comes from the upload)."""
+        return f'/api/download/{quote(self.output_file)}' if self.output_file else None
+
+    def publish(self, detail: Optional[dict] = None, **fields):
+        """Record a progress event and wake up everyone streaming this job.
+
+        ``detail`` holds extra event fields, such as a page event from the converter.
+        """
+        for key, value in fields.items():
+            setattr(self, key, value)
+        if self.done and self.finished_at is None:
+            self.finished_at = time.time()
+            JOBS_FINISHED.labels(self.status, str(self.cached).lower()).inc()
+            JOB_SECONDS.observe(self.finished_at - self.created_at)
+        event = {'progress': self.progress, 'status': self.status, 'message': self.message}
+        if detail:
+            event.update(detail)
+        if self.status == 'completed':
+            event.update(output_file=self.output_file, download_url=self.download_url,
+                         duplicate_pages=self.duplicate_pages, cached=self.cached)
+        elif self.status == 'error':
+            event['error'] = self.error
+        self.events.append(event)
+        self._updated.set()
+        self._updated = asyncio.Event()
+
+    def publish_page(self, event: dict):
+        """Publish a per-page event from the converter's progress callback."""
+        start, end = STAGE_PROGRESS[event['stage']]
+        progress = start + (end - start) * event['completed'] // event['total']
+        message = f"{STAGE_MESSAGES[event['stage']]} page {event['page']} ({event['completed']}/{event['total']})"
+        self.publish(progress=progress, message=message, detail=event)
+
+    async def stream(self):
+        """Yield every event of this job as SSE, from the first until it finishes."""
+        sent = 0
+        while True:
+            updated = self._updated
+            while sent < len(self.events):
+                yield f"data: {json.dumps(self.events[sent])}\n\n"
+                sent += 1
+            if self.done:
+                return
+            await updated.wait()
+
+    def to_dict(self, queue_position: Optional[int] = None) -> dict:
+        return {
+            'job_id': self.id, 'filename': self.filename, 'input_size': self.input_size,
+            'input_sha256': self.input_sha256, 'status': self.status,
+            'progress': self.progress, 'message': self.message, 'queue_position': queue_position,
+            'output_file': self.output_file,
+            'download_url': self.download_url,
+            'error': self.error, 'duplicate_pages': self.duplicate_pages, 'cached': self.cached,
+        }
+
+
+class JobScheduler:
+    """Runs queued jobs by priority, then FIFO, at most ``workers`` at a time.
+
+    Every job converts through the shared ``INKSCAPE_POOL``, so the number of
+    Inkscape processes stays at ``INKSCAPE_WORKERS`` however many jobs run.
+    """
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self.jobs = {}
+        self._queue = None
+        self._tasks = []
+        self._order = itertools.count()
+
+    def start(self):
+        self._queue = asyncio.PriorityQueue()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    def track(self, job: Job):
+        """Register a job that is already finished, so its status can be queried."""
+        self._forget_old_jobs()
+        self.jobs[job.id] = job
+
+    def submit(self, job: Job):
+        self.track(job)
+        job.sort_key = (-job.opts.priority, next(self._order))
+        job.publish(message=f'Queued ({self.queue_position(job)} jobs ahead)')
+        self._queue.put_nowait((*job.sort_key, job))
+
+    def queue_position(self, job: Job) -> Optional[int]:
+        if job.status != 'queued':
+            return None
+        return sum(1 for other in self.jobs.values()
+                   if other.status == 'queued' and other.sort_key < job.sort_key)
+
+    def _forget_old_jobs(self):
+        cutoff = time.time() - JOB_RETENTION_SECONDS
+        for job_id in [j.id for j in self.jobs.values() if j.done and j.finished_at < cutoff]:
+            del self.jobs[job_id]
+
+    async def _worker(self):
+        while True:
+            _, _, job = await self._queue.get()
+            try:
+                await run_job(job)
+            finally:
+                self._queue.task_done()
+
+
+scheduler = JobScheduler(MAX_CONCURRENT_JOBS)
+
+
+async def run_job(job: Job):
+    """Convert one job's PDF, publishing progress as it goes."""
+    opts = job.opts
+    parallel = min(opts.parallel, INKSCAPE_POOL.size)
+    input_path = job.input_path
+    work_dir = job.job_dir / TMP_DIR_NAME
+    loop = asyncio.get_running_loop()
+
+    def on_progress(event: dict):
+        loop.call_soon_threadsafe(job.publish_page, event)
+
+    try:
+        job.publish(status='processing', progress=10, message='Reading PDF...')
+        pdf_reader = await asyncio.to_thread(PdfReader, input_path)
+        total_pages = len(pdf_reader.pages)
+        pages = parse_page_range(opts.pages, total_pages) if opts.pages else list(range(1, total_pages + 1))
+        duplicates = await asyncio.to_thread(find_duplicate_pages, pdf_reader, pages)
+        unique_pages = [page for page in pages if duplicates[page] == page]
+        job.publish(progress=20, message='Converting to SVG...')
+        success = await asyncio.to_thread(pdf2svg, input_path, 'pdf2svg', False, unique_pages, parallel, work_dir, on_progress)
+        if not success:
+            raise Exception("PDF to SVG conversion failed")
+        if opts.image_dpi:
+            job.publish(progress=50, message='Downsampling images...')
+            await asyncio.to_thread(optimize_images, pdf_reader, input_path, unique_pages, ImageOptimizer(opts.image_dpi), parallel, work_dir)
+        if opts.optimize_svg:
+            job.publish(progress=50, message='Optimizing SVG...')
+            await asyncio.to_thread(optimize_svgs, input_path, unique_pages, SvgOptimizer(), parallel, work_dir)
+        job.publish(progress=50, message='Converting to EMF...')
+        success, filters = await asyncio.to_thread(svg2emf, pdf_reader, input_path, 'inkscape', unique_pages, False, True, parallel, INKSCAPE_POOL, EMF_CACHE, work_dir, on_progress, limiter=LIMITER)
+        if not success:
+            raise Exception("SVG to EMF conversion failed")
+        job.publish(progress=80, message='Creating PowerPoint...')
+        output_path = OUTPUT_STORE.path(job.id, f"{Path(job.filename).stem}.pptx")
+        await asyncio.to_thread(emf2ppt, pdf_reader, input_path, output_path, pages, False, duplicates, work_dir, on_progress)
+        await asyncio.to_thread(OUTPUT_STORE.add, output_path)
+        if job.cache_key:
+            await asyncio.to_thread(RESULT_CACHE.put, job.cache_key, output_path)
+        job.publish(status='completed', progress=100, message='Completed', output_file=OUTPUT_STORE.key(output_path),
+                    duplicate_pages=len(pages) - len(unique_pages))
+    except Exception as e:
+        job.publish(status='error', progress=100, message='Failed', error=str(e))
+    finally:
+        if not opts.no_clean:
+            await asyncio.to_thread(shutil.rmtree, job.job_dir, True)
+
+
+async def save_upload(file: UploadFile, dest: Path) -> tuple:
+    """Stream an upload to ``dest`` in chunks, hashing it on the way. Returns (size, sha256)."""
+    digest = hashlib.sha256()
+    size = 0
+    with open(dest, "wb") as f:
+        while True:
+            chunk = await file.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > MAX_FILE_SIZE:
+                raise HTTPException(413, detail=f"File too large: {file.filename} exceeds {MAX_FILE_SIZE >> 20} MB")
+            digest.update(chunk)
+            f.write(chunk)
+    return size, digest.hexdigest()
+
+
+async def create_job(file: UploadFile, opts: ConversionOptions) -> Job:
+    """Save an upload into a fresh job directory. The job still has to be submitted."""
+    job_id, job_dir = new_job_dir()
+    input_path = job_dir / f"{Path(file.filename).stem}.pdf"
+    try:
+        size, sha256 = await save_upload(file, input_path)
+    except BaseException:
+        shutil.rmtree(job_dir, ignore_errors=True)
+        raise
+    job = Job(job_id, job_dir, input_path, file.filename, opts)
+    job.input_size, job.input_sha256 = size, sha256
+    return job
+
+
+def result_cache_key(job: Job) -> str:
+    """Key of the job's result: the PDF hash plus its normalized page selection, image DPI and SVG optimization."""
+    total_pages = len(PdfReader(job.input_path).pages)
+    pages = parse_page_range(job.opts.pages, total_pages)
+    # Keys of results converted without SVG optimization stay as they were
+    svgopt = ('svgopt',) if job.opts.optimize_svg else ()
+    return RESULT_CACHE.text_key(job.input_sha256, format_page_range(pages), str(job.opts.image_dpi or ''), *svgopt)
+
+
+async def dispatch(job: Job):
+    """Complete the job from the result cache if possible, otherwise queue it."""
+    try:
+        job.cache_key = await asyncio.to_thread(result_cache_key, job)
+    except Exception:
+        job.cache_key = None
+    output_path = OUTPUT_STORE.path(job.id, f"{Path(job.filename).stem}.pptx")
+    if job.cache_key and await asyncio.to_thread(RESULT_CACHE.get, job.cache_key, output_path):
+        await asyncio.to_thread(OUTPUT_STORE.add, output_path)
+        job.publish(status='completed', progress=100, message='Completed (cached)',
+                    output_file=OUTPUT_STORE.key(output_path), cached=True)
+        scheduler.track(job)
+        await asyncio.to_thread(shutil.rmtree, job.job_dir, True)
+    else:
+        scheduler.submit(job)
+
+
+def parse_options(options: str) -> ConversionOptions:
+    try:
+        return ConversionOptions(**json.loads(options))
+    except ValueError as e:
+        raise HTTPException(422, detail=f"Invalid options: {e}")
+
+
+def get_job(job_id: str) -> Job:
+    job = scheduler.jobs.get(job_id)
+    if job is None:
+        raise HTTPException(404, detail=f"Job not found: {job_id}")
+    return job
+
+
+def sweep_storage(active: set):
+    """Enforce the output store's TTL and quota and remove upload directories of jobs not in ``active``."""
+    OUTPUT_STORE.sweep()
+    sweep_orphans(UPLOAD_DIR, active, ORPHAN_MAX_AGE_SECONDS)
+
+
+async def run_sweeper():
+    while True:
+        # Snapshot on the event loop, which adds and forgets jobs while the sweep runs in a thread
+        active = {job.id for job in scheduler.jobs.values() if not job.done}
+        try:
+            await asyncio.to_thread(sweep_storage, active)
+        except Exception:
+            logger.exception('Storage sweep failed; retrying in %ss', SWEEP_INTERVAL_SECONDS)
+        await asyncio.sleep(SWEEP_INTERVAL_SECONDS)
+
+
+@app.on_event("startup")
+async def start_services():
+    scheduler.start()
+    app.state.sweeper = asyncio.create_task(run_sweeper())
+    asyncio.get_running_loop().run_in_executor(None, INKSCAPE_POOL.warm)
+
+
+@app.on_event("shutdown")
+async def stop_services():
+    app.state.sweeper.cancel()
+    await scheduler.stop()
+    await asyncio.to_thread(INKSCAPE_POOL.close)
+
+
 @app.get("/", response_class=HTMLResponse, tags=["UI"])
 async def index(request: Request):
     return templates.TemplateResponse("index.html", {"request": request})
@@ -84,57 +473,126 @@ async def convert_pdf(
     file: UploadFile = File(..., description="PDF file to convert"),
     options: str = Form("{}", description="JSON conversion options")
 ):
-    opts = json.loads(options)
-    task_id = f"{Path(file.filename).stem}_{asyncio.get_event_loop().time()}"
-    input_path = UPLOAD_DIR / f"{task_id}.pdf"
-    with open(input_path, "wb") as f:
-        f.write(await file.read())
+    """Queue a conversion and stream its progress as server-sent events."""
+    job = await create_job(file, parse_options(options))
+    await dispatch(job)
+    return StreamingResponse(job.stream(), media_type="text/event-stream", headers={"X-Job-ID": job.id})
 
-    async def generate():
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match or If-Range header names ``etag`` (weak comparison)."""
+    if not header:
+        return False
+    return header.strip() == '*' or etag in (tag.strip().removeprefix('W/') for tag in header.split(','))
+
+
+def read_file(path: Path, first: int, length: int):
+    """Yield ``length`` bytes of ``path`` from ``first`` in chunks."""
+    with open(path, 'rb') as f:
+        f.seek(first)
+        while length > 0:
+            chunk = f.read(min(DOWNLOAD_CHUNK_SIZE, length))
+            if not chunk:
+                return
+            length -= len(chunk)
+            yield chunk
+
+
+@app.get("/api/download/{key:path}", tags=["Conversion"])
+async def download(key: str, request: Request):
+    """Download a finished presentation by its ``output_file`` key (``<job id>/<name>.pptx``).
+
+    Supports single byte ranges (``Range``, ``If-Range``) so interrupted
+    downloads can resume, and ``If-None-Match`` against the ETag.
+    """
+    entry = await asyncio.to_thread(OUTPUT_STORE.lookup, key)
+    if entry is None:
+        raise HTTPException(404, detail=f"File not found or expired: {key}")
+    path, size, etag = entry
+    name = path.name
+    disposition = f"attachment; filename*=utf-8''{quote(name)}" if quote(name) != name else f'attachment; filename="{name}"'
+    headers = {'ETag': etag, 'Accept-Ranges': 'bytes', 'Content-Disposition': disposition}
+    request_headers = request.headers
+    if etag_matches(request_headers.get('if-none-match'), etag):
+        return Response(status_code=304, headers=headers)
+    byte_range = None
+    if 'if-range' not in request_headers or etag_matches(request_headers['if-range'], etag):
         try:
-            yield f"data: {json.dumps({'progress': 10, 'message': 'Reading PDF...', 'status': 'processing'})}\n\n"
-            pdf_reader = await asyncio.to_thread(PdfReader, input_path)
-            total_pages = len(pdf_reader.pages)
-            pages = parse_page_range(opts.get('pages'), total_pages) if opts.get('pages') else list(range(1, total_pages + 1))
-            yield f"data: {json.dumps({'progress': 20, 'message': 'Converting to SVG...', 'status': 'processing'})}\n\n"
-            success = await asyncio.to_thread(pdf2svg, input_path, 'pdf2svg', False)
-            if not success:
-                raise Exception("PDF to SVG conversion failed")
-            yield f"data: {json.dumps({'progress': 50, 'message': 'Converting to EMF...', 'status': 'processing'})}\n\n"
-            success, filters = await asyncio.to_thread(svg2emf, pdf_reader, input_path, 'inkscape', pages, False, True, opts.get('parallel', 4))
-            if not success:
-                raise Exception("SVG to EMF conversion failed")
-            yield f"data: {json.dumps({'progress': 80, 'message': 'Creating PowerPoint...', 'status': 'processing'})}\n\n"
-            output_filename = f"{Path(file.filename).stem}.pptx"
-            output_path = OUTPUT_DIR / output_filename
-            await asyncio.to_thread(emf2ppt, pdf_reader, input_path, output_path, pages, False)
-            if not opts.get('no_clean', False):
-                await asyncio.to_thread(clean_tmp, input_path, False)
-            input_path.unlink()
-            yield f"data: {json.dumps({'progress': 100, 'status': 'completed', 'output_file': output_filename, 'download_url': f'/api/download/{output_filename}'})}\n\n"
-        except Exception as e:
-            yield f"data: {json.dumps({'progress': 100, 'status': 'error', 'error': str(e)})}\n\n"
-    return StreamingResponse(generate(), media_type="text/event-stream")
-
-
-@app.get("/api/download/{filename}", tags=["Conversion"])
-async def download(filename: str):
-    file_path = OUTPUT_DIR / filename
-    if not file_path.exists():
-        raise HTTPException(404, detail=f"File not found: {filename}")
-    return FileResponse(file_path, media_type="application/vnd.openxmlformats-officedocument.presentationml.presentation", filename=filename)
+            byte_range = parse_range(request_headers.get('range'), size)
+        except ValueError:
+            return Response(status_code=416, headers={**headers, 'Content-Range': f'bytes */{size}'})
+    if byte_range is None:
+        first, last, status = 0, size - 1, 200
+    else:
+        (first, last), status = byte_range, 206
+        headers['Content-Range'] = f'bytes {first}-{last}/{size}'
+    headers['Content-Length'] = str(last - first + 1)
+    return StreamingResponse(read_file(path, first, last - first + 1), status_code=status,
+                             media_type=PPTX_MEDIA_TYPE, headers=headers)
 
 
 @app.post("/api/batch-convert", tags=["Conversion"])
-async def batch_convert(files: List[UploadFile] = File(..., description="Multiple PDF files")):
-    task_ids = []
-    for file in files:
-        task_id = f"{Path(file.filename).stem}_{asyncio.get_event_loop().time()}"
-        task_ids.append(task_id)
-        input_path = UPLOAD_DIR / f"{task_id}.pdf"
-        with open(input_path, "wb") as f:
-            f.write(await file.read())
-    return {"task_ids": task_ids, "message": f"Queued {len(files)} files for conversion"}
+async def batch_convert(
+    files: List[UploadFile] = File(..., description="Multiple PDF files"),
+    options: str = Form("{}", description="JSON conversion options applied to every file")
+):
+    """Queue several conversions. Poll /api/jobs/{job_id} or stream /api/jobs/{job_id}/events."""
+    opts = parse_options(options)
+    jobs = []
+    try:
+        for file in files:
+            jobs.append(await create_job(file, opts))
+    except BaseException:
+        for job in jobs:
+            shutil.rmtree(job.job_dir, ignore_errors=True)
+        raise
+    for job in jobs:
+        await dispatch(job)
+    return {
+        "task_ids": [job.id for job in jobs],
+        "jobs": [{"job_id": job.id, "filename": job.filename, "status_url": f"/api/jobs/{job.id}",
+                  "events_url": f"/api/jobs/{job.id}/events"} for job in jobs],
+        "message": f"Queued {len(files)} files for conversion",
+    }
+
+
+@app.get("/api/jobs", response_model=List[JobStatus], tags=["Jobs"])
+async def list_jobs():
+    return [job.to_dict(scheduler.queue_position(job)) for job in scheduler.jobs.values()]
+
+
+@app.get("/api/jobs/{job_id}", response_model=JobStatus, tags=["Jobs"])
+async def job_status(job_id: str):
+    job = get_job(job_id)
+    return job.to_dict(scheduler.queue_position(job))
+
+
+@app.get("/api/jobs/{job_id}/events", tags=["Jobs"])
+async def job_events(job_id: str):
+    """Stream a job's progress events, replaying those already published."""
+    return StreamingResponse(get_job(job_id).stream(), media_type="text/event-stream")
+
+
+@app.get("/api/jobs/{job_id}/download", tags=["Jobs"])
+async def job_download(job_id: str, request: Request):
+    job = get_job(job_id)
+    if job.status != 'completed':
+        raise HTTPException(409, detail=f"Job is {job.status}")
+    return await download(job.output_file, request)
+
+
+@app.get("/api/cache/stats", tags=["System"])
+async def cache_stats():
+    """Hit rates of the whole-result cache and the per-page EMF cache, and the output store's usage."""
+    return {"results": RESULT_CACHE.stats(), "emf": EMF_CACHE.stats(), "outputs": await asyncio.to_thread(OUTPUT_STORE.stats)}
+
+
+@app.get("/metrics", response_class=PlainTextResponse, tags=["System"])
+async def metrics_endpoint():
+    """Prometheus metrics: stage and page timings, queue depth, running processes, bytes and cache hits."""
+    QUEUE_DEPTH.set(scheduler.queue_depth)
+    RUNNING_JOBS.set(sum(1 for job in scheduler.jobs.values() if job.status == 'processing'))
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
 
 
 @app.get("/api/info", tags=["System"])
@@ -144,7 +602,7 @@ async def api_info():
         "version": "1.3.1",
         "description": "Convert PDF Slides to PowerPoint with Vector Graphics",
         "features": ["Vector graphics", "Page selection", "Parallel processing", "Batch conversion", "Large image support"],
-        "endpoints": {"ui": "/", "health": "/health", "docs": "/docs", "convert": "/api/convert", "batch": "/api/batch-convert", "download": "/api/download/{filename}"},
+        "endpoints": {"ui": "/", "health": "/health", "docs": "/docs", "convert": "/api/convert", "batch": "/api/batch-convert", "download": "/api/download/{job_id}/{filename}", "jobs": "/api/jobs", "job": "/api/jobs/{job_id}", "job_events": "/api/jobs/{job_id}/events", "job_download": "/api/jobs/{job_id}/download", "cache_stats": "/api/cache/stats", "metrics": "/metrics"},
         "links": {"github": "https://github.com/neosun100/pdf2ppt", "pypi": "https://pypi.org/project/pdfslides2ppt/", "docker": "https://hub.docker.com/r/neosun/pdf2ppt"}
     }
 